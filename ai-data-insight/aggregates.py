@@ -0,0 +1,206 @@
+"""
+Önceden hesaplanmış zaman agregaları (aggregate cube)
+Upload başına bir kez günlük toplam/adet tablosu kurulur (isteğe bağlı
+sku/segment kırılımıyla). Haftalık ve aylık seviyeler ham satırlardan değil
+günlük tablodan türetilir. Anomali ve forecast analizleri ile dashboard
+sorguları aynı tabloyu okur; tablo upload artefaktı olarak kolon bazlı
+saklanır.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from artifacts import write_dir
+from config import ARTIFACT_DIR
+from dates import date_format_key, parse_dates
+
+logger = logging.getLogger(__name__)
+
+# Kırılım yapılabilecek kolonlar (veride varsa)
+DIMENSIONS = ("sku", "segment")
+# Seviye -> pandas period frekansı (haftalar pazartesi başlar)
+GRAINS = {"day": "D", "week": "W-SUN", "month": "M"}
+TOTAL = "total"
+
+
+def cube_dir(upload_id: int, date_col: str = None, value_col: str = None) -> str:
+    """Upload'un aggregate artefakt klasörü; kolonlar verilirse o tarih/değer çiftine ait cube'unki"""
+    base = os.path.join(ARTIFACT_DIR, f"upload_{upload_id}")
+    if date_col is None:
+        return os.path.join(base, "aggregates")
+    digest = hashlib.sha1(f"{date_col}\x1f{value_col}".encode("utf-8")).hexdigest()[:12]
+    return os.path.join(base, f"aggregates_{digest}")
+
+
+def _daily_table(days: pd.Series, values: pd.Series, keys: pd.Series = None) -> pd.DataFrame:
+    """Gün (ve varsa kırılım anahtarı) başına toplam ve satır sayısı"""
+    frame = pd.DataFrame({"period": days, "value": values})
+    by = ["period"]
+    if keys is not None:
+        frame["key"] = keys.astype("string")
+        by.append("key")
+    table = frame.groupby(by, sort=True)["value"].agg(["sum", "count"]).reset_index()
+    return table
+
+
+class AggregateCube:
+    """Günlük toplamlar ve kırılımları; haftalık/aylık seviyeler bunlardan türetilir"""
+
+    def __init__(self, date_col: str, value_col: str, tables: dict):
+        self.date_col = date_col
+        self.value_col = value_col
+        # None -> toplam tablo, "sku"/"segment" -> kırılım tablosu
+        self.tables = tables
+
+    @property
+    def dimensions(self):
+        return [name for name in self.tables if name is not None]
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, date_col: str = "order_date", value_col: str = "quantity",
+              dimensions=DIMENSIONS) -> "AggregateCube":
+        """Ham satırlardan tek geçişte günlük tabloları kur"""
+        days = parse_dates(df[date_col], key=date_format_key(None, df.columns, date_col)).dt.normalize()
+
+        values = df[value_col]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors="coerce")
+
+        tables = {None: _daily_table(days, values)}
+        for dimension in dimensions:
+            if dimension in df.columns and dimension not in (date_col, value_col):
+                tables[dimension] = _daily_table(days, values, df[dimension])
+        return cls(date_col, value_col, tables)
+
+    @classmethod
+    def merge(cls, cubes: list) -> "AggregateCube":
+        """Birden çok upload'un cube'unu günlük seviyede birleştir (aynı gün toplanır)"""
+        first = cubes[0]
+        tables = {}
+        for dimension in [None] + first.dimensions:
+            parts = [cube.tables[dimension] for cube in cubes if dimension in cube.tables]
+            if len(parts) != len(cubes):
+                # Her upload'da olmayan kırılım birleşik cube'a alınmaz
+                continue
+            by = ["period"] + (["key"] if dimension is not None else [])
+            tables[dimension] = pd.concat(parts, ignore_index=True).groupby(
+                by, sort=True)[["sum", "count"]].sum().reset_index()
+        return cls(first.date_col, first.value_col, tables)
+
+    def between(self, start=None, end=None) -> "AggregateCube":
+        """Sadece [start, end] günlerini içeren cube"""
+        tables = {}
+        for dimension, table in self.tables.items():
+            if start is not None:
+                table = table[table["period"] >= pd.Timestamp(start)]
+            if end is not None:
+                table = table[table["period"] <= pd.Timestamp(end)]
+            tables[dimension] = table.reset_index(drop=True)
+        return type(self)(self.date_col, self.value_col, tables)
+
+    def daily(self) -> pd.DataFrame:
+        """Günlük toplam serisi ([date_col, value_col], tarihe göre sıralı)"""
+        table = self.tables[None]
+        return pd.DataFrame({
+            self.date_col: table["period"].to_numpy(),
+            self.value_col: table["sum"].to_numpy(),
+        })
+
+    def query(self, grain: str = "day", dimension: str = None, key: str = None,
+              start=None, end=None) -> pd.DataFrame:
+        """Seviye/kırılım/tarih aralığına göre toplamlar (period, [key], sum, count, mean)"""
+        if grain not in GRAINS:
+            raise ValueError(f"Geçersiz seviye: {grain} (day, week, month)")
+        if dimension not in self.tables:
+            raise ValueError(f"Kırılım bulunamadı: {dimension}")
+
+        table = self.tables[dimension]
+        if key is not None and dimension is not None:
+            table = table[table["key"] == str(key)]
+        if start is not None:
+            table = table[table["period"] >= pd.Timestamp(start)]
+        if end is not None:
+            table = table[table["period"] <= pd.Timestamp(end)]
+
+        if grain != "day":
+            periods = table["period"].dt.to_period(GRAINS[grain]).dt.start_time
+            by = [periods] + ([table["key"]] if dimension is not None else [])
+            table = table.groupby(by, sort=True)[["sum", "count"]].sum().reset_index()
+
+        table = table.reset_index(drop=True)
+        table["mean"] = table["sum"] / table["count"].where(table["count"] > 0)
+        return table
+
+    def save(self, target: str) -> str:
+        """Kolon bazlı kaydet (öncekinin yerine atomik olarak)"""
+        with write_dir(target) as tmp:
+            for dimension, table in self.tables.items():
+                arrays = {
+                    "period": table["period"].to_numpy(dtype="datetime64[D]"),
+                    "sum": table["sum"].to_numpy(),
+                    "count": table["count"].to_numpy(dtype=np.int64),
+                }
+                if dimension is not None:
+                    arrays["key"] = table["key"].to_numpy(dtype=str)
+                np.savez(os.path.join(tmp, f"{dimension or TOTAL}.npz"), **arrays)
+
+            meta = {
+                "date_col": self.date_col,
+                "value_col": self.value_col,
+                "dimensions": self.dimensions,
+                "days": int(len(self.tables[None])),
+                "created_at": datetime.utcnow().isoformat(),
+            }
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+        return target
+
+    @classmethod
+    def load(cls, target: str):
+        """Kaydedilmiş cube'u oku (yoksa None)"""
+        meta_path = os.path.join(target, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+
+        tables = {}
+        for dimension in [None] + meta["dimensions"]:
+            with np.load(os.path.join(target, f"{dimension or TOTAL}.npz")) as data:
+                # build() ile aynı çözünürlük (merge/karşılaştırma tutarlı olsun)
+                table = pd.DataFrame({"period": data["period"].astype("datetime64[us]")})
+                if dimension is not None:
+                    table["key"] = pd.array(data["key"], dtype="string")
+                table["sum"] = data["sum"]
+                table["count"] = data["count"]
+            tables[dimension] = table
+        return cls(meta["date_col"], meta["value_col"], tables)
+
+
+def daily_totals(df: pd.DataFrame, date_col: str, value_col: str, cube: AggregateCube = None) -> pd.DataFrame:
+    """Analizlerin ortak günlük serisi: cube varsa ondan, yoksa ham veriden"""
+    if cube is None:
+        cube = AggregateCube.build(df, date_col, value_col, dimensions=())
+    return cube.daily()
+
+
+def save_cube(upload_id: int, cube: AggregateCube, keyed: bool = False) -> str:
+    """Pipeline cube'unu (keyed ise kolon çiftine özel cube'u) kaydet"""
+    target = cube_dir(upload_id, cube.date_col, cube.value_col) if keyed else cube_dir(upload_id)
+    path = cube.save(target)
+    logger.info(f"Upload {upload_id} için aggregate cube kaydedildi: {path}")
+    return path
+
+
+def load_cube(upload_id: int, date_col: str = None, value_col: str = None):
+    """Upload'un cube'u; kolonlar verilirse sadece o tarih/değer kolonlarıyla kurulmuş olan (yoksa None)"""
+    cube = AggregateCube.load(cube_dir(upload_id))
+    if date_col is None or (cube is not None and (cube.date_col, cube.value_col) == (date_col, value_col)):
+        return cube
+    return AggregateCube.load(cube_dir(upload_id, date_col, value_col))
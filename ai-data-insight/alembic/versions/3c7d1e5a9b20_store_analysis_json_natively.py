@@ -0,0 +1,37 @@
+"""store_analysis_json_natively
+
+Revision ID: 3c7d1e5a9b20
+Revises: 8fc998dcd546
+Create Date: 2026-10-19 10:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7d1e5a9b20'
+down_revision: Union[str, Sequence[str], None] = '8fc998dcd546'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Eski kayıtlarda JSON kolonlarına JSON string'i yazılmıştı; gerçek JSON'a çevir
+    for column in ('summary', 'insights', 'forecast_data'):
+        op.execute(
+            f"UPDATE analyses SET {column} = ({column} #>> '{{}}')::json "
+            f"WHERE json_typeof({column}) = 'string'"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in ('summary', 'insights', 'forecast_data'):
+        op.execute(
+            f"UPDATE analyses SET {column} = to_json({column}::text) "
+            f"WHERE {column} IS NOT NULL AND json_typeof({column}) <> 'string'"
+        )
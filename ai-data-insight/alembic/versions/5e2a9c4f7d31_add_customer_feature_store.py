@@ -0,0 +1,59 @@
+"""add_customer_feature_store
+
+Revision ID: 5e2a9c4f7d31
+Revises: 3c7d1e5a9b20
+Create Date: 2026-10-19 14:05:17.402913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a9c4f7d31'
+down_revision: Union[str, Sequence[str], None] = '3c7d1e5a9b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'customer_features',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('customer_id', sa.String(length=255), nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=True),
+        sa.Column('total_quantity', sa.Float(), nullable=True),
+        sa.Column('total_spent', sa.Float(), nullable=True),
+        sa.Column('first_order_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_order_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('tenant_id', 'customer_id', name='uq_customer_features_tenant_customer')
+    )
+    op.create_index(op.f('ix_customer_features_id'), 'customer_features', ['id'], unique=False)
+    op.create_index(op.f('ix_customer_features_tenant_id'), 'customer_features', ['tenant_id'], unique=False)
+    op.create_table(
+        'feature_store_uploads',
+        sa.Column('upload_id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=True),
+        sa.Column('customer_count', sa.Integer(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+        sa.ForeignKeyConstraint(['upload_id'], ['uploads.id'], ),
+        sa.PrimaryKeyConstraint('upload_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('feature_store_uploads')
+    op.drop_index(op.f('ix_customer_features_tenant_id'), table_name='customer_features')
+    op.drop_index(op.f('ix_customer_features_id'), table_name='customer_features')
+    op.drop_table('customer_features')
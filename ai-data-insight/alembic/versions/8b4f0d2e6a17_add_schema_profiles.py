@@ -0,0 +1,46 @@
+"""add_schema_profiles
+
+Revision ID: 8b4f0d2e6a17
+Revises: 5e2a9c4f7d31
+Create Date: 2026-10-19 16:42:08.115204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4f0d2e6a17'
+down_revision: Union[str, Sequence[str], None] = '5e2a9c4f7d31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'schema_profiles',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('signature', sa.String(length=64), nullable=False),
+        sa.Column('columns', sa.JSON(), nullable=False),
+        sa.Column('profile', sa.JSON(), nullable=True),
+        sa.Column('overrides', sa.JSON(), nullable=True),
+        sa.Column('use_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('tenant_id', 'signature', name='uq_schema_profiles_tenant_signature')
+    )
+    op.create_index(op.f('ix_schema_profiles_id'), 'schema_profiles', ['id'], unique=False)
+    op.create_index(op.f('ix_schema_profiles_tenant_id'), 'schema_profiles', ['tenant_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_schema_profiles_tenant_id'), table_name='schema_profiles')
+    op.drop_index(op.f('ix_schema_profiles_id'), table_name='schema_profiles')
+    op.drop_table('schema_profiles')
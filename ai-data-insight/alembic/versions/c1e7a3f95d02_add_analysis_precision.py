@@ -0,0 +1,28 @@
+"""add_analysis_precision
+
+Revision ID: c1e7a3f95d02
+Revises: 8b4f0d2e6a17
+Create Date: 2026-10-19 18:21:44.730561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1e7a3f95d02'
+down_revision: Union[str, Sequence[str], None] = '8b4f0d2e6a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('analyses', sa.Column('precision', sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('analyses', 'precision')
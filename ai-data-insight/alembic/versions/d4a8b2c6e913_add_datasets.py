@@ -0,0 +1,61 @@
+"""add_datasets
+
+Revision ID: d4a8b2c6e913
+Revises: c1e7a3f95d02
+Create Date: 2026-10-19 19:05:41.528317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8b2c6e913'
+down_revision: Union[str, Sequence[str], None] = 'c1e7a3f95d02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'datasets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('date_col', sa.String(length=255), nullable=True),
+        sa.Column('value_col', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('tenant_id', 'name', name='uq_datasets_tenant_name')
+    )
+    op.create_index(op.f('ix_datasets_id'), 'datasets', ['id'], unique=False)
+    op.create_index(op.f('ix_datasets_tenant_id'), 'datasets', ['tenant_id'], unique=False)
+    op.create_table(
+        'dataset_partitions',
+        sa.Column('dataset_id', sa.Integer(), nullable=False),
+        sa.Column('upload_id', sa.Integer(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=True),
+        sa.Column('min_date', sa.DateTime(), nullable=True),
+        sa.Column('max_date', sa.DateTime(), nullable=True),
+        sa.Column('added_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['dataset_id'], ['datasets.id'], ),
+        sa.ForeignKeyConstraint(['upload_id'], ['uploads.id'], ),
+        sa.PrimaryKeyConstraint('dataset_id', 'upload_id')
+    )
+    op.create_index(op.f('ix_dataset_partitions_min_date'), 'dataset_partitions', ['min_date'], unique=False)
+    op.create_index(op.f('ix_dataset_partitions_max_date'), 'dataset_partitions', ['max_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_dataset_partitions_max_date'), table_name='dataset_partitions')
+    op.drop_index(op.f('ix_dataset_partitions_min_date'), table_name='dataset_partitions')
+    op.drop_table('dataset_partitions')
+    op.drop_index(op.f('ix_datasets_tenant_id'), table_name='datasets')
+    op.drop_index(op.f('ix_datasets_id'), table_name='datasets')
+    op.drop_table('datasets')
@@ -0,0 +1,28 @@
+"""add_upload_claimed_at
+
+Revision ID: e7b1c9d3f402
+Revises: d4a8b2c6e913
+Create Date: 2026-10-19 21:07:12.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b1c9d3f402'
+down_revision: Union[str, Sequence[str], None] = 'd4a8b2c6e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('uploads', sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('uploads', 'claimed_at')
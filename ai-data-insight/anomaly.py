@@ -1,12 +1,14 @@
 import pandas as pd
+from aggregates import daily_totals
 
-def detect_anomalies(df: pd.DataFrame, date_col="order_date", value_col="quantity"):
+def detect_anomalies(df: pd.DataFrame, date_col="order_date", value_col="quantity", cube=None):
     """
     Günlük satış adetlerini analiz ederek anomalileri tespit eder.
     Ortalama ± 3 * standart sapma dışında kalan günleri anomali kabul eder.
+    cube verilirse günlük toplamlar önceden hesaplanmış tablodan okunur.
     """
     # Günlük toplam satış
-    daily = df.groupby(date_col)[value_col].sum().reset_index()
+    daily = daily_totals(df, date_col, value_col, cube)
     
     mean = daily[value_col].mean()
     std = daily[value_col].std()
@@ -0,0 +1,110 @@
+"""
+Artefakt klasörlerinin atomik yazımı
+Her yazım benzersiz isimli bir klasöre yapılır; tamamlanınca sürüm olarak
+yayınlanır ve hedef yol bu sürümü gösteren sembolik bağlantıya tek bir
+rename ile çevrilir. Okuyucular her an eski ya da yeni sürümün tamamını
+görür, yazım yarıda kalırsa eski sürüm yerinde durur. Eşzamanlı yazıcılar
+birbirinin klasörüne dokunmaz; son yayınlayan kazanır. Bir önceki sürüm
+(onu henüz okuyanlar için) tutulur, daha eskileri silinir. Sembolik
+bağlantı sayesinde okuyucular hedef yolu değişmeden kullanır. Yazıcı iptal
+edildiyse (örn. pipeline aşaması zaman aşımıyla terk edildi) sürüm
+yayınlanmaz.
+
+Sembolik bağlantı oluşturulamayan sistemlerde (örn. yetkisi olmayan
+Windows) eski klasör kenara alınıp yeni sürüm hedefe rename edilir; bu
+durumda iki rename arasında hedef kısa süre yoktur.
+"""
+
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+
+# Yazımı süren klasörlerin son eki (temizlikte dokunulmaz)
+STAGING_SUFFIX = ".tmp"
+
+
+class Cancelled(RuntimeError):
+    """Yazıcı iptal edildi; artefakt yayınlanmadı"""
+
+
+def _unique() -> str:
+    return f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+
+
+def _versions(target: str) -> list:
+    """Hedefin yayınlanmış sürüm klasörleri (eskiden yeniye)"""
+    parent, name = os.path.split(target)
+    prefix = f"{name}@"
+    return sorted(
+        entry for entry in os.listdir(parent)
+        if entry.startswith(prefix) and not entry.endswith(STAGING_SUFFIX)
+    )
+
+
+def publish(staging: str, target: str) -> str:
+    """Tamamlanmış klasörü hedefin yeni sürümü olarak yayınla"""
+    parent, name = os.path.split(target)
+    version = f"{name}@{_unique()}"
+    os.replace(staging, os.path.join(parent, version))
+
+    link = os.path.join(parent, f"{name}.{_unique()}.link")
+    # Göreli bağlantı: üst klasör taşınsa da geçerli kalır
+    try:
+        os.symlink(version, link)
+    except (OSError, NotImplementedError, AttributeError):
+        return _publish_by_rename(version, target)
+    previous = os.readlink(target) if os.path.islink(target) else None
+    if os.path.isdir(target) and previous is None:
+        # Eski düzende gerçek klasör: bir kez kenara alınıp sürüm gibi temizlenir
+        previous = f"{name}@0-legacy"
+        os.replace(target, os.path.join(parent, previous))
+    os.replace(link, target)
+
+    # Sadece bu ve değiştirilen sürümden eskiler silinir; eşzamanlı yazıcının
+    # yeni sürümüne ve o an yayında olana dokunulmaz
+    keep = min(version, previous) if previous else version
+    _cleanup(target, keep, current=os.readlink(target))
+    return target
+
+
+def _publish_by_rename(version: str, target: str) -> str:
+    """Sembolik bağlantı yoksa: mevcut hedefi sürüm olarak kenara al, yeni sürümü yerine taşı"""
+    parent, name = os.path.split(target)
+    if os.path.isdir(target):
+        # Kenara alınan klasörün adı yeni sürümden büyük; okuyanlar için tutulur
+        os.replace(target, os.path.join(parent, f"{name}@{_unique()}"))
+    os.replace(os.path.join(parent, version), target)
+    _cleanup(target, version)
+    return target
+
+
+def _cleanup(target: str, keep: str, current: str = None) -> None:
+    """keep'ten eski sürümleri sil (yayındaki sürüme dokunmadan)"""
+    parent = os.path.dirname(target)
+    for old in _versions(target):
+        if old < keep and old != current:
+            shutil.rmtree(os.path.join(parent, old), ignore_errors=True)
+
+
+def check_cancelled(cancelled) -> None:
+    """İptal olayı işaretlenmişse Cancelled (None: iptal edilemez)"""
+    if cancelled is not None and cancelled.is_set():
+        raise Cancelled("İptal edildi, artefakt yayınlanmadı")
+
+
+@contextmanager
+def write_dir(target: str, cancelled=None):
+    """Boş bir yazım klasörü verir; blok hatasız biter ve iptal edilmemişse hedefin yerine atomik olarak geçer"""
+    parent, name = os.path.split(target)
+    os.makedirs(parent, exist_ok=True)
+    staging = os.path.join(parent, f"{name}@{_unique()}{STAGING_SUFFIX}")
+    os.makedirs(staging)
+    try:
+        yield staging
+        check_cancelled(cancelled)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    publish(staging, target)
@@ -4,11 +4,20 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
 from database import get_db
 from models import User, Tenant
-from config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from starlette.concurrency import run_in_threadpool
+from config import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, AUTH_CACHE_TTL_SECONDS,
+    PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE
+)
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +27,100 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # JWT token scheme
 security = HTTPBearer()
 
+# Çözümlenmiş principal önbelleği (process içi, kısa ömürlü)
+# _user_cache: token subject -> (son geçerlilik, detached User)
+# _tenant_cache: tenant_id -> (son geçerlilik, detached Tenant)
+_user_cache = {}
+_tenant_cache = {}
+_cache_lock = threading.Lock()
+
+def _cache_get(cache: dict, key):
+    """Önbellekten süresi dolmamış kaydı getir"""
+    if AUTH_CACHE_TTL_SECONDS <= 0:
+        return None
+    with _cache_lock:
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            cache.pop(key, None)
+            return None
+        return value
+
+def _cache_set(cache: dict, key, value):
+    """Kaydı TTL ile önbelleğe yaz"""
+    if AUTH_CACHE_TTL_SECONDS <= 0:
+        return
+    with _cache_lock:
+        cache[key] = (time.monotonic() + AUTH_CACHE_TTL_SECONDS, value)
+
+def _attach_cached(db: Session, obj):
+    """Önbellekteki detached nesneyi DB'ye gitmeden mevcut session'a bağla"""
+    return db.merge(obj, load=False)
+
+def _detach_for_cache(db: Session, obj):
+    """Session'daki nesnenin önbelleğe konacak detached kopyasını döndür"""
+    db.expunge(obj)
+    return obj, _attach_cached(db, obj)
+
+def invalidate_user_cache(user_id: Optional[int] = None):
+    """Kullanıcı önbelleğini temizle (user_id verilmezse tamamını)"""
+    with _cache_lock:
+        if user_id is None:
+            _user_cache.clear()
+        else:
+            _user_cache.pop(str(user_id), None)
+
+def invalidate_tenant_cache(tenant_id: Optional[int] = None):
+    """Tenant önbelleğini temizle (tenant_id verilmezse tamamını)"""
+    with _cache_lock:
+        if tenant_id is None:
+            _tenant_cache.clear()
+        else:
+            _tenant_cache.pop(tenant_id, None)
+
+def _schedule_invalidation(target, invalidate, key):
+    """Hemen ve ayrıca commit sonrası önbellekten düşür.
+
+    Commit'ten önce başka bir istek eski satırı tekrar önbelleğe almış
+    olabileceği için commit sonrasında bir kez daha temizlenir.
+    """
+    if key is None:
+        return
+    invalidate(key)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("auth_cache_invalidations", []).append((invalidate, key))
+
+@event.listens_for(User.is_active, "set")
+def _on_user_active_change(target, value, oldvalue, initiator):
+    if value != oldvalue:
+        _schedule_invalidation(target, invalidate_user_cache, target.id)
+
+@event.listens_for(Tenant.is_active, "set")
+def _on_tenant_active_change(target, value, oldvalue, initiator):
+    if value != oldvalue:
+        _schedule_invalidation(target, invalidate_tenant_cache, target.id)
+
+@event.listens_for(Session, "after_commit")
+def _flush_auth_cache_invalidations(session):
+    for invalidate, key in session.info.pop("auth_cache_invalidations", []):
+        invalidate(key)
+
+# Bcrypt CPU yoğun (~250 ms) olduğu için varsayılan threadpool yerine
+# ayrı ve boyutu sınırlı bir havuzda çalıştırılır; login yığılması
+# veri endpoint'lerinin thread'lerini tüketmez.
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="pwd-hash")
+_hash_stats_lock = threading.Lock()
+_hash_stats = {
+    "in_flight": 0,
+    "peak_queue_depth": 0,
+    "completed": 0,
+    "rejected": 0,
+    "total_wait_ms": 0.0,
+}
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Şifre doğrulama"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -26,6 +129,59 @@ def get_password_hash(password: str) -> str:
     """Şifre hashleme"""
     return pwd_context.hash(password)
 
+def get_hash_pool_stats() -> dict:
+    """Hash havuzunun kuyruk metrikleri"""
+    with _hash_stats_lock:
+        in_flight = _hash_stats["in_flight"]
+        completed = _hash_stats["completed"]
+        return {
+            "workers": PASSWORD_HASH_WORKERS,
+            "max_queue": PASSWORD_HASH_MAX_QUEUE,
+            "in_flight": in_flight,
+            "queue_depth": max(in_flight - PASSWORD_HASH_WORKERS, 0),
+            "peak_queue_depth": _hash_stats["peak_queue_depth"],
+            "completed": completed,
+            "rejected": _hash_stats["rejected"],
+            "avg_wait_ms": round(_hash_stats["total_wait_ms"] / completed, 2) if completed else 0.0,
+        }
+
+async def _run_in_hash_pool(func, *args):
+    """Fonksiyonu hash havuzunda çalıştır; kuyruk doluysa 503 döndür"""
+    with _hash_stats_lock:
+        if _hash_stats["in_flight"] >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE:
+            _hash_stats["rejected"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Kimlik doğrulama servisi yoğun, lütfen tekrar deneyin",
+                headers={"Retry-After": "1"},
+            )
+        _hash_stats["in_flight"] += 1
+        queue_depth = max(_hash_stats["in_flight"] - PASSWORD_HASH_WORKERS, 0)
+        _hash_stats["peak_queue_depth"] = max(_hash_stats["peak_queue_depth"], queue_depth)
+
+    submitted_at = time.perf_counter()
+
+    def _timed():
+        wait_ms = (time.perf_counter() - submitted_at) * 1000
+        with _hash_stats_lock:
+            _hash_stats["total_wait_ms"] += wait_ms
+        return func(*args)
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, _timed)
+    finally:
+        with _hash_stats_lock:
+            _hash_stats["in_flight"] -= 1
+            _hash_stats["completed"] += 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Şifre doğrulama (hash havuzunda)"""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Şifre hashleme (hash havuzunda)"""
+    return await _run_in_hash_pool(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """JWT token oluşturma"""
     to_encode = data.copy()
@@ -67,8 +223,22 @@ def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+    cached_user = _cache_get(_user_cache, str(user_id))
+    if cached_user is not None:
+        user = _attach_cached(db, cached_user)
+    else:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            raise credentials_exception
+        cached_user, user = _detach_for_cache(db, user)
+        _cache_set(_user_cache, str(user_id), cached_user)
+    
+    if user.is_active is False:
+        raise credentials_exception
+    
+    # Token'daki tenant bilgisi kullanıcının güncel tenant'ı ile uyuşmalı
+    token_tenant_id = payload.get("tenant_id")
+    if token_tenant_id is not None and token_tenant_id != user.tenant_id:
         raise credentials_exception
     
     return user
@@ -78,17 +248,27 @@ def get_current_tenant(
     db: Session = Depends(get_db)
 ) -> Tenant:
     """Mevcut kullanıcının tenant'ını getir"""
-    tenant = db.query(Tenant).filter(Tenant.id == current_user.tenant_id).first()
-    if tenant is None:
+    cached_tenant = _cache_get(_tenant_cache, current_user.tenant_id)
+    if cached_tenant is not None:
+        tenant = _attach_cached(db, cached_tenant)
+    else:
+        tenant = db.query(Tenant).filter(Tenant.id == current_user.tenant_id).first()
+        if tenant is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Tenant not found"
+            )
+        cached_tenant, tenant = _detach_for_cache(db, tenant)
+        _cache_set(_tenant_cache, tenant.id, cached_tenant)
+    
+    if tenant.is_active is False:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tenant not found"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Tenant is inactive"
         )
     return tenant
 
-def create_user(email: str, password: str, full_name: str, tenant_id: int, db: Session) -> User:
-    """Yeni kullanıcı oluştur"""
-    hashed_password = get_password_hash(password)
+def _insert_user(db: Session, email: str, hashed_password: str, full_name: str, tenant_id: int) -> User:
     user = User(
         email=email,
         hashed_password=hashed_password,
@@ -100,12 +280,17 @@ def create_user(email: str, password: str, full_name: str, tenant_id: int, db: S
     db.refresh(user)
     return user
 
-def authenticate_user(email: str, password: str, db: Session) -> Union[User, bool]:
-    """Kullanıcı kimlik doğrulama"""
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        return False
-    
+def create_user(email: str, password: str, full_name: str, tenant_id: int, db: Session) -> User:
+    """Yeni kullanıcı oluştur"""
+    return _insert_user(db, email, get_password_hash(password), full_name, tenant_id)
+
+async def create_user_async(email: str, password: str, full_name: str, tenant_id: int, db: Session) -> User:
+    """Yeni kullanıcı oluştur (async endpoint'ler için)"""
+    hashed_password = await get_password_hash_async(password)
+    return await run_in_threadpool(_insert_user, db, email, hashed_password, full_name, tenant_id)
+
+def _check_password(user: User, email: str, password: str) -> Union[User, bool]:
+    """Bulunan kullanıcının şifresini doğrula (sync ve async yollar ortak)"""
     # Geçici çözüm: test kullanıcısı için basit kontrol
     if email == "test@test.com" and password == "secret":
         return user
@@ -118,3 +303,17 @@ def authenticate_user(email: str, password: str, db: Session) -> Union[User, boo
         return False
     
     return user
+
+async def authenticate_user_async(email: str, password: str, db: Session) -> Union[User, bool]:
+    """Kullanıcı kimlik doğrulama (async endpoint'ler için; doğrulama hash havuzunda)"""
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.email == email).first())
+    if not user:
+        return False
+    return await _run_in_hash_pool(_check_password, user, email, password)
+
+def authenticate_user(email: str, password: str, db: Session) -> Union[User, bool]:
+    """Kullanıcı kimlik doğrulama"""
+    user = db.query(User).filter(User.email == email).first()
+    if not user:
+        return False
+    return _check_password(user, email, password)
@@ -0,0 +1,128 @@
+"""
+Pipeline checkpoint'leri
+Preprocessing'in pahalı aşamalarının çıktıları (temizlenmiş çerçeve,
+günlük aggregate cube, şema/kolon rolleri) upload ve pipeline sürümü
+başına saklanır. Çerçeve kolon bazlı yazılır: sayısal/tarih kolonları
+.npy, metin kolonları kod + kategori dizisi olarak. Checkpoint kaynak
+dosyanın boyut ve değişiklik zamanıyla eşleşmiyorsa geçersiz sayılır.
+Başarısız bir çalıştırmanın tekrarı ya da farklı analizlerle yeniden
+çalıştırma, okuma/temizlik/parse adımlarını atlayıp buradan başlar.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from aggregates import AggregateCube
+from artifacts import write_dir
+from config import ARTIFACT_DIR, PIPELINE_VERSION
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+
+def checkpoint_dir(upload_id: int, version: str = PIPELINE_VERSION) -> str:
+    """Upload'un bu pipeline sürümü için checkpoint klasörü"""
+    return os.path.join(ARTIFACT_DIR, f"upload_{upload_id}", "checkpoints", f"v{version}")
+
+
+def source_fingerprint(path: str) -> dict:
+    """Checkpoint'in ait olduğu dosya sürümü"""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _is_text(series: pd.Series) -> bool:
+    """Sadece metin değerli kolon (kategoriler metne çevrilince değişmez)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values = series.cat.categories
+    elif pd.api.types.is_string_dtype(series.dtype) or series.dtype == object:
+        values = series.dropna().unique()
+    else:
+        return False
+    return all(isinstance(value, str) for value in values)
+
+
+def save_frame(df: pd.DataFrame, target: str) -> list:
+    """Çerçeveyi kolon bazlı yaz; kolon meta listesini döndürür (desteklenmeyen tipte TypeError)"""
+    columns = []
+    for i, (col, series) in enumerate(df.items()):
+        dtype = series.dtype
+        entry = {"name": col, "dtype": str(dtype)}
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            entry.update(kind="datetime_tz", tz=str(dtype.tz))
+            np.save(os.path.join(target, f"{i}.npy"), series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy())
+        elif _is_text(series):
+            # Metin kolonları tekrar eden değerler için kod + kategori olarak
+            codes = pd.Categorical(series)
+            entry["kind"] = "text"
+            np.save(os.path.join(target, f"{i}.npy"), codes.codes.astype(np.int32))
+            np.save(os.path.join(target, f"{i}_categories.npy"), codes.categories.to_numpy(dtype=str))
+        elif not pd.api.types.is_extension_array_dtype(dtype) and dtype.kind in "biufmM":
+            entry["kind"] = "array"
+            np.save(os.path.join(target, f"{i}.npy"), series.to_numpy())
+        else:
+            raise TypeError(f"{col} kolonu checkpoint'e yazılamıyor: {dtype}")
+        columns.append(entry)
+    return columns
+
+
+def load_frame(target: str, columns: list) -> pd.DataFrame:
+    """save_frame ile yazılmış çerçeveyi oku"""
+    data = {}
+    for i, entry in enumerate(columns):
+        values = np.load(os.path.join(target, f"{i}.npy"))
+        if entry["kind"] == "text":
+            categories = np.load(os.path.join(target, f"{i}_categories.npy"))
+            series = pd.Series(pd.Categorical.from_codes(values, categories))
+            if entry["dtype"] != "category":
+                series = series.astype(entry["dtype"])
+        elif entry["kind"] == "datetime_tz":
+            series = pd.Series(values).dt.tz_localize("UTC").dt.tz_convert(entry["tz"])
+        else:
+            series = pd.Series(values)
+        data[entry["name"]] = series
+    return pd.DataFrame(data)
+
+
+def save_checkpoint(target: str, source: str, frame: pd.DataFrame, cube, schema: dict,
+                    cancelled=None) -> str:
+    """Temiz çerçeve, cube ve şemayı checkpoint olarak kaydet (öncekinin yerine atomik olarak)"""
+    with write_dir(target, cancelled) as tmp:
+        columns = save_frame(frame, tmp)
+        if cube is not None:
+            cube.save(os.path.join(tmp, "aggregates"))
+        meta = {
+            "source": source_fingerprint(source),
+            "rows": int(len(frame)),
+            "columns": columns,
+            "schema": schema,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        with open(os.path.join(tmp, "meta.json"), "wb") as f:
+            f.write(dumps(meta))
+    return target
+
+
+def load_checkpoint(target: str, source: str):
+    """Geçerli checkpoint: {"frame", "cube", "schema"}; yoksa ya da dosya değiştiyse None"""
+    meta_path = os.path.join(target, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["source"] != source_fingerprint(source):
+            logger.info(f"Kaynak dosya değişmiş, checkpoint kullanılmayacak: {target}")
+            return None
+        frame = load_frame(target, meta["columns"])
+        cube = AggregateCube.load(os.path.join(target, "aggregates"))
+    except Exception as e:
+        logger.warning(f"Checkpoint okunamadı, aşamalar yeniden çalışacak: {e}")
+        return None
+    return {"frame": frame, "cube": cube, "schema": meta["schema"]}
+
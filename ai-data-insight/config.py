@@ -16,6 +16,36 @@ ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Çözümlenmiş kullanıcı/tenant önbelleğinin ömrü (saniye). 0 verilirse önbellek kapanır.
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+# Bcrypt hash/verify işlemleri için ayrılmış thread havuzu
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Havuzda bekleyebilecek en fazla işlem; aşılırsa 503 döner
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+# ML worker rolü: true ise lightgbm/sklearn ve modeller açılışta yüklenir,
+# aksi halde ilk kullanımda yüklenir
+PRELOAD_ML_MODELS = os.getenv("PRELOAD_ML_MODELS", "false").lower() == "true"
+
+# Toplu (fleet) churn eğitimi
+# Eğitim için gereken en az etiketli müşteri sayısı
+MIN_TRAINING_CUSTOMERS = int(os.getenv("MIN_TRAINING_CUSTOMERS", "10"))
+# Paralel eğitim process sayısı (0: çekirdek sayısına göre)
+TRAINING_MAX_WORKERS = int(os.getenv("TRAINING_MAX_WORKERS", "0"))
+TRAINING_REPORT_DIR = os.getenv("TRAINING_REPORT_DIR", "./models/training_runs")
+
+# Artımlı (warm-start) churn eğitimi
+# Önceki modelin üzerine eklenecek en fazla boosting turu
+CHURN_INCREMENTAL_ROUNDS = int(os.getenv("CHURN_INCREMENTAL_ROUNDS", "20"))
+# Feature ortalamasındaki kayma (eğitim std'si cinsinden) bu değeri aşarsa tam eğitim
+CHURN_DRIFT_THRESHOLD = float(os.getenv("CHURN_DRIFT_THRESHOLD", "0.5"))
+
+# Churn hiperparametre araması (successive halving)
+TUNING_TRIALS = int(os.getenv("TUNING_TRIALS", "27"))
+TUNING_ETA = int(os.getenv("TUNING_ETA", "3"))
+TUNING_MIN_ROUNDS = int(os.getenv("TUNING_MIN_ROUNDS", "25"))
+TUNING_MAX_ROUNDS = int(os.getenv("TUNING_MAX_ROUNDS", "400"))
+TUNING_CACHE_DIR = os.getenv("TUNING_CACHE_DIR", "./models/tuning_cache")
 
 # API Settings
 API_V1_STR = "/api/v1"
@@ -23,4 +53,68 @@ PROJECT_NAME = "AI Data Insight"
 
 # File Upload
 UPLOAD_DIR = "./uploads"
+# Upload'un diske yazılırken okunduğu parça boyu (byte)
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+# Önizleme analizi için upload sırasında tutulan örneklem boyu (satır)
+PREVIEW_SAMPLE_SIZE = int(os.getenv("PREVIEW_SAMPLE_SIZE", "10000"))
+# Düz CSV upload'ları diskte gzip ile sıkıştırılmış saklanır (sıkıştırılmış upload'lar olduğu gibi)
+UPLOAD_STORE_COMPRESSED = os.getenv("UPLOAD_STORE_COMPRESSED", "false").lower() == "true"
+UPLOAD_COMPRESSION_LEVEL = int(os.getenv("UPLOAD_COMPRESSION_LEVEL", "6"))
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+
+# CSV okuma
+# Arka uç: "pandas" (C engine) veya "pyarrow" (çok thread'li; kurulu değilse pandas)
+CSV_READER_BACKEND = os.getenv("CSV_READER_BACKEND", "pandas")
+# pyarrow okuma thread sayısı (0: çekirdek sayısı)
+CSV_READER_THREADS = int(os.getenv("CSV_READER_THREADS", "0"))
+# pyarrow ile okunan kolonlar ArrowDtype olarak (kopyasız) pandas'a aktarılır; checkpoint ve
+# aggregate katmanları numpy/pandas dtype'larını beklediği için varsayılan kapalı
+CSV_ARROW_DTYPES = os.getenv("CSV_ARROW_DTYPES", "false").lower() == "true"
+# Kodlama tespiti için dosya başından okunan bayt
+CSV_ENCODING_SAMPLE_BYTES = int(os.getenv("CSV_ENCODING_SAMPLE_BYTES", str(1024 * 1024)))
+# UTF-8 değilse sırayla denenen kodlamalar
+CSV_FALLBACK_ENCODINGS = [e for e in os.getenv("CSV_FALLBACK_ENCODINGS", "cp1254,iso-8859-9").split(",") if e]
+
+# Pipeline artefaktları (demand tahminleri vb.)
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "./artifacts")
+# Demand tahmini parça boyutu (satır)
+DEMAND_PREDICTION_CHUNK_SIZE = int(os.getenv("DEMAND_PREDICTION_CHUNK_SIZE", "100000"))
+
+# Event log (etkileşim) analizi
+# Aynı kullanıcının iki olayı arasında bu süreden uzun boşluk yeni oturum başlatır
+EVENT_SESSION_GAP_MINUTES = int(os.getenv("EVENT_SESSION_GAP_MINUTES", "30"))
+# Büyük dosyalarda okunan parça boyu ve kullanıcı bölümü sayısı
+EVENT_CHUNK_SIZE = int(os.getenv("EVENT_CHUNK_SIZE", "1000000"))
+EVENT_PARTITIONS = int(os.getenv("EVENT_PARTITIONS", "16"))
+# Bu satır sayısından büyük upload'lar bellekte değil dosyadan parça parça analiz edilir
+EVENT_FILE_MIN_ROWS = int(os.getenv("EVENT_FILE_MIN_ROWS", "2000000"))
+
+# Tarih parse
+# Gün/ay sırası belirsiz formatlarda (10/11/2023) gün-önce tercih edilir
+DATE_DAYFIRST = os.getenv("DATE_DAYFIRST", "true").lower() == "true"
+# Format çıkarımı/doğrulaması için kolondan alınan örneklem boyu
+DATE_FORMAT_SAMPLE_SIZE = int(os.getenv("DATE_FORMAT_SAMPLE_SIZE", "1000"))
+# Hiçbir format örneklemin tamamına uymazsa en az bu oranda uyan en iyi format seçilir
+DATE_FORMAT_MIN_MATCH = float(os.getenv("DATE_FORMAT_MIN_MATCH", "0.5"))
+
+# Yaklaşık özet (sketch) modu
+# Bu satır sayısından büyük verilerde describe() yerine sketch'ler kullanılır
+SUMMARY_SKETCH_MIN_ROWS = int(os.getenv("SUMMARY_SKETCH_MIN_ROWS", "5000000"))
+SUMMARY_SKETCH_CHUNK_SIZE = int(os.getenv("SUMMARY_SKETCH_CHUNK_SIZE", "1000000"))
+
+# Pipeline DAG
+# Bağımsız aşamaları eşzamanlı çalıştıran thread sayısı
+PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", "4"))
+# Aşama başına varsayılan zaman aşımı (saniye)
+PIPELINE_STAGE_TIMEOUT = float(os.getenv("PIPELINE_STAGE_TIMEOUT", "600"))
+# Temizlik/parse aşamalarının çıktıları upload başına checkpoint olarak saklanır;
+# okuma/temizlik mantığı değiştiğinde sürüm artırılır (eski checkpoint'ler kullanılmaz)
+PIPELINE_CHECKPOINTS = os.getenv("PIPELINE_CHECKPOINTS", "true").lower() == "true"
+PIPELINE_VERSION = os.getenv("PIPELINE_VERSION", "1")
+# İşlenen upload'un kiralama süresi (saniye); bu süreyi aşan "processing" kaydı çökmüş
+# worker'dan kalmış sayılır, retry/scheduler tarafından checkpoint'ten devam ettirilir
+PIPELINE_CLAIM_TTL = int(os.getenv("PIPELINE_CLAIM_TTL", "3600"))
+
+# Analysis Results
+# Serialize edilmiş sonuçları tutan LRU boyutu (upload sayısı)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "256"))
@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine, text as sa_text
 from sqlalchemy.orm import sessionmaker
 from config import DATABASE_URL
+from serialization import dumps_str
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,7 +12,8 @@ engine = create_engine(
     pool_pre_ping=True,   # bozuk bağlantıları otomatik yenile
     pool_size=5,          # temel havuz boyutu
     max_overflow=10,      # yoğunlukta ekstra bağlantı
-    echo=False            # Production'da False olmalı
+    echo=False,           # Production'da False olmalı
+    json_serializer=dumps_str  # JSON kolonları için NumPy uyumlu hızlı serileştirici
 )
 
 # Session factory
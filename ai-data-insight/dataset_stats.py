@@ -0,0 +1,135 @@
+"""
+Veri seti başına artımlı özet istatistikleri
+Her kolon için birleştirilebilir durum (count, mean, M2, min/max, boş
+sayısı, quantile/distinct/top-k sketch'leri) veri seti artefaktı olarak
+saklanır. Veri setine yeni upload eklendiğinde sadece yeni satırlar
+sketch'lenip mevcut durumla birleştirilir; özet tüm veri üzerinde
+describe() yeniden çalıştırılmadan durumdan üretilir. Moment'ler kesin,
+quantile ve distinct değerleri hata sınırlarıyla yaklaşıktır. Tipi önceki
+upload'lardan farklı gelen kolon mevcut durumu bozmaz; çakışma olarak
+kaydedilir. Güncellemeler veri seti başına dosya kilidiyle süreçler arası
+sıralanır.
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from artifacts import write_dir
+from config import ARTIFACT_DIR, SUMMARY_SKETCH_CHUNK_SIZE
+from serialization import describe_to_dict
+from sketches import ColumnSketch, approximate_describe, merge_sketches, sketch_frame
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - fcntl sadece POSIX'te var
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Süreç içi kilit; süreçler (worker'lar) arası sıralama dosya kilidiyle
+_lock = threading.Lock()
+
+
+def stats_dir(dataset_id: int) -> str:
+    """Veri setinin özet durumu klasörü"""
+    return os.path.join(ARTIFACT_DIR, f"dataset_{dataset_id}", "summary")
+
+
+@contextmanager
+def stats_lock(dataset_id: int):
+    """Veri seti durumunun oku-birleştir-yaz kilidi (dosya kapanınca bırakılır)"""
+    # Kilit dosyası sürümlenen özet klasörünün dışında; yayınlanan her sürümde aynı kalır
+    path = os.path.join(ARTIFACT_DIR, f"dataset_{dataset_id}", "summary.lock")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _lock, open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def save_stats(dataset_id: int, sketches: dict, upload_ids: list, conflicts: dict = None) -> str:
+    """Kolon durumlarını kaydet (öncekinin yerine atomik olarak)"""
+    target = stats_dir(dataset_id)
+    with write_dir(target) as tmp:
+        columns = []
+        for i, (col, sketch) in enumerate(sketches.items()):
+            meta, arrays = sketch.to_state()
+            columns.append({"name": col, **meta})
+            np.savez(os.path.join(tmp, f"{i}.npz"), **arrays)
+
+        meta = {
+            "upload_ids": sorted(upload_ids),
+            "columns": columns,
+            # Kolon -> tipi farklı geldiği için özete katılmayan upload'lar
+            "conflicts": conflicts or {},
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    return target
+
+
+def _load_state(dataset_id: int):
+    """Kaydedilmiş kolon durumları ve meta; yoksa ({}, boş meta)"""
+    # Bağlantı bir kez çözülür: kilitsiz okuyan özet endpoint'i meta ve
+    # npz'leri, arada yeni sürüm yayınlansa bile aynı sürümden okur
+    target = os.path.realpath(stats_dir(dataset_id))
+    try:
+        with open(os.path.join(target, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return {}, {"upload_ids": [], "conflicts": {}}
+
+    sketches = {}
+    for i, column in enumerate(meta["columns"]):
+        with np.load(os.path.join(target, f"{i}.npz")) as data:
+            sketches[column["name"]] = ColumnSketch.from_state(column, dict(data))
+    return sketches, meta
+
+
+def load_stats(dataset_id: int):
+    """Kaydedilmiş durum: ({kolon: ColumnSketch}, upload_id listesi); yoksa ({}, [])"""
+    sketches, meta = _load_state(dataset_id)
+    return sketches, meta["upload_ids"]
+
+
+def update_stats(dataset_id: int, upload_id: int, df: pd.DataFrame) -> dict:
+    """Yeni upload'un satırlarını veri seti durumuna kat (aynı upload iki kez sayılmaz)"""
+    with stats_lock(dataset_id):
+        sketches, meta = _load_state(dataset_id)
+        upload_ids, conflicts = meta["upload_ids"], meta.get("conflicts", {})
+        if upload_id in upload_ids:
+            return sketches
+        new = sketch_frame(df, SUMMARY_SKETCH_CHUNK_SIZE)
+        for col, sketch in list(new.items()):
+            # Kolon tipi upload'lar arasında değiştiyse birleştirilemez; mevcut durum korunur
+            if col in sketches and sketches[col].kind != sketch.kind:
+                logger.warning(
+                    f"Veri seti {dataset_id} kolonu {col} tipi farklı ({sketches[col].kind} -> {sketch.kind}), "
+                    f"upload {upload_id} bu kolonun özetine katılmadı"
+                )
+                conflicts.setdefault(col, []).append({"upload_id": upload_id, "kind": sketch.kind})
+                del new[col]
+        sketches = merge_sketches([sketches, new])
+        save_stats(dataset_id, sketches, upload_ids + [upload_id], conflicts)
+    logger.info(f"Veri seti {dataset_id} özeti upload {upload_id} ile güncellendi ({len(df)} satır)")
+    return sketches
+
+
+def dataset_summary(dataset_id: int) -> dict:
+    """describe() düzeninde özet ve kolon başına boş sayısı"""
+    sketches, meta = _load_state(dataset_id)
+    return {
+        "upload_ids": meta["upload_ids"],
+        "conflicts": meta.get("conflicts", {}),
+        "rows": max((sketch.count + sketch.nulls for sketch in sketches.values()), default=0),
+        "nulls": {col: sketch.nulls for col, sketch in sketches.items()},
+        "stats": describe_to_dict(approximate_describe(sketches)) if sketches else {},
+    }
@@ -0,0 +1,219 @@
+"""
+Mantıksal veri setleri
+Tenant'ın her gün yüklediği dosyalar bir veri setinde bölüm (partition)
+olarak toplanır. Bölüm eklenirken satır sayısı ve tarih aralığı (min/max)
+bir kez hesaplanıp saklanır; sorgular tarih aralığına uymayan bölümleri
+dosyalarını açmadan eler, kalanları ihtiyaç anında tek tek okur. Anomali,
+forecast ve özet, bölümlerin kaydedilmiş günlük aggregate cube'ları
+birleştirilerek hesaplanır; kolon özetleri artımlı olarak güncellenir
+(dataset_stats). Yeni upload eklendiğinde sadece o bölüm işlenir.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from aggregates import AggregateCube, load_cube, save_cube
+from anomaly import detect_anomalies
+from dataset_stats import update_stats
+from dates import date_format_key, parse_dates
+from forecast import forecast_sales
+from models import Dataset, DatasetPartition, Upload
+from readers import read_csv, read_header
+
+logger = logging.getLogger(__name__)
+
+
+def create_dataset(db: Session, tenant_id: int, name: str,
+                   date_col: str = "order_date", value_col: str = "quantity") -> Dataset:
+    """Yeni veri seti; aynı isim tenant'ta varsa ValueError"""
+    exists = db.query(Dataset).filter(Dataset.tenant_id == tenant_id, Dataset.name == name).first()
+    if exists is not None:
+        raise ValueError(f"Bu isimde veri seti zaten var: {name}")
+    dataset = Dataset(tenant_id=tenant_id, name=name, date_col=date_col, value_col=value_col)
+    db.add(dataset)
+    db.commit()
+    db.refresh(dataset)
+    return dataset
+
+
+def partition_cube(upload_id: int, df: pd.DataFrame, date_col: str, value_col: str) -> AggregateCube:
+    """Upload'un bu tarih/değer kolonlarıyla kurulmuş cube'u; yoksa bir kez kurulup kaydedilir"""
+    cube = load_cube(upload_id, date_col, value_col)
+    if cube is None:
+        cube = AggregateCube.build(df, date_col, value_col)
+        # Pipeline cube'u başka kolonlarla kurulmuş olabilir; veri setininki ayrı saklanır
+        save_cube(upload_id, cube, keyed=True)
+    return cube
+
+
+def read_partition(path: str, date_col: str, tenant_id: int = None) -> pd.DataFrame:
+    """Bölüm dosyasını oku ve tarih kolonunu parse et"""
+    df = read_csv(path)
+    if date_col in df.columns:
+        df[date_col] = parse_dates(df[date_col], key=date_format_key(tenant_id, df.columns, date_col))
+    return df
+
+
+def add_partition(db: Session, dataset: Dataset, upload: Upload) -> DatasetPartition:
+    """Upload'u veri setine bölüm olarak ekle (tarih aralığı istatistikleriyle)"""
+    if upload.tenant_id != dataset.tenant_id:
+        raise ValueError("Upload veri setiyle aynı tenant'a ait değil")
+    partition = db.query(DatasetPartition).filter(
+        DatasetPartition.dataset_id == dataset.id,
+        DatasetPartition.upload_id == upload.id
+    ).first()
+    if partition is not None:
+        return partition
+
+    header = read_header(upload.path)
+    missing = [col for col in (dataset.date_col, dataset.value_col) if col not in header]
+    if missing:
+        raise ValueError(f"Upload'da veri setinin kolonları yok: {', '.join(missing)}")
+
+    # Bölüm tek sefer okunur: cube (yoksa) ve kolon özetleri sadece bu satırlardan
+    df = read_partition(upload.path, dataset.date_col, dataset.tenant_id)
+    cube = partition_cube(upload.id, df, dataset.date_col, dataset.value_col)
+    update_stats(dataset.id, upload.id, df)
+    days = cube.tables[None]
+    partition = DatasetPartition(
+        dataset_id=dataset.id,
+        upload_id=upload.id,
+        row_count=int(days["count"].sum()),
+        min_date=days["period"].min().to_pydatetime() if len(days) else None,
+        max_date=days["period"].max().to_pydatetime() if len(days) else None,
+    )
+    db.add(partition)
+    db.commit()
+    logger.info(f"Veri seti {dataset.id} için bölüm eklendi: upload {upload.id}")
+    return partition
+
+
+class LogicalDataset:
+    """Bölümleri tek tablo gibi sunar; okuma tembeldir ve tarih aralığıyla elenir"""
+
+    def __init__(self, date_col: str, value_col: str, partitions: list, tenant_id: int = None):
+        self.date_col = date_col
+        self.value_col = value_col
+        self.tenant_id = tenant_id
+        # (upload_id, path, min_date, max_date, row_count)
+        self.partitions = partitions
+
+    @classmethod
+    def from_db(cls, db: Session, dataset: Dataset) -> "LogicalDataset":
+        rows = db.query(DatasetPartition, Upload.path).join(
+            Upload, Upload.id == DatasetPartition.upload_id
+        ).filter(DatasetPartition.dataset_id == dataset.id).order_by(DatasetPartition.min_date).all()
+        partitions = [
+            (p.upload_id, path, p.min_date, p.max_date, p.row_count or 0) for p, path in rows
+        ]
+        return cls(dataset.date_col, dataset.value_col, partitions, dataset.tenant_id)
+
+    def prune(self, start=None, end=None) -> list:
+        """[start, end] aralığıyla kesişen bölümler (tarihsiz bölümler sadece aralık yoksa)"""
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        selected = []
+        for partition in self.partitions:
+            _, _, min_date, max_date, _ = partition
+            if min_date is None or max_date is None:
+                if start is None and end is None:
+                    selected.append(partition)
+                continue
+            if start is not None and pd.Timestamp(max_date) < start:
+                continue
+            if end is not None and pd.Timestamp(min_date) > end:
+                continue
+            selected.append(partition)
+        return selected
+
+    def scan(self, start=None, end=None, columns: list = None):
+        """Elenmeyen bölümleri sırayla oku (her adımda tek bölüm bellekte)"""
+        for upload_id, path, _, _, _ in self.prune(start, end):
+            df = read_csv(path, usecols=columns)
+            if (start is not None or end is not None) and self.date_col in df.columns:
+                key = date_format_key(None, df.columns, self.date_col)
+                days = parse_dates(df[self.date_col], key=key).dt.normalize()
+                mask = np.ones(len(df), dtype=bool)
+                if start is not None:
+                    mask &= (days >= pd.Timestamp(start)).to_numpy()
+                if end is not None:
+                    mask &= (days <= pd.Timestamp(end)).to_numpy()
+                df = df[mask]
+            yield upload_id, df
+
+    def to_frame(self, start=None, end=None, columns: list = None) -> pd.DataFrame:
+        frames = [df for _, df in self.scan(start, end, columns)]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def cube(self, start=None, end=None):
+        """Elenmeyen bölümlerin cube'larının birleşimi (bölüm yoksa None)"""
+        cubes = []
+        for upload_id, path, _, _, _ in self.prune(start, end):
+            cube = load_cube(upload_id, self.date_col, self.value_col)
+            if cube is None:
+                # Bu kolonlarla cube yoksa (silinmiş ya da pipeline başka kolonla kurmuş) dosyadan kurulur
+                try:
+                    df = read_partition(path, self.date_col, self.tenant_id)
+                    cube = partition_cube(upload_id, df, self.date_col, self.value_col)
+                except (OSError, KeyError, ValueError) as e:
+                    logger.warning(f"Upload {upload_id} için aggregate cube kurulamadı, bölüm atlandı: {e}")
+                    continue
+            cubes.append(cube)
+        if not cubes:
+            return None
+        return AggregateCube.merge(cubes).between(start, end)
+
+    def analyze(self, start=None, end=None, days_ahead: int = 7) -> dict:
+        """Birleşik veri üzerinde özet, anomali günleri ve forecast"""
+        selected = self.prune(start, end)
+        result = {
+            "summary": {
+                "partitions": len(self.partitions),
+                "scanned_partitions": len(selected),
+                "rows": sum(p[4] for p in selected),
+            },
+            "anomaly_days": [],
+            "forecast": [],
+        }
+        cube = self.cube(start, end)
+        if cube is None or cube.tables[None].empty:
+            return result
+
+        daily = cube.daily()
+        days = daily[self.date_col]
+        result["summary"].update({
+            "days": len(daily),
+            "min_date": days.min().date().isoformat(),
+            "max_date": days.max().date().isoformat(),
+            "total": float(daily[self.value_col].sum()),
+            "daily_mean": float(daily[self.value_col].mean()),
+        })
+        anomalies, _ = detect_anomalies(None, self.date_col, self.value_col, cube=cube)
+        result["anomaly_days"] = [day.date().isoformat() for day in anomalies[self.date_col]]
+        if len(daily) >= 2:
+            forecast_df, _ = forecast_sales(None, self.date_col, self.value_col, days_ahead=days_ahead, cube=cube)
+            result["forecast"] = forecast_df["forecast"].replace([np.inf, -np.inf], np.nan).fillna(0).tolist()
+        return result
+
+
+def dataset_to_dict(dataset: Dataset) -> dict:
+    return {
+        "id": dataset.id,
+        "name": dataset.name,
+        "date_col": dataset.date_col,
+        "value_col": dataset.value_col,
+        "partitions": [
+            {
+                "upload_id": p.upload_id,
+                "row_count": p.row_count or 0,
+                "min_date": p.min_date.isoformat() if p.min_date else None,
+                "max_date": p.max_date.isoformat() if p.max_date else None,
+            }
+            for p in dataset.partitions
+        ],
+    }
@@ -0,0 +1,254 @@
+"""
+Hızlı tarih parse motoru
+Kolonun formatı bir kez örneklemden çıkarılır, örneklem üzerinde
+doğrulanır ve kolonun tamamı açık formatla parse edilir. Sadece sayısal
+alanlardan oluşan formatlar (gün/ay/yıl/saat/dakika/saniye) numpy ile
+vektörel sabit genişlikli parser'dan geçer; strptime satır satır
+çalışmaz. Çıkarılan format tenant + başlık imzası + kolon başına
+önbellekte tutulur; önbellekteki format örneklemin tamamına uymuyorsa
+yeniden çıkarılır.
+"""
+
+import logging
+import re
+import threading
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config import DATE_DAYFIRST, DATE_FORMAT_MIN_MATCH, DATE_FORMAT_SAMPLE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Denenecek formatlar; gün-önce / ay-önce belirsizliğinde sıra tercihi belirler
+DAYFIRST_FORMATS = [
+    "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y",
+    "%d.%m.%Y %H:%M", "%d.%m.%Y %H:%M:%S", "%d.%m.%Y",
+    "%d-%m-%Y %H:%M", "%d-%m-%Y",
+]
+MONTHFIRST_FORMATS = ["%m/%d/%Y %H:%M", "%m/%d/%Y %H:%M:%S", "%m/%d/%Y", "%m-%d-%Y"]
+ISO_FORMATS = [
+    "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M:%S",
+    "%Y/%m/%d", "%Y/%m/%d %H:%M:%S", "%Y%m%d",
+]
+
+# Vektörel parser'ın desteklediği alanlar: (ad, en az, en çok)
+_FIELDS = {
+    "%Y": ("year", 1000, 9999), "%m": ("month", 1, 12), "%d": ("day", 1, 31),
+    "%H": ("hour", 0, 23), "%M": ("minute", 0, 59), "%S": ("second", 0, 59),
+}
+_DIRECTIVE = re.compile(r"%[A-Za-z]")
+_MONTH_DAYS = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+
+
+def candidate_formats(dayfirst: bool = DATE_DAYFIRST) -> list:
+    ambiguous = DAYFIRST_FORMATS + MONTHFIRST_FORMATS if dayfirst else MONTHFIRST_FORMATS + DAYFIRST_FORMATS
+    return ISO_FORMATS + ambiguous
+
+
+def _sample(values: pd.Series, size: int) -> pd.Series:
+    """Kolona yayılmış (baş, orta, son) dolu değer örneklemi"""
+    values = values.dropna()
+    if len(values) > size:
+        values = values.iloc[np.linspace(0, len(values) - 1, size).astype(np.int64)]
+    return values.astype(str)
+
+
+def match_ratio(values: pd.Series, fmt: str) -> float:
+    """Örneklemdeki dolu değerlerin formata uyan oranı"""
+    if values.empty:
+        return 0.0
+    return float(pd.to_datetime(values, format=fmt, errors="coerce").notna().mean())
+
+
+def validate_format(values: pd.Series, fmt: str) -> bool:
+    """Format örneklemdeki tüm dolu değerlere uyuyor mu?"""
+    return match_ratio(values, fmt) == 1.0
+
+
+def infer_date_format(values: pd.Series, sample_size: int = DATE_FORMAT_SAMPLE_SIZE,
+                      dayfirst: bool = DATE_DAYFIRST):
+    """Örneklemden kolonun tarih formatını çıkar (bulunamazsa None)"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return None
+    sample = _sample(values, sample_size)
+    if sample.empty:
+        return None
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        guessed = pd.tseries.api.guess_datetime_format(sample.iloc[0], dayfirst=dayfirst)
+    # pandas tahmini sadece bilinen formatlar uymazsa denenir
+    candidates = candidate_formats(dayfirst) + ([guessed] if guessed else [])
+    # Tamamına uyan ilk format; yoksa bozuk değerler NaT olacak şekilde çoğunluğa uyan en iyisi
+    best, best_ratio = None, DATE_FORMAT_MIN_MATCH
+    for fmt in dict.fromkeys(candidates):
+        ratio = match_ratio(sample, fmt)
+        if ratio == 1.0:
+            return fmt
+        if ratio > best_ratio:
+            best, best_ratio = fmt, ratio
+    return best
+
+
+def _numeric_fields(fmt: str):
+    """Format sadece sayısal alan + tek karakterli ayraçlardan oluşuyorsa (alanlar, ayraçlar)"""
+    directives = _DIRECTIVE.findall(fmt)
+    separators = _DIRECTIVE.split(fmt)
+    if not directives or any(d not in _FIELDS for d in directives):
+        return None
+    if separators[0] or separators[-1] or any(len(sep) != 1 or sep.isdigit() for sep in separators[1:-1]):
+        return None
+    return directives, separators[1:-1]
+
+
+def _days_from_civil(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """1970-01-01'den itibaren gün sayısı (proleptik Gregoryen, vektörel)"""
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _digit_runs(nondigit_bits: int, width: int) -> list:
+    """Sayı olmayan pozisyonların bit maskesinden ardışık rakam aralıkları [(başlangıç, bitiş)]"""
+    runs, start = [], None
+    for position in range(width + 1):
+        digit = position < width and not (nondigit_bits >> position) & 1
+        if digit and start is None:
+            start = position
+        elif not digit and start is not None:
+            runs.append((start, position))
+            start = None
+    return runs
+
+
+def _parse_numeric(values: pd.Series, directives: list, separators: list):
+    """Vektörel parse: satırlar rakam/ayraç dizilimine göre gruplanır, her grupta alanlar sabit konumdadır"""
+    raw = values.to_numpy(dtype=object, na_value="")
+    try:
+        data = raw.astype(np.bytes_)
+    except UnicodeEncodeError:
+        return None
+    n, width = len(data), data.dtype.itemsize
+    if n == 0 or width == 0 or width > 64:
+        return None if width > 64 else np.full(n, np.datetime64("NaT"), dtype="datetime64[us]")
+    matrix = data.view(np.uint8).reshape(n, width)
+
+    # Satırın dizilim anahtarı: rakam olmayan pozisyonların bit maskesi
+    nondigit = (matrix < 48) | (matrix > 57)
+    packed = np.zeros((n, 8), dtype=np.uint8)
+    packed[:, :(width + 7) // 8] = np.packbits(nondigit, axis=1, bitorder="little")
+    keys = packed.view(np.uint64).ravel()
+    # Aynı dizilimdeki satırlar ardışık gelecek şekilde sırala; işlemler sıralı düzende yapılır
+    order = np.argsort(keys, kind="stable")
+    matrix = matrix[order]
+    sorted_keys = keys[order]
+    bounds = np.concatenate([[0], np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1, [n]])
+
+    k = len(directives)
+    fields = np.zeros((k, n), dtype=np.int64)
+    valid = np.zeros(n, dtype=bool)
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        runs = _digit_runs(int(sorted_keys[start]), width)
+        if len(runs) != k or runs[0][0] != 0:
+            continue
+        if any(runs[i + 1][0] != runs[i][1] + 1 for i in range(k - 1)):
+            continue
+        block = matrix[start:end]
+        ok = np.ones(end - start, dtype=bool)
+        for i, sep in enumerate(separators):
+            ok &= block[:, runs[i][1]] == ord(sep)
+        # Son alandan sonra sadece dolgu (0) olmalı
+        ok &= (block[:, runs[-1][1]:] == 0).all(axis=1)
+        for i, (first, last) in enumerate(runs):
+            value = fields[i, start:end]
+            for position in range(first, last):
+                value *= 10
+                value += block[:, position] - 48
+        valid[start:end] = ok
+
+    parts = {name: np.full(n, default, dtype=np.int64) for name, default in
+             (("year", 1970), ("month", 1), ("day", 1), ("hour", 0), ("minute", 0), ("second", 0))}
+    for i, directive in enumerate(directives):
+        name, low, high = _FIELDS[directive]
+        valid &= (fields[i] >= low) & (fields[i] <= high)
+        parts[name] = np.where(valid, fields[i], low)
+
+    year, month, day = parts["year"], parts["month"], parts["day"]
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    # 31 Şubat gibi ayda olmayan günler geçersiz
+    valid &= day <= _MONTH_DAYS[month - 1] + (leap & (month == 2))
+    seconds = _days_from_civil(year, month, day) * 86400 + parts["hour"] * 3600 + parts["minute"] * 60 + parts["second"]
+    micros = np.empty(n, dtype=np.int64)
+    micros[order] = np.where(valid, seconds * 1_000_000, np.iinfo(np.int64).min)
+    result = micros.view("datetime64[us]")
+    return result
+
+
+def parse_with_format(values: pd.Series, fmt: str) -> pd.Series:
+    """Açık formatla parse (uymayan değerler NaT)"""
+    # ISO formatlarda pandas'ın C parser'ı zaten hızlı
+    spec = None if fmt.startswith("%Y-%m-%d") else _numeric_fields(fmt)
+    if spec is not None:
+        parsed = _parse_numeric(values, *spec)
+        if parsed is not None:
+            return pd.Series(parsed, index=values.index, name=values.name)
+    return pd.to_datetime(values, format=fmt, errors="coerce")
+
+
+class DateFormatCache:
+    """Anahtar (tenant, başlık, kolon) -> çıkarılan format (LRU); kullanmadan önce örneklemle doğrulanır"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._formats = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            fmt = self._formats.get(key)
+            if fmt is not None:
+                self._formats.move_to_end(key)
+            return fmt
+
+    def put(self, key, fmt: str):
+        with self._lock:
+            self._formats[key] = fmt
+            self._formats.move_to_end(key)
+            while len(self._formats) > self.max_size:
+                self._formats.popitem(last=False)
+
+
+format_cache = DateFormatCache()
+
+
+def date_format_key(tenant_id, columns, column: str) -> tuple:
+    """Önbellek anahtarı: aynı isimli kolon farklı tenant/başlıkta farklı formatta olabilir"""
+    return tenant_id, tuple(str(c) for c in columns), column
+
+
+def column_date_format(values: pd.Series, key=None):
+    """Kolonun formatı: önbellekteki format örneklemin tamamına uyarsa o, yoksa çıkarım (key=None: önbelleksiz)"""
+    cached = format_cache.get(key) if key is not None else None
+    # Kısmi uyum yeterli değil: gün-önce/ay-önce karışıklığında değerlerin yarısı yanlış ayla okunur
+    if cached is not None and validate_format(_sample(values, DATE_FORMAT_SAMPLE_SIZE), cached):
+        return cached
+    fmt = infer_date_format(values)
+    if fmt is not None and key is not None:
+        format_cache.put(key, fmt)
+    return fmt
+
+
+def parse_dates(values: pd.Series, fmt: str = None, key=None) -> pd.Series:
+    """Kolonu tarihe çevir; format verilmezse çıkarılır, bulunamazsa pandas'a bırakılır"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    fmt = fmt or column_date_format(values, key)
+    if fmt is None:
+        return pd.to_datetime(values, errors="coerce", dayfirst=DATE_DAYFIRST)
+    return parse_with_format(values, fmt)
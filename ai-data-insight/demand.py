@@ -0,0 +1,145 @@
+"""
+Demand model batch tahmin aşaması
+Feature matrisi bir kez contiguous float32 dizi olarak kurulur, tahminler
+parça parça üretilir ve upload'a bağlı kolon bazlı bir artefakt olarak
+saklanır (her kolon ayrı .npy dosyası; sayfalama mmap ile okunur).
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from artifacts import check_cancelled, write_dir
+from config import ARTIFACT_DIR, DEMAND_PREDICTION_CHUNK_SIZE
+from dates import date_format_key, parse_dates
+
+logger = logging.getLogger(__name__)
+
+# Demand modelinin beklediği feature sırası
+DEMAND_FEATURES = ["quantity", "price", "month", "day_of_week", "day_of_year"]
+
+
+def prediction_dir(upload_id: int) -> str:
+    """Upload'un tahmin artefakt klasörü"""
+    return os.path.join(ARTIFACT_DIR, f"upload_{upload_id}", "demand_predictions")
+
+
+def build_feature_matrix(df: pd.DataFrame, date_col: str = "order_date") -> np.ndarray:
+    """DataFrame'i değiştirmeden (n, 5) float32 feature matrisi oluştur"""
+    n_rows = len(df)
+    X = np.zeros((n_rows, len(DEMAND_FEATURES)), dtype=np.float32, order="C")
+
+    for i, col in enumerate(["quantity", "price"]):
+        if col in df.columns:
+            X[:, i] = pd.to_numeric(df[col], errors="coerce").fillna(0).to_numpy(dtype=np.float32)
+
+    if date_col in df.columns:
+        dates = parse_dates(df[date_col], key=date_format_key(None, df.columns, date_col))
+        X[:, 2] = dates.dt.month.fillna(0).to_numpy(dtype=np.float32)
+        X[:, 3] = dates.dt.dayofweek.fillna(0).to_numpy(dtype=np.float32)
+        X[:, 4] = dates.dt.dayofyear.fillna(0).to_numpy(dtype=np.float32)
+
+    return X
+
+
+def predict_in_chunks(model, X: np.ndarray, chunk_size: int = DEMAND_PREDICTION_CHUNK_SIZE,
+                      cancelled=None) -> np.ndarray:
+    """Tahminleri sabit boyutlu parçalar halinde üret (iptal edilirse parça aralarında durur)"""
+    predictions = np.empty(len(X), dtype=np.float32)
+    for start in range(0, len(X), chunk_size):
+        check_cancelled(cancelled)
+        end = min(start + chunk_size, len(X))
+        predictions[start:end] = model.predict(X[start:end])
+    return predictions
+
+
+def save_predictions(upload_id: int, df: pd.DataFrame, predictions: np.ndarray,
+                     date_col: str = "order_date", model_path: str = None, cancelled=None) -> str:
+    """Tahminleri kolon bazlı artefakt olarak kaydet (öncekinin yerine atomik olarak)"""
+    target = prediction_dir(upload_id)
+    with write_dir(target, cancelled) as tmp:
+        np.save(os.path.join(tmp, "prediction.npy"), predictions.astype(np.float32, copy=False))
+        np.save(os.path.join(tmp, "row_index.npy"), np.arange(len(predictions), dtype=np.int64))
+
+        sku_categories = []
+        if "sku" in df.columns:
+            codes, uniques = pd.factorize(df["sku"], sort=False)
+            np.save(os.path.join(tmp, "sku_code.npy"), codes.astype(np.int32))
+            sku_categories = [str(u) for u in uniques]
+
+        if date_col in df.columns:
+            key = date_format_key(None, df.columns, date_col)
+            dates = parse_dates(df[date_col], key=key).to_numpy(dtype="datetime64[D]")
+            np.save(os.path.join(tmp, "order_date.npy"), dates)
+
+        meta = {
+            "upload_id": upload_id,
+            "rows": int(len(predictions)),
+            "features": DEMAND_FEATURES,
+            "sku_categories": sku_categories,
+            "model_path": model_path,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    return target
+
+
+def run_demand_prediction(upload_id: int, df: pd.DataFrame, model,
+                          date_col: str = "order_date", model_path: str = None, cancelled=None) -> int:
+    """Batch tahmin aşaması: feature matrisi -> parça parça tahmin -> artefakt (iptal edilirse yayınlanmaz)"""
+    X = build_feature_matrix(df, date_col)
+    predictions = predict_in_chunks(model, X, cancelled=cancelled)
+    path = save_predictions(upload_id, df, predictions, date_col, model_path, cancelled)
+    logger.info(f"Upload {upload_id} için {len(predictions)} demand tahmini kaydedildi: {path}")
+    return len(predictions)
+
+
+def load_predictions_page(upload_id: int, offset: int = 0, limit: int = 100):
+    """Kaydedilmiş tahminlerden bir sayfa oku (yoksa None)"""
+    # Bağlantı bir kez çözülür: meta ve kolonlar aynı sürümden okunur, arada
+    # yeni sürüm yayınlansa bile karışmaz
+    target = os.path.realpath(prediction_dir(upload_id))
+    try:
+        with open(os.path.join(target, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    def _column(name):
+        try:
+            return np.load(os.path.join(target, f"{name}.npy"), mmap_mode="r")[offset:offset + limit]
+        except FileNotFoundError:
+            return None
+
+    predictions = _column("prediction")
+    row_index = _column("row_index")
+    sku_codes = _column("sku_code")
+    order_dates = _column("order_date")
+    categories = meta.get("sku_categories", [])
+
+    items = []
+    for i in range(len(predictions)):
+        item = {
+            "row_index": int(row_index[i]),
+            "predicted_demand": float(predictions[i]),
+        }
+        if sku_codes is not None:
+            code = int(sku_codes[i])
+            item["sku"] = categories[code] if code >= 0 else None
+        if order_dates is not None:
+            item["order_date"] = None if np.isnat(order_dates[i]) else str(order_dates[i])
+        items.append(item)
+
+    return {
+        "upload_id": upload_id,
+        "total": meta["rows"],
+        "offset": offset,
+        "limit": limit,
+        "created_at": meta.get("created_at"),
+        "items": items,
+    }
@@ -0,0 +1,324 @@
+"""
+Etkileşim (event log) upload'ları için oturum ve funnel analizi
+Olaylar kullanıcı ve zamana göre bir kez sıralanır; oturum sınırları ardışık
+olaylar arasındaki boşluktan vektörel olarak bulunur (kullanıcı başına Python
+döngüsü yok). Büyük dosyalar parça parça okunur, kullanıcı hash'ine göre
+bölümlere ayrılıp diske yazılır ve her bölüm ayrı analiz edilip sonuçlar
+toplanır; oturumlar kullanıcıyı aşmadığı için bölümler birbirinden bağımsızdır.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from config import EVENT_SESSION_GAP_MINUTES, EVENT_CHUNK_SIZE, EVENT_PARTITIONS, EVENT_FILE_MIN_ROWS
+from dates import infer_date_format, parse_with_format
+from readers import detect_encoding, open_stream, read_header
+
+logger = logging.getLogger(__name__)
+
+# Funnel sırası (like, sepete ekleme benzeri ara adım)
+FUNNEL_STAGES = ["view", "like", "purchase"]
+STAGE_CODES = {stage: i for i, stage in enumerate(FUNNEL_STAGES)}
+TOP_PRODUCTS = 20
+
+# Normalize edilmiş kolon adı -> rol
+EVENT_COLUMN_ALIASES = {
+    "user": ["userid", "user", "customerid", "visitorid"],
+    "product": ["productid", "product", "sku", "itemid"],
+    "event_type": ["interactiontype", "eventtype", "event", "interaction", "action"],
+    "timestamp": ["timestamp", "eventtime", "time", "datetime"],
+}
+
+# Bölüm dosyalarındaki kolonlar ve tipleri
+PARTITION_COLUMNS = {"user": np.uint64, "product": np.int32, "event_type": np.int8, "ts": np.int64}
+
+
+def _normalize(name: str) -> str:
+    return "".join(ch for ch in str(name).lower() if ch.isalnum())
+
+
+def detect_event_columns(columns) -> dict:
+    """Event log kolonlarını bul; eksik rol varsa None"""
+    normalized = {_normalize(col): col for col in columns}
+    mapping = {}
+    for role, aliases in EVENT_COLUMN_ALIASES.items():
+        match = next((normalized[a] for a in aliases if a in normalized), None)
+        if match is None:
+            return None
+        mapping[role] = match
+    return mapping
+
+
+def is_event_log(columns) -> bool:
+    return detect_event_columns(columns) is not None
+
+
+def parse_timestamps(values: pd.Series) -> pd.Series:
+    """Örneklemden çıkarılan açık formatla parse et; format bulunamazsa gün-önce çıkarım"""
+    fmt = infer_date_format(values, dayfirst=True)
+    if fmt is not None:
+        return parse_with_format(values, fmt)
+    return pd.to_datetime(values, dayfirst=True, errors="coerce")
+
+
+class EventStats:
+    """Bölümler arasında toplanabilir (additive) event istatistikleri"""
+
+    def __init__(self):
+        self.events = 0
+        self.users = 0
+        self.sessions = 0
+        self.single_event_sessions = 0
+        self.session_seconds = 0.0
+        self.stage_sessions = np.zeros(len(FUNNEL_STAGES), dtype=np.int64)
+        self.stage_users = np.zeros(len(FUNNEL_STAGES), dtype=np.int64)
+        self.view_then_purchase_sessions = 0
+        self.event_counts = np.zeros(len(FUNNEL_STAGES) + 1, dtype=np.int64)  # son eleman: diğer
+        self.product_counts = np.zeros((0, len(FUNNEL_STAGES)), dtype=np.int64)
+
+    def add_product_counts(self, counts: np.ndarray):
+        if len(counts) > len(self.product_counts):
+            grown = np.zeros((len(counts), len(FUNNEL_STAGES)), dtype=np.int64)
+            grown[:len(self.product_counts)] = self.product_counts
+            self.product_counts = grown
+        self.product_counts[:len(counts)] += counts
+
+    def to_dict(self, product_names, gap_minutes: int) -> dict:
+        sessions = max(self.sessions, 1)
+        views, purchases = self.stage_sessions[STAGE_CODES["view"]], self.stage_sessions[STAGE_CODES["purchase"]]
+
+        counts = self.product_counts
+        order = np.lexsort((-counts[:, STAGE_CODES["purchase"]], -counts[:, STAGE_CODES["view"]]))
+        top_products = []
+        for code in order[:TOP_PRODUCTS]:
+            product_views, product_likes, product_purchases = (int(v) for v in counts[code])
+            if product_views + product_likes + product_purchases == 0:
+                break
+            top_products.append({
+                "product_id": str(product_names[code]),
+                "views": product_views,
+                "likes": product_likes,
+                "purchases": product_purchases,
+                "conversion_rate": round(product_purchases / product_views, 4) if product_views else None,
+            })
+
+        return {
+            "events": int(self.events),
+            "users": int(self.users),
+            "sessions": int(self.sessions),
+            "session_gap_minutes": gap_minutes,
+            "avg_events_per_session": round(self.events / sessions, 3),
+            "avg_session_duration_seconds": round(self.session_seconds / sessions, 1),
+            "bounce_rate": round(self.single_event_sessions / sessions, 4),
+            "interaction_counts": {
+                **{stage: int(self.event_counts[i]) for i, stage in enumerate(FUNNEL_STAGES)},
+                "other": int(self.event_counts[-1]),
+            },
+            "funnel": {
+                "stages": [
+                    {"stage": stage, "sessions": int(self.stage_sessions[i]), "users": int(self.stage_users[i])}
+                    for i, stage in enumerate(FUNNEL_STAGES)
+                ],
+                "view_to_purchase_sessions": int(self.view_then_purchase_sessions),
+                "view_to_purchase_rate": round(self.view_then_purchase_sessions / views, 4) if views else None,
+                "purchase_sessions_without_view": int(purchases - self.view_then_purchase_sessions),
+            },
+            "top_products": top_products,
+        }
+
+
+class ProductCodes:
+    """Ürün değerleri için parçalar arası ortak (global) kodlar"""
+
+    def __init__(self):
+        self.codes = {}
+        self.names = []
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        local, uniques = pd.factorize(values, use_na_sentinel=True)
+        lookup = np.empty(len(uniques), dtype=np.int32)
+        for i, value in enumerate(uniques):
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.names)
+                self.names.append(value)
+            lookup[i] = code
+        return np.where(local >= 0, lookup[np.maximum(local, 0)] if len(lookup) else -1, -1).astype(np.int32)
+
+
+def encode_events(df: pd.DataFrame, mapping: dict, products: ProductCodes) -> dict:
+    """Bir parçayı kompakt dizilere çevir (kullanıcı hash'i, ürün kodu, tip kodu, ns zaman)"""
+    users = df[mapping["user"]]
+    ts = parse_timestamps(df[mapping["timestamp"]])
+    valid = (users.notna() & ts.notna()).to_numpy()
+
+    users = users[valid]
+    event_types = df.loc[valid, mapping["event_type"]].astype("string").str.strip().str.lower()
+    type_codes = event_types.map(STAGE_CODES).fillna(-1).to_numpy(dtype=np.int8)
+
+    return {
+        "user": pd.util.hash_array(users.astype(str).to_numpy(dtype=object)),
+        "product": products.encode(df.loc[valid, mapping["product"]].astype("string")),
+        "event_type": type_codes,
+        "ts": ts[valid].to_numpy(dtype="datetime64[ns]").astype(np.int64),
+    }
+
+
+def _run_starts(sorted_ids: np.ndarray) -> np.ndarray:
+    """Sıralı dizide her farklı değerin ilk konumu (np.unique'in sıralamasız hali)"""
+    if len(sorted_ids) == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(np.concatenate(([True], sorted_ids[1:] != sorted_ids[:-1])))
+
+
+def _sort_order(user: np.ndarray, ts: np.ndarray) -> np.ndarray:
+    """Kullanıcıya göre gruplu, grup içinde zamana göre sıralama indeksi
+    (np.lexsort yerine tek int64 anahtar üzerinde argsort; ~5 kat hızlı)"""
+    codes, uniques = pd.factorize(user)
+    codes = codes.astype(np.int64)
+    offset = ts - ts.min()
+    span = int(offset.max()) + 1
+    if len(uniques) > np.iinfo(np.int64).max // span:
+        # ns aralığı anahtara sığmıyorsa zamanın sıra numarası kullanılır
+        _, offset = np.unique(ts, return_inverse=True)
+        span = int(offset.max()) + 1
+    return np.argsort(codes * span + offset)
+
+
+def analyze_partition(arrays: dict, stats: EventStats, gap_ns: int, n_products: int):
+    """Bir bölümün (kullanıcıları diğer bölümlerle kesişmeyen) olaylarını analiz et"""
+    n = len(arrays["ts"])
+    if n == 0:
+        return
+
+    # Kullanıcı ve zamana göre tek sıralama
+    order = _sort_order(arrays["user"], arrays["ts"])
+    user = arrays["user"][order]
+    ts = arrays["ts"][order]
+    event_type = arrays["event_type"][order]
+    product = arrays["product"][order]
+
+    # Vektörel boşluk tespiti: yeni kullanıcı veya gap'ten uzun ara yeni oturum başlatır
+    new_user = np.empty(n, dtype=bool)
+    new_user[0] = True
+    np.not_equal(user[1:], user[:-1], out=new_user[1:])
+    new_session = new_user.copy()
+    new_session[1:] |= np.diff(ts) > gap_ns
+    session_id = np.cumsum(new_session) - 1
+    user_id = np.cumsum(new_user) - 1
+    n_sessions = int(session_id[-1]) + 1
+    n_users = int(user_id[-1]) + 1
+
+    starts = np.flatnonzero(new_session)
+    ends = np.append(starts[1:], n) - 1
+    lengths = ends - starts + 1
+
+    stats.events += n
+    stats.users += n_users
+    stats.sessions += n_sessions
+    stats.single_event_sessions += int((lengths == 1).sum())
+    stats.session_seconds += float((ts[ends] - ts[starts]).sum()) / 1e9
+    stats.event_counts += np.bincount(np.where(event_type >= 0, event_type, len(FUNNEL_STAGES)),
+                                      minlength=len(FUNNEL_STAGES) + 1)
+
+    # session_id ve user_id sıralı olduğundan farklı değer sayımı sıralama gerektirmez
+    for stage, code in STAGE_CODES.items():
+        mask = event_type == code
+        stats.stage_sessions[code] += len(_run_starts(session_id[mask]))
+        stats.stage_users[code] += len(_run_starts(user_id[mask]))
+
+    # Sıralı funnel: oturumdaki ilk view'dan sonra (veya aynı anda) satın alma
+    view_mask = event_type == STAGE_CODES["view"]
+    purchase_mask = event_type == STAGE_CODES["purchase"]
+    first_view = np.full(n_sessions, np.iinfo(np.int64).max, dtype=np.int64)
+    view_sessions = session_id[view_mask]
+    first_index = _run_starts(view_sessions)
+    first_view[view_sessions[first_index]] = ts[view_mask][first_index]
+    last_purchase = np.full(n_sessions, np.iinfo(np.int64).min, dtype=np.int64)
+    purchase_sessions = session_id[purchase_mask]
+    purchase_ts = ts[purchase_mask]
+    # Oturum içinde zaman sıralı olduğundan her oturumun son kaydı en geç satın almadır
+    last_of_session = np.append(purchase_sessions[1:] != purchase_sessions[:-1], True)
+    last_purchase[purchase_sessions[last_of_session]] = purchase_ts[last_of_session]
+    stats.view_then_purchase_sessions += int((last_purchase >= first_view).sum())
+
+    known = (event_type >= 0) & (product >= 0)
+    counts = np.bincount(
+        product[known].astype(np.int64) * len(FUNNEL_STAGES) + event_type[known],
+        minlength=n_products * len(FUNNEL_STAGES)
+    ).reshape(-1, len(FUNNEL_STAGES))
+    stats.add_product_counts(counts)
+
+
+def analyze_events(df: pd.DataFrame, gap_minutes: int = EVENT_SESSION_GAP_MINUTES) -> dict:
+    """Bellekteki event log'u analiz et"""
+    mapping = detect_event_columns(df.columns)
+    if mapping is None:
+        raise ValueError("Event log kolonları bulunamadı (kullanıcı, ürün, etkileşim tipi, zaman)")
+
+    products = ProductCodes()
+    stats = EventStats()
+    arrays = encode_events(df, mapping, products)
+    analyze_partition(arrays, stats, gap_minutes * 60 * 10**9, len(products.names))
+    return stats.to_dict(products.names, gap_minutes)
+
+
+def analyze_event_file(path: str, gap_minutes: int = EVENT_SESSION_GAP_MINUTES,
+                       chunk_size: int = EVENT_CHUNK_SIZE, partitions: int = EVENT_PARTITIONS) -> dict:
+    """Büyük event log dosyasını parça parça okuyup kullanıcı bölümleriyle analiz et"""
+    encoding = detect_encoding(path)
+    mapping = detect_event_columns(read_header(path, encoding))
+    if mapping is None:
+        raise ValueError("Event log kolonları bulunamadı (kullanıcı, ürün, etkileşim tipi, zaman)")
+
+    products = ProductCodes()
+    stats = EventStats()
+    workdir = tempfile.mkdtemp(prefix="events-")
+    try:
+        # 1. geçiş: parçaları kodla ve kullanıcı hash'ine göre bölüm dosyalarına ekle
+        with open_stream(path) as source:
+            chunks = pd.read_csv(source, usecols=list(mapping.values()), chunksize=chunk_size, dtype=str, encoding=encoding)
+            for chunk in chunks:
+                arrays = encode_events(chunk, mapping, products)
+                partition = arrays["user"] % np.uint64(partitions)
+                for p in np.unique(partition):
+                    mask = partition == p
+                    for name, dtype in PARTITION_COLUMNS.items():
+                        with open(os.path.join(workdir, f"{p}_{name}.bin"), "ab") as f:
+                            arrays[name][mask].astype(dtype, copy=False).tofile(f)
+
+        # 2. geçiş: her bölümü bağımsız analiz et ve topla
+        gap_ns = gap_minutes * 60 * 10**9
+        for p in range(partitions):
+            paths = {name: os.path.join(workdir, f"{p}_{name}.bin") for name in PARTITION_COLUMNS}
+            if not os.path.exists(paths["ts"]):
+                continue
+            arrays = {name: np.fromfile(paths[name], dtype=dtype) for name, dtype in PARTITION_COLUMNS.items()}
+            analyze_partition(arrays, stats, gap_ns, len(products.names))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    logger.info(f"Event analizi tamamlandı: {stats.events} olay, {stats.sessions} oturum")
+    return stats.to_dict(products.names, gap_minutes)
+
+
+def analyze_event_upload(path: str, df: pd.DataFrame, min_file_rows: int = EVENT_FILE_MIN_ROWS) -> dict:
+    """Upload'un event analizi: büyük dosyalar bölümlerle, küçükler bellekte"""
+    if len(df) >= min_file_rows:
+        # Sıralama ve kodlama bellekteki çerçevenin kopyaları yerine bölüm bölüm yapılır
+        return analyze_event_file(path)
+    return analyze_events(df)
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(analyze_event_file(sys.argv[1] if len(sys.argv) > 1 else "E-commerece sales data 2024.csv"),
+                     indent=2, ensure_ascii=False))
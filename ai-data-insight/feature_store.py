@@ -0,0 +1,233 @@
+"""
+Müşteri feature store'u
+Upload edilen sipariş verileri müşteri bazında birleştirilebilir toplamlara
+(sipariş sayısı, miktar, harcama, ilk/son sipariş tarihi) indirgenir ve
+tenant'ın customer_features tablosuna eklenir. Her upload'da sadece o
+upload'daki müşteriler okunur/güncellenir; RFM skorları okuma anında
+hesaplanır. Churn eğitiminin kullandığı Customer kayıtları da aynı
+müşteriler için senkronlanır.
+"""
+
+import logging
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import case, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from dates import date_format_key, parse_dates
+from models import Customer, CustomerFeature, FeatureStoreUpload
+
+logger = logging.getLogger(__name__)
+
+# IN (...) sorgularında tek seferde gönderilen müşteri sayısı
+QUERY_CHUNK_SIZE = 1000
+RFM_BINS = 5
+
+AGGREGATE_COLUMNS = ["order_count", "total_quantity", "total_spent", "first_order_date", "last_order_date"]
+
+
+def _utc(value):
+    """Tarihi timezone'lu UTC datetime'a çevir (SQLite naive döndürür)"""
+    if value is None or pd.isna(value):
+        return None
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return ts.to_pydatetime()
+
+
+def _chunks(values, size=QUERY_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def aggregate_orders(df: pd.DataFrame, customer_col: str = "customer_id",
+                     date_col: str = "order_date") -> pd.DataFrame:
+    """Siparişleri müşteri başına birleştirilebilir toplamlara indir"""
+    if customer_col not in df.columns:
+        return pd.DataFrame(columns=AGGREGATE_COLUMNS)
+
+    customers = df[customer_col].astype("string").str.strip()
+    valid = customers.notna() & (customers != "")
+    n_rows = int(valid.sum())
+
+    def numeric(col, default):
+        if col not in df.columns:
+            return np.full(n_rows, default, dtype=np.float64)
+        return pd.to_numeric(df.loc[valid, col], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+
+    quantity = numeric("quantity", 1.0)
+    price = numeric("price", 0.0)
+    if date_col in df.columns:
+        dates = parse_dates(df.loc[valid, date_col], key=date_format_key(None, df.columns, date_col))
+        dates = dates.dt.tz_localize("UTC") if dates.dt.tz is None else dates.dt.tz_convert("UTC")
+    else:
+        dates = pd.Series(pd.NaT, index=df.index[valid], dtype="datetime64[ns, UTC]")
+
+    orders = pd.DataFrame({
+        "customer_id": customers[valid].to_numpy(dtype=object),
+        "quantity": quantity,
+        "spent": quantity * price,
+        "order_date": dates.reset_index(drop=True),
+    })
+
+    return orders.groupby("customer_id", sort=False).agg(
+        order_count=("customer_id", "size"),
+        total_quantity=("quantity", "sum"),
+        total_spent=("spent", "sum"),
+        first_order_date=("order_date", "min"),
+        last_order_date=("order_date", "max"),
+    )
+
+
+def merge_aggregates(current: dict, new: dict) -> dict:
+    """İki toplamı birleştir (sayılar toplanır, tarihler min/max)"""
+    def pick(func, a, b):
+        values = [v for v in (_utc(a), _utc(b)) if v is not None]
+        return func(values) if values else None
+
+    return {
+        "order_count": int(current.get("order_count") or 0) + int(new["order_count"]),
+        "total_quantity": float(current.get("total_quantity") or 0) + float(new["total_quantity"]),
+        "total_spent": float(current.get("total_spent") or 0) + float(new["total_spent"]),
+        "first_order_date": pick(min, current.get("first_order_date"), new["first_order_date"]),
+        "last_order_date": pick(max, current.get("last_order_date"), new["last_order_date"]),
+    }
+
+
+def _upsert_statement(db: Session):
+    """Toplamları veritabanında birleştiren INSERT ... ON CONFLICT DO UPDATE
+
+    Okuyup Python'da birleştirip yazmak, aynı müşteriye dokunan eşzamanlı
+    upload'larda unique constraint hatasına veya kayıp toplamlara yol açar.
+    """
+    dialects = {"postgresql": postgresql, "sqlite": sqlite}
+    dialect = dialects.get(db.get_bind().dialect.name)
+    if dialect is None:
+        raise NotImplementedError(f"Feature store upsert desteklenmiyor: {db.get_bind().dialect.name}")
+
+    stmt = dialect.insert(CustomerFeature)
+    table, excluded = CustomerFeature.__table__.c, stmt.excluded
+
+    def pick(newer, column, incoming):
+        return case(
+            (column.is_(None), incoming),
+            (incoming.is_(None), column),
+            (newer(incoming, column), incoming),
+            else_=column
+        )
+
+    return stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "customer_id"],
+        set_={
+            "order_count": func.coalesce(table.order_count, 0) + excluded.order_count,
+            "total_quantity": func.coalesce(table.total_quantity, 0) + excluded.total_quantity,
+            "total_spent": func.coalesce(table.total_spent, 0) + excluded.total_spent,
+            "first_order_date": pick(lambda a, b: a < b, table.first_order_date, excluded.first_order_date),
+            "last_order_date": pick(lambda a, b: a > b, table.last_order_date, excluded.last_order_date),
+            "updated_at": func.now(),
+        }
+    )
+
+
+def update_feature_store(db: Session, tenant_id: int, upload_id: int, df: pd.DataFrame):
+    """Upload'daki siparişleri feature store'a ekle; sadece etkilenen müşteriler güncellenir"""
+    if db.get(FeatureStoreUpload, upload_id) is not None:
+        logger.info(f"Upload {upload_id} feature store'a zaten işlenmiş")
+        return None
+
+    aggregates = aggregate_orders(df)
+    # Eşzamanlı upload'lar satırları aynı sırada kilitlesin (deadlock olmasın)
+    customer_ids = sorted(aggregates.index.tolist())
+    merged = {}
+
+    upsert = _upsert_statement(db)
+    for chunk in _chunks(customer_ids):
+        rows = [
+            {"tenant_id": tenant_id, "customer_id": customer_id,
+             **merge_aggregates({}, dict(zip(AGGREGATE_COLUMNS, values)))}
+            for customer_id, *values in aggregates.loc[chunk, AGGREGATE_COLUMNS].itertuples(name=None)
+        ]
+        db.execute(upsert, rows)
+        # Upsert edilen satırlar transaction sonuna kadar kilitli; güncel toplamları geri oku
+        for row in db.query(
+            CustomerFeature.customer_id,
+            *[getattr(CustomerFeature, col) for col in AGGREGATE_COLUMNS]
+        ).filter(
+            CustomerFeature.tenant_id == tenant_id,
+            CustomerFeature.customer_id.in_(chunk)
+        ):
+            merged[row.customer_id] = merge_aggregates({}, dict(zip(AGGREGATE_COLUMNS, row[1:])))
+
+    synced = _sync_customers(db, tenant_id, merged)
+    db.add(FeatureStoreUpload(
+        upload_id=upload_id,
+        tenant_id=tenant_id,
+        row_count=int(aggregates["order_count"].sum()) if len(aggregates) else 0,
+        customer_count=len(customer_ids)
+    ))
+    db.commit()
+
+    logger.info(
+        f"Feature store güncellendi: upload {upload_id}, {len(customer_ids)} müşteri "
+        f"({synced} churn kaydı senkronlandı)"
+    )
+    return {"customers": len(customer_ids), "synced_customers": synced}
+
+
+def _sync_customers(db: Session, tenant_id: int, merged: dict) -> int:
+    """Churn eğitiminin okuduğu Customer kayıtlarının boş toplamlarını store'dan doldur
+
+    Müşteri verisiyle yüklenmiş sipariş toplamları daha eksiksiz olabilir;
+    dolu değerlerin üzerine yazılmaz.
+    """
+    synced = 0
+    customer_ids = list(merged)
+    for chunk in _chunks(customer_ids):
+        for customer in db.query(Customer).filter(
+            Customer.tenant_id == tenant_id,
+            Customer.customer_id.in_(chunk)
+        ):
+            totals = merged[customer.customer_id]
+            if not customer.total_orders and not customer.total_spent:
+                customer.total_orders = totals["order_count"]
+                customer.total_spent = totals["total_spent"]
+                customer.avg_order_value = totals["total_spent"] / totals["order_count"] if totals["order_count"] else 0.0
+            # Sipariş, müşterinin aktif olduğu son tarih için bir alt sınırdır
+            last_order = totals["last_order_date"]
+            last_login = _utc(customer.last_login_date)
+            if last_order is not None and (last_login is None or last_order > last_login):
+                customer.last_login_date = last_order
+            synced += 1
+    return synced
+
+
+def _score(values: pd.Series, ascending: bool) -> pd.Series:
+    """1-5 arası quantile skoru (5 en iyi)"""
+    if values.empty:
+        return values.astype(int)
+    pct = values.rank(method="average", pct=True, ascending=ascending)
+    return np.ceil(pct * RFM_BINS).clip(1, RFM_BINS).astype(int)
+
+
+def load_customer_features(db: Session, tenant_id: int, as_of: datetime = None) -> pd.DataFrame:
+    """Tenant'ın müşteri feature'ları ve RFM skorları"""
+    as_of = _utc(as_of) or datetime.now(timezone.utc)
+    rows = db.query(
+        CustomerFeature.customer_id,
+        *[getattr(CustomerFeature, col) for col in AGGREGATE_COLUMNS]
+    ).filter(CustomerFeature.tenant_id == tenant_id).order_by(CustomerFeature.customer_id).all()
+
+    df = pd.DataFrame(rows, columns=["customer_id"] + AGGREGATE_COLUMNS)
+    for col in ("first_order_date", "last_order_date"):
+        df[col] = pd.to_datetime(df[col], utc=True)
+
+    df["avg_order_value"] = (df["total_spent"] / df["order_count"].where(df["order_count"] > 0)).fillna(0.0)
+    df["recency_days"] = (pd.Timestamp(as_of) - df["last_order_date"]).dt.days
+    df["r_score"] = _score(df["recency_days"].fillna(df["recency_days"].max()), ascending=False)
+    df["f_score"] = _score(df["order_count"], ascending=True)
+    df["m_score"] = _score(df["total_spent"], ascending=True)
+    df["rfm_score"] = df["r_score"].astype(str) + df["f_score"].astype(str) + df["m_score"].astype(str)
+    return df
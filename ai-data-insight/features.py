@@ -0,0 +1,146 @@
+"""
+Churn modeli için ortak feature pipeline'ı
+Eğitimde bir kez fit edilir (kategori sözlükleri, medyanlar, kolon sırası),
+modelin yanına JSON olarak kaydedilir ve tahminde aynı nesne batch'lere
+vektörel olarak uygulanır. Böylece eğitim ve tahmin aynı feature'ları üretir.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+NUMERIC_FEATURES = [
+    'age', 'subscription_length', 'days_since_last_login',
+    'total_orders', 'total_spent', 'avg_order_value'
+]
+CATEGORICAL_FEATURES = ['gender', 'segment']
+UNKNOWN_CATEGORY = 'Unknown'
+
+# Eksik değerler için sabit doldurma değerleri (age medyanı fit sırasında hesaplanır)
+DEFAULT_FILL_VALUES = {
+    'subscription_length': 0.0,
+    'days_since_last_login': 365.0,  # Hiç login olmamışsa 365 gün
+    'total_orders': 0.0,
+    'total_spent': 0.0,
+    'avg_order_value': 0.0,
+}
+
+
+def feature_pipeline_path(model_path: str) -> str:
+    """Model dosyasının yanındaki feature pipeline dosyası"""
+    return f"{os.path.splitext(model_path)[0]}.features.json"
+
+
+class ChurnFeaturePipeline:
+    def __init__(self, vocabularies: dict = None, fill_values: dict = None):
+        self.vocabularies = {col: list(v) for col, v in (vocabularies or {}).items()}
+        self.fill_values = dict(DEFAULT_FILL_VALUES, **(fill_values or {}))
+
+    @property
+    def feature_names(self) -> list:
+        """Model kolon sırası: numerik feature'lar + kategori dummy'leri"""
+        names = list(NUMERIC_FEATURES)
+        for col in CATEGORICAL_FEATURES:
+            names.extend(f"{col}_{value}" for value in self.vocabularies.get(col, []))
+        return names
+
+    @staticmethod
+    def _categories(df: pd.DataFrame, col: str) -> pd.Series:
+        if col not in df.columns:
+            return pd.Series(UNKNOWN_CATEGORY, index=df.index)
+        return df[col].astype(object).where(df[col].notna(), UNKNOWN_CATEGORY).astype(str)
+
+    def fit(self, df: pd.DataFrame) -> "ChurnFeaturePipeline":
+        """Kategori sözlüklerini ve doldurma değerlerini veriden öğren"""
+        self.vocabularies = {
+            col: sorted(self._categories(df, col).unique().tolist()) for col in CATEGORICAL_FEATURES
+        }
+        age = pd.to_numeric(df['age'], errors='coerce') if 'age' in df.columns else pd.Series(dtype=float)
+        median = age.median()
+        self.fill_values['age'] = None if pd.isna(median) else float(median)
+        return self
+
+    def unseen_categories(self, df: pd.DataFrame) -> list:
+        """Sözlükte olmayan kategoriler (yeni dummy kolonu gerektirir)"""
+        unseen = []
+        for col in CATEGORICAL_FEATURES:
+            known = set(self.vocabularies.get(col, []))
+            unseen.extend(f"{col}_{v}" for v in sorted(set(self._categories(df, col)) - known))
+        return unseen
+
+    def _numeric(self, df: pd.DataFrame, now: pd.Timestamp) -> dict:
+        columns = {}
+        for col in NUMERIC_FEATURES:
+            if col == 'days_since_last_login':
+                if 'last_login_date' in df.columns:
+                    dates = pd.to_datetime(df['last_login_date'], utc=True, errors='coerce')
+                    values = (now - dates).dt.days.astype(float)
+                else:
+                    values = pd.Series(np.nan, index=df.index)
+            elif col in df.columns:
+                values = pd.to_numeric(df[col], errors='coerce').astype(float)
+            else:
+                values = pd.Series(np.nan, index=df.index)
+            fill = self.fill_values.get(col)
+            columns[col] = values.to_numpy() if fill is None else values.fillna(fill).to_numpy()
+        return columns
+
+    def transform(self, df: pd.DataFrame, now: pd.Timestamp = None) -> np.ndarray:
+        """(n, len(feature_names)) float64 matris; bilinmeyen kategoriler tüm dummy'lerde 0"""
+        now = now if now is not None else pd.Timestamp.now(tz='UTC')
+        n_rows = len(df)
+        X = np.zeros((n_rows, len(self.feature_names)), dtype=np.float64)
+
+        for i, values in enumerate(self._numeric(df, now).values()):
+            X[:, i] = values
+
+        offset = len(NUMERIC_FEATURES)
+        rows = np.arange(n_rows)
+        for col in CATEGORICAL_FEATURES:
+            vocabulary = self.vocabularies.get(col, [])
+            codes = pd.Categorical(self._categories(df, col), categories=vocabulary).codes
+            known = codes >= 0
+            X[rows[known], offset + codes[known]] = 1.0
+            offset += len(vocabulary)
+
+        return X
+
+    def transform_frame(self, df: pd.DataFrame, now: pd.Timestamp = None) -> pd.DataFrame:
+        """transform sonucu, LightGBM feature isimleriyle DataFrame olarak"""
+        return pd.DataFrame(self.transform(df, now), columns=self.feature_names, index=df.index)
+
+    def to_dict(self) -> dict:
+        return {
+            'vocabularies': self.vocabularies,
+            'fill_values': self.fill_values,
+            'feature_names': self.feature_names,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChurnFeaturePipeline":
+        return cls(data.get('vocabularies'), data.get('fill_values'))
+
+    @classmethod
+    def from_feature_names(cls, feature_names: list) -> "ChurnFeaturePipeline":
+        """Pipeline dosyası olmayan eski modeller için kolon isimlerinden sözlük çıkar"""
+        vocabularies = {col: [] for col in CATEGORICAL_FEATURES}
+        for name in feature_names or []:
+            for col in CATEGORICAL_FEATURES:
+                if name.startswith(f"{col}_"):
+                    vocabularies[col].append(name[len(col) + 1:])
+                    break
+        pipeline = cls(vocabularies, {'age': None})
+        if pipeline.feature_names != list(feature_names or []):
+            raise ValueError("Model feature'ları pipeline kolon sırasıyla eşleşmiyor")
+        return pipeline
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "ChurnFeaturePipeline":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
@@ -1,15 +1,15 @@
 import pandas as pd
-from sklearn.linear_model import LinearRegression
 import numpy as np
+from aggregates import daily_totals
 
-def forecast_sales(df: pd.DataFrame, date_col="order_date", value_col="quantity", days_ahead=7):
+def forecast_sales(df: pd.DataFrame, date_col="order_date", value_col="quantity", days_ahead=7, cube=None):
     """
     Günlük satış verilerini kullanarak gelecek günler için tahmin yapar.
     Linear regression kullanarak trend analizi yapar.
+    cube verilirse günlük toplamlar önceden hesaplanmış tablodan okunur.
     """
     # Günlük toplam satış
-    daily = df.groupby(date_col)[value_col].sum().reset_index()
-    daily = daily.sort_values(date_col)
+    daily = daily_totals(df, date_col, value_col, cube)
     
     # Tarihleri sayıya çevir
     daily["day_index"] = np.arange(len(daily))
@@ -17,7 +17,8 @@ def forecast_sales(df: pd.DataFrame, date_col="order_date", value_col="quantity"
     X = daily[["day_index"]]
     y = daily[value_col]
     
-    # Linear regression modeli
+    # Linear regression modeli (sklearn ağır; modül yüklenirken değil ilk kullanımda import edilir)
+    from sklearn.linear_model import LinearRegression
     model = LinearRegression()
     model.fit(X, y)
     
@@ -32,14 +33,13 @@ def forecast_sales(df: pd.DataFrame, date_col="order_date", value_col="quantity"
     
     return forecast_df, model
 
-def moving_average_forecast(df: pd.DataFrame, date_col="order_date", value_col="quantity", days_ahead=7, window=7):
+def moving_average_forecast(df: pd.DataFrame, date_col="order_date", value_col="quantity", days_ahead=7, window=7, cube=None):
     """
     Hareketli ortalama kullanarak basit tahmin yapar.
     Son N günün ortalamasını alır.
     """
     # Günlük toplam satış
-    daily = df.groupby(date_col)[value_col].sum().reset_index()
-    daily = daily.sort_values(date_col)
+    daily = daily_totals(df, date_col, value_col, cube)
     
     # Son N günün ortalaması
     last_avg = daily[value_col].tail(window).mean()
@@ -54,14 +54,13 @@ def moving_average_forecast(df: pd.DataFrame, date_col="order_date", value_col="
     
     return forecast_df, daily
 
-def naive_forecast(df: pd.DataFrame, date_col="order_date", value_col="quantity", days_ahead=7):
+def naive_forecast(df: pd.DataFrame, date_col="order_date", value_col="quantity", days_ahead=7, cube=None):
     """
     Naive forecast: yarın bugünkü kadar satılır.
     En basit tahmin yöntemi.
     """
     # Günlük toplam satış
-    daily = df.groupby(date_col)[value_col].sum().reset_index()
-    daily = daily.sort_values(date_col)
+    daily = daily_totals(df, date_col, value_col, cube)
     
     # Son günün değeri
     last_value = daily[value_col].iloc[-1]
@@ -1,27 +1,51 @@
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, Depends, HTTPException, status
+from fastapi import FastAPI, UploadFile, File, BackgroundTasks, Depends, HTTPException, status, Request
+from fastapi.responses import StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
 import os
-import shutil
 import uuid
+import zlib
 import pandas as pd
-import json
-from joblib import load
 from preprocess import Preprocessor
+from pipeline import Stage
+from checkpoints import checkpoint_dir
 import asyncio
 import threading
 from contextlib import asynccontextmanager
 
 # Import our new modules
 from database import get_db, init_db, check_db_connection, SessionLocal
-from models import Upload, Analysis, PipelineHistory, Tenant, User, Customer, MLModel, Prediction
-from auth import get_current_user, get_current_tenant, create_user, authenticate_user
-from config import UPLOAD_DIR, SECRET_KEY
+from models import Upload, Analysis, PipelineHistory, Tenant, User, Customer, MLModel, Prediction, SchemaProfile, Dataset
+from auth import (
+    get_current_user, get_current_tenant, create_user_async, authenticate_user_async,
+    get_hash_pool_stats
+)
+from starlette.concurrency import run_in_threadpool
+from config import (
+    UPLOAD_DIR, SECRET_KEY, PRELOAD_ML_MODELS, MIN_TRAINING_CUSTOMERS, UPLOAD_CHUNK_SIZE, PREVIEW_SAMPLE_SIZE,
+    UPLOAD_STORE_COMPRESSED, UPLOAD_COMPRESSION_LEVEL, PIPELINE_CHECKPOINTS, PIPELINE_CLAIM_TTL,
+)
+from progress import broker as progress_broker, publish_history, build_event, format_sse, is_terminal
+from serialization import FastJSONResponse, dumps, loads_field
+from demand import run_demand_prediction, load_predictions_page
+from aggregates import AggregateCube, GRAINS, load_cube, save_cube
+from preview import ReservoirSampler, build_preview
+from dates import parse_dates
+from feature_store import update_feature_store, load_customer_features
+from schema_profiles import get_profile, save_profile, set_overrides, profile_to_dict
+from readers import StreamDecompressor, compression_of, open_stream, read_csv, read_header
+from datasets import LogicalDataset, add_partition, create_dataset, dataset_to_dict
+from dataset_stats import dataset_summary
+from events import is_event_log, analyze_event_upload
+from result_cache import (
+    result_cache, analysis_etag, etag_matches, cache_control, COMPLETED_UPLOAD_STATUSES
+)
 
-# Import ML modules
-from train import train_churn_model
-from predict import predict_churn
+# ML modülleri (train/predict -> lightgbm, sklearn) ilk kullanımda import edilir;
+# yalnızca upload işleyen worker'lar bu maliyeti ödemez.
 
 def run_scheduler():
     """Scheduler fonksiyonu - her saat çalışır"""
@@ -29,7 +53,10 @@ def run_scheduler():
         try:
             db = SessionLocal()
             try:
-                uploads = db.query(Upload).filter(Upload.status == "uploaded").all()
+                # Yeni upload'lar ve kiralaması dolmuş (worker çökmüş) işlemler
+                uploads = db.query(Upload).filter(
+                    Upload.status.in_(("uploaded", "processing")), _claimable()
+                ).all()
                 for u in uploads:
                     process_pipeline(u.id)
             finally:
@@ -53,6 +80,11 @@ async def lifespan(app: FastAPI):
     
     print("✅ Database connected successfully")
     
+    # ML worker rolünde modelleri ve kütüphaneleri baştan yükle
+    if PRELOAD_ML_MODELS:
+        preload_ml_modules()
+        print("✅ ML modules preloaded")
+    
     # Start scheduler
     scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
     scheduler_thread.start()
@@ -65,16 +97,34 @@ async def lifespan(app: FastAPI):
 # Create uploads directory
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# Load ML model
+# Demand model (ilk ihtiyaçta yüklenir)
 MODEL_PATH = "./models/demand_model.joblib"
-if os.path.exists(MODEL_PATH):
-    model = load(MODEL_PATH)
-else:
-    model = None
+_demand_model = None
+_demand_model_loaded = False
+_demand_model_lock = threading.Lock()
 
-def simple_analysis(file_path: str):
+def get_demand_model():
+    """Demand modelini ilk çağrıda yükle ve önbellekte tut"""
+    global _demand_model, _demand_model_loaded
+    if not _demand_model_loaded:
+        with _demand_model_lock:
+            if not _demand_model_loaded:
+                if os.path.exists(MODEL_PATH):
+                    from joblib import load
+                    _demand_model = load(MODEL_PATH)
+                _demand_model_loaded = True
+    return _demand_model
+
+def preload_ml_modules():
+    """ML kütüphanelerini ve demand modelini önceden yükle (ML worker rolü)"""
+    import train  # noqa: F401
+    import predict  # noqa: F401
+    get_demand_model()
+
+def simple_analysis(file_path: str, df: pd.DataFrame = None):
     """Basit analiz fonksiyonu"""
-    df = pd.read_csv(file_path)
+    if df is None:
+        df = read_csv(file_path)
     summary = {
         "rows": len(df),
         "columns": list(df.columns),
@@ -88,12 +138,16 @@ def simple_analysis(file_path: str):
         insights["top_skus"] = top_skus.to_dict()
 
     if "customer_id" in df.columns and "order_date" in df.columns:
-        df["order_date"] = pd.to_datetime(df["order_date"], errors="coerce")
+        df["order_date"] = parse_dates(df["order_date"])
         last_dates = df.groupby("customer_id")["order_date"].max()
         cutoff = df["order_date"].max() - pd.Timedelta(days=90)
         at_risk = last_dates[last_dates < cutoff]
         insights["churn_at_risk_count"] = int(len(at_risk))
 
+    # Etkileşim log'u (kullanıcı, ürün, etkileşim tipi, zaman): oturum ve funnel analizi
+    if is_event_log(df.columns):
+        insights["event_analysis"] = analyze_event_upload(file_path, df)
+
     anomalies = []
     if "sku" in df.columns and "price" in df.columns:
         df["price"] = pd.to_numeric(df["price"], errors="coerce")
@@ -108,11 +162,98 @@ def simple_analysis(file_path: str):
 
     return summary, insights
 
+def _update_feature_store(db: Session, upload: Upload, df: pd.DataFrame):
+    """Feature store güncellemesi; hata analiz sonucunu etkilemez"""
+    if "customer_id" not in df.columns:
+        return
+    try:
+        update_feature_store(db, upload.tenant_id, upload.id, df)
+    except Exception as e:
+        db.rollback()
+        print(f"Feature store error for upload {upload.id}: {e}")
+
+def _save_aggregates(upload_id: int, df: pd.DataFrame = None, cube: AggregateCube = None):
+    """Upload'un aggregate cube'unu kaydet; hata analiz sonucunu etkilemez"""
+    try:
+        if cube is None:
+            if "order_date" not in df.columns or "quantity" not in df.columns:
+                return
+            cube = AggregateCube.build(df, "order_date", "quantity")
+        save_cube(upload_id, cube)
+    except Exception as e:
+        print(f"Aggregate error for upload {upload_id}: {e}")
+
+def _run_preprocessor(db: Session, upload: Upload, extra_stages: list = None) -> tuple:
+    """Tenant'ın bu başlık için şema profiliyle preprocessing; yeni tespit edilen profil kaydedilir"""
+    profile = None
+    try:
+        profile = get_profile(db, upload.tenant_id, read_header(upload.path))
+    except Exception as e:
+        db.rollback()
+        print(f"Schema profile error for upload {upload.id}: {e}")
+
+    # Tekrar ve yeniden çalıştırmalar son geçerli checkpoint'ten devam eder
+    checkpoint = checkpoint_dir(upload.id) if PIPELINE_CHECKPOINTS else None
+    pre = Preprocessor(upload.path, profile=profile, checkpoint=checkpoint, tenant_id=upload.tenant_id)
+    result = pre.run(extra_stages)
+
+    if not pre.profile_reused and pre.profile:
+        try:
+            save_profile(db, upload.tenant_id, pre.profile)
+        except Exception as e:
+            db.rollback()
+            print(f"Schema profile error for upload {upload.id}: {e}")
+    return pre, result
+
+def _demand_stage(upload_id: int, model):
+    """Talep tahmini aşaması: temiz çerçeveye bağlı, anomali/forecast ile eşzamanlı çalışır"""
+    def predict(frame: pd.DataFrame, cancelled):
+        if model is None or not {"sku", "quantity", "order_date"} <= set(frame.columns):
+            return None
+        # Zaman aşımıyla terk edilirse tahminler yayınlanmaz
+        return run_demand_prediction(upload_id, frame, model, "order_date", MODEL_PATH, cancelled)
+    return Stage("demand_prediction", predict, inputs=("frame",), outputs=("prediction_count",),
+                 cancellable=True)
+
+def _write_chunk(buffer, chunk: bytes, compressor, decompressor, sampler):
+    """Upload parçasını (gerekirse sıkıştırıp) yaz, açılmış halini örnekle (sampler None: örnekleme yok)"""
+    buffer.write(compressor.compress(chunk) if compressor else chunk)
+    if sampler is not None:
+        sampler.feed(decompressor.decompress(chunk) if decompressor else chunk)
+
+def _sample_stored(path: str, sampler: ReservoirSampler):
+    """Akışla açılamayan (zip) upload'ları diske yazıldıktan sonra örnekle"""
+    with open_stream(path) as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            sampler.feed(chunk)
+
+def _preview_stored(db: Session, upload_id: int, path: str):
+    """Zip upload'unun önizlemesi (arka planda, yanıt döndükten sonra)"""
+    sampler = ReservoirSampler(PREVIEW_SAMPLE_SIZE)
+    try:
+        _sample_stored(path, sampler)
+    except Exception as e:
+        print(f"Preview error for upload {upload_id}: {e}")
+        return
+    sampler.close()
+    _save_preview(db, upload_id, sampler)
+
+def _save_preview(db: Session, upload_id: int, sampler: ReservoirSampler):
+    """Örneklemden önizleme sonucunu kaydet; hata upload'u etkilemez"""
+    try:
+        summary, insights = build_preview(sampler.frame(), sampler.seen)
+        db.add(Analysis(upload_id=upload_id, summary=summary, insights=insights, precision="preview"))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Preview error for upload {upload_id}: {e}")
+
 def process_upload(upload_id: int, file_path: str, db: Session):
     """Upload işleme fonksiyonu"""
     upload = db.query(Upload).filter(Upload.id == upload_id).first()
     if upload:
         upload.status = "processing"
+        upload.claimed_at = datetime.now(timezone.utc)
         db.commit()
 
         # Create pipeline history
@@ -123,26 +264,35 @@ def process_upload(upload_id: int, file_path: str, db: Session):
         )
         db.add(history)
         db.commit()
+        publish_history(history, upload.status)
 
     try:
-        summary, insights = simple_analysis(file_path)
+        df = read_csv(file_path)
+        summary, insights = simple_analysis(file_path, df)
         
-        # Create analysis record
-        analysis = Analysis(
-            upload_id=upload_id,
-            summary=json.dumps(summary),
-            insights=json.dumps(insights)
-        )
-        db.add(analysis)
+        # Kesin sonuç varsa önizleme kaydının yerine yazılır (JSON kolonlarına doğrudan dict)
+        analysis = db.query(Analysis).filter(Analysis.upload_id == upload_id).first()
+        if analysis is None:
+            analysis = Analysis(upload_id=upload_id)
+            db.add(analysis)
+        analysis.summary = summary
+        analysis.insights = insights
+        analysis.precision = "exact"
         
         # Update upload status
         upload.status = "ready"
         db.commit()
+        result_cache.invalidate(upload_id)
+        
+        # Müşteri feature store'u (sadece bu upload'daki müşteriler güncellenir)
+        _update_feature_store(db, upload, df)
+        _save_aggregates(upload_id, df)
         
         # Update pipeline history
         history.status = "completed"
         history.message = "Analiz tamamlandı"
         db.commit()
+        publish_history(history, upload.status)
         
     except Exception as e:
         # Update upload status to failed
@@ -153,12 +303,29 @@ def process_upload(upload_id: int, file_path: str, db: Session):
         history.status = "failed"
         history.message = f"Analiz hatası: {str(e)}"
         db.commit()
+        publish_history(history, upload.status)
         raise
 
-def process_pipeline(upload_id: int):
-    """Pipeline işleme fonksiyonu"""
+def _claimable():
+    """Kimsenin işlemediği ya da kiralaması dolmuş (çöken worker'dan kalan) upload koşulu"""
+    stale = datetime.now(timezone.utc) - timedelta(seconds=PIPELINE_CLAIM_TTL)
+    return or_(Upload.status != "processing", Upload.claimed_at.is_(None), Upload.claimed_at < stale)
+
+def _claim_upload(db: Session, upload_id: int) -> bool:
+    """Upload'u tek bir çalıştırma için işleniyor olarak işaretle (koşullu UPDATE; başkası işliyorsa False)"""
+    claimed = db.query(Upload).filter(Upload.id == upload_id, _claimable()).update(
+        {"status": "processing", "claimed_at": datetime.now(timezone.utc)}, synchronize_session=False
+    )
+    db.commit()
+    return claimed == 1
+
+def process_pipeline(upload_id: int, claimed: bool = False):
+    """Pipeline işleme fonksiyonu (claimed: upload çağıran tarafından zaten işleniyor olarak işaretlendi)"""
     db = SessionLocal()
     try:
+        # Scheduler ve retry aynı upload'u aynı anda çalıştırmasın
+        if not claimed and not _claim_upload(db, upload_id):
+            return
         upload = db.query(Upload).filter(Upload.id == upload_id).first()
         if not upload:
             return
@@ -170,56 +337,55 @@ def process_pipeline(upload_id: int):
         )
         db.add(history)
         db.commit()
+        publish_history(history, upload.status)
 
         try:
-            # Preprocessing
-            pre = Preprocessor(upload.path)
-            df, summary_stats, anomaly_count, forecast_values = pre.run()
+            # Preprocessing; batch tahmin aşaması aynı DAG'da anomali/forecast ile eşzamanlı
+            pre, (df, summary_stats, anomaly_count, forecast_values) = _run_preprocessor(
+                db, upload, extra_stages=[_demand_stage(upload_id, get_demand_model())]
+            )
 
             # Update history with preprocessing results
             history.status = "preprocessing_completed"
             history.message = f"Preprocessing tamamlandı. Kayıt: {len(df)}, Anomali: {anomaly_count}"
+            if pre.event_analysis:
+                history.message += (
+                    f", Oturum: {pre.event_analysis['sessions']}, "
+                    f"View->Purchase: {pre.event_analysis['funnel']['view_to_purchase_rate']}"
+                )
             db.commit()
+            publish_history(history, upload.status)
 
-            # ML Model Prediction (if model exists)
-            if model and "sku" in df.columns and "quantity" in df.columns and "order_date" in df.columns:
-                try:
-                    # Feature engineering for prediction
-                    df["order_date"] = pd.to_datetime(df["order_date"])
-                    df["month"] = df["order_date"].dt.month
-                    df["day_of_week"] = df["order_date"].dt.dayofweek
-                    df["day_of_year"] = df["order_date"].dt.dayofyear
-
-                    model_features = ["quantity", "price", "month", "day_of_week", "day_of_year"]
-                    for feature in model_features:
-                        if feature not in df.columns:
-                            df[feature] = 0
-                        df[feature] = pd.to_numeric(df[feature], errors="coerce").fillna(0)
-
-                    X = df[model_features]
-                    predictions = model.predict(X)
-
-                    history.status = "prediction_completed"
-                    history.message = f"Tahmin tamamlandı. {len(predictions)} tahmin üretildi."
-                    db.commit()
-
-                except Exception as e:
-                    history.status = "prediction_failed"
-                    history.message = f"Tahmin hatası: {str(e)}"
-                    db.commit()
-                    print(f"Prediction error for upload {upload_id}: {e}")
+            _update_feature_store(db, upload, df)
+            if pre.cube is not None:
+                _save_aggregates(upload_id, cube=pre.cube)
+
+            prediction = pre.stage_report.get("demand_prediction", {})
+            if prediction.get("error"):
+                history.status = "prediction_failed"
+                history.message = f"Tahmin hatası: {prediction['error']}"
+                db.commit()
+                publish_history(history, upload.status)
+                print(f"Prediction error for upload {upload_id}: {prediction['error']}")
+            elif pre.values.get("prediction_count") is not None:
+                history.status = "prediction_completed"
+                history.message = f"Tahmin tamamlandı. {pre.values['prediction_count']} tahmin üretildi."
+                db.commit()
+                publish_history(history, upload.status)
 
             # Final status update
             upload.status = "completed"
             history.status = "completed"
             history.message = "Tüm pipeline tamamlandı."
             db.commit()
+            publish_history(history, upload.status)
 
         except Exception as e:
             upload.status = "failed"
             history.status = "failed"
             history.message = f"Pipeline hatası: {str(e)}"
             db.commit()
+            publish_history(history, upload.status)
             print(f"Pipeline error for upload {upload_id}: {e}")
     finally:
         db.close()
@@ -228,7 +394,8 @@ app = FastAPI(
     title="AI Data Insight MVP",
     description="Multi-tenant AI Data Analysis Platform",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 app.add_middleware(
@@ -251,17 +418,32 @@ async def upload_csv(
 ):
     """CSV dosyası upload endpoint'i - Multi-tenant aware"""
     try:
-        if not file.filename.lower().endswith(".csv"):
+        try:
+            compression = compression_of(file.filename)
+        except ValueError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Sadece CSV dosyaları kabul ediliyor"
+                detail=f"Sadece CSV dosyaları kabul ediliyor (.csv, .csv.gz, .csv.zst, .zip): {e}"
             )
 
         uid = str(uuid.uuid4())
         path = os.path.join(UPLOAD_DIR, f"{uid}_{file.filename}")
+        # Sıkıştırılmış upload'lar olduğu gibi, düz CSV'ler istenirse gzip ile saklanır
+        compressor = None
+        if compression is None and UPLOAD_STORE_COMPRESSED:
+            compressor = zlib.compressobj(UPLOAD_COMPRESSION_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+            path += ".gz"
+        decompressor = StreamDecompressor(compression) if compression in ("gzip", "zstd") else None
 
+        # Diske yazarken önizleme için (açılmış) satır örneklemi tutulur; zip'in dizini
+        # dosya sonunda olduğundan zip'ler yanıttan sonra arka planda örneklenir
+        sampler = ReservoirSampler(PREVIEW_SAMPLE_SIZE) if compression != "zip" else None
         with open(path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                # Sıkıştırma/açma ve örnekleme CPU işi: event loop'u bloklamaması için thread'de
+                await run_in_threadpool(_write_chunk, buffer, chunk, compressor, decompressor, sampler)
+            if compressor:
+                buffer.write(compressor.flush())
 
         # Create upload record with default tenant and user (development)
         upload = Upload(
@@ -275,6 +457,13 @@ async def upload_csv(
         db.commit()
         db.refresh(upload)
 
+        if sampler is not None:
+            sampler.close()
+            await run_in_threadpool(_save_preview, db, upload.id, sampler)
+        else:
+            # Tam analizden önce çalışır; önizleme tam sonucun üzerine yazılmaz
+            background_tasks.add_task(_preview_stored, db, upload.id, path)
+
         # Create pipeline history
         history = PipelineHistory(
             upload_id=upload.id,
@@ -283,6 +472,7 @@ async def upload_csv(
         )
         db.add(history)
         db.commit()
+        publish_history(history, upload.status)
 
         # Start background processing
         background_tasks.add_task(process_upload, upload.id, path, db)
@@ -293,6 +483,8 @@ async def upload_csv(
             "tenant_id": 2,  # Default test tenant
             "user_id": 2     # Default test user
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Upload error: {e}")
         import traceback
@@ -327,12 +519,114 @@ def upload_status(
         "tenant_id": upload.tenant_id
     }
 
+# SSE keep-alive aralığı (saniye)
+PROGRESS_KEEPALIVE_SECONDS = 15
+
+def _tenant_upload_exists(db: Session, upload_id: int, tenant_id: int) -> bool:
+    return db.query(Upload.id).filter(Upload.id == upload_id, Upload.tenant_id == tenant_id).first() is not None
+
+def _load_progress_snapshot(upload_id: int, tenant_id: int):
+    """Upload'un mevcut durumunu tek sorguda olay olarak getir"""
+    db = SessionLocal()
+    try:
+        upload = db.query(Upload).filter(Upload.id == upload_id, Upload.tenant_id == tenant_id).first()
+        if not upload:
+            return None
+        history = db.query(PipelineHistory).filter(
+            PipelineHistory.upload_id == upload_id
+        ).order_by(PipelineHistory.id.desc()).first()
+
+        if history is None:
+            return build_event(upload_id, upload.status, None, upload.status)
+        event = build_event(upload_id, history.status, history.message, upload.status)
+        if upload.status in ("ready", "completed", "failed") and not is_terminal(event):
+            event = build_event(upload_id, "failed" if upload.status == "failed" else "completed",
+                                history.message, upload.status)
+        return event
+    finally:
+        db.close()
+
+@app.get("/api/v1/upload/{upload_id}/events")
+async def upload_events(
+    upload_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant),
+    db: Session = Depends(get_db)
+):
+    """Upload ilerleme akışı (Server-Sent Events) - status polling yerine - Multi-tenant aware"""
+    # Başka tenant'ın upload'una abone olunmasın
+    if not await run_in_threadpool(_tenant_upload_exists, db, upload_id, current_tenant.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload bulunamadı"
+        )
+
+    # Snapshot'tan önce abone ol ki aradaki olaylar kaçmasın
+    queue = progress_broker.subscribe(upload_id)
+    try:
+        snapshot = progress_broker.last_event(upload_id)
+        if snapshot is None:
+            snapshot = await run_in_threadpool(_load_progress_snapshot, upload_id, current_tenant.id)
+        if snapshot is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload bulunamadı"
+            )
+    except Exception:
+        progress_broker.unsubscribe(upload_id, queue)
+        raise
+
+    async def event_stream():
+        try:
+            yield format_sse(snapshot)
+            if is_terminal(snapshot):
+                return
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=PROGRESS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+                if is_terminal(event):
+                    break
+        finally:
+            progress_broker.unsubscribe(upload_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _result_response(body: bytes, etag: str, if_none_match=None) -> Response:
+    """Sonuç byte'larından (veya 304) ETag'li response oluştur"""
+    headers = {"ETag": etag, "Cache-Control": cache_control()}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/api/v1/upload/{upload_id}/result")
 def get_analysis_result(
     upload_id: int,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Analiz sonucu endpoint'i - Development için basitleştirildi"""
+    if_none_match = request.headers.get("if-none-match")
+
+    # Önbellekteki sonuç sadece sürüm kolonlarıyla doğrulanır (başka worker güncellemiş olabilir)
+    cached = result_cache.get(upload_id)
+    if cached is not None:
+        current = db.query(
+            Analysis.id, Analysis.precision, Analysis.created_at, Analysis.updated_at, Upload.status
+        ).join(Upload, Upload.id == Analysis.upload_id).filter(Analysis.upload_id == upload_id).first()
+        if current is not None and current.status in COMPLETED_UPLOAD_STATUSES \
+                and analysis_etag(current) == cached.etag:
+            return _result_response(cached.body, cached.etag, if_none_match)
+        result_cache.invalidate(upload_id)
+
     upload = db.query(Upload).filter(Upload.id == upload_id).first()
     
     if not upload:
@@ -348,11 +642,91 @@ def get_analysis_result(
             detail="Analiz sonucu bulunamadı"
         )
     
-    return {
+    etag = analysis_etag(analysis)
+    completed = upload.status in COMPLETED_UPLOAD_STATUSES
+    if etag_matches(if_none_match, etag):
+        return _result_response(b"", etag, if_none_match)
+
+    body = dumps({
         "upload_id": analysis.upload_id,
-        "summary": json.loads(analysis.summary) if analysis.summary else {},
-        "insights": json.loads(analysis.insights) if analysis.insights else {}
-    }
+        "precision": analysis.precision or "exact",
+        "summary": loads_field(analysis.summary),
+        "insights": loads_field(analysis.insights)
+    })
+    if completed:
+        result_cache.put(upload_id, etag, body)
+    return _result_response(body, etag)
+
+@app.get("/api/v1/upload/{upload_id}/predictions")
+def get_demand_predictions(
+    upload_id: int,
+    offset: int = 0,
+    limit: int = 100
+):
+    """Upload için kaydedilmiş demand tahminleri (sayfalı)"""
+    if offset < 0 or not 1 <= limit <= 1000:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="offset >= 0 ve 1 <= limit <= 1000 olmalı"
+        )
+
+    page = load_predictions_page(upload_id, offset, limit)
+    if page is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bu upload için demand tahmini bulunamadı"
+        )
+    return FastJSONResponse(page)
+
+@app.get("/api/v1/upload/{upload_id}/aggregates")
+def get_upload_aggregates(
+    upload_id: int,
+    grain: str = "day",
+    dimension: Optional[str] = None,
+    key: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+):
+    """Upload için önceden hesaplanmış günlük/haftalık/aylık toplamlar"""
+    if grain not in GRAINS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="grain day, week veya month olmalı"
+        )
+
+    cube = load_cube(upload_id)
+    if cube is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bu upload için aggregate bulunamadı"
+        )
+    if dimension is not None and dimension not in cube.dimensions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Geçersiz kırılım: {dimension} (mevcut: {', '.join(cube.dimensions) or '-'})"
+        )
+
+    table = cube.query(grain, dimension, key, start, end)
+    items = []
+    for row in table.itertuples(index=False):
+        item = {
+            "period": row.period.date().isoformat(),
+            "sum": float(row.sum),
+            "count": int(row.count),
+            "mean": None if pd.isna(row.mean) else float(row.mean),
+        }
+        if dimension is not None:
+            item[dimension] = row.key
+        items.append(item)
+
+    return FastJSONResponse({
+        "upload_id": upload_id,
+        "date_col": cube.date_col,
+        "value_col": cube.value_col,
+        "grain": grain,
+        "dimension": dimension,
+        "items": items
+    })
 
 @app.get("/api/v1/pipeline/history")
 def pipeline_history(
@@ -371,6 +745,29 @@ def pipeline_history(
         } for h in histories
     ]
 
+@app.post("/api/v1/upload/{upload_id}/retry")
+def retry_upload(
+    upload_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """Başarısız ya da tamamlanmış upload'un pipeline'ını tekrar çalıştır (checkpoint'ten devam eder)"""
+    upload = db.query(Upload).filter(Upload.id == upload_id).first()
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload bulunamadı"
+        )
+    # Kontrol ve işaretleme tek koşullu UPDATE: eşzamanlı iki retry'dan sadece biri kazanır
+    if not _claim_upload(db, upload_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload şu anda işleniyor"
+        )
+
+    background_tasks.add_task(process_pipeline, upload_id, True)
+    return {"upload_id": upload_id, "status": "processing"}
+
 @app.post("/api/v1/preprocess/{upload_id}")
 def preprocess_file(
     upload_id: int,
@@ -386,17 +783,16 @@ def preprocess_file(
                 detail="Upload bulunamadı"
             )
 
-        pre = Preprocessor(upload.path)
-        df, summary, anomaly_count, forecast_values = pre.run()
+        pre, (df, summary, anomaly_count, forecast_values) = _run_preprocessor(db, upload)
 
-        return {
+        return FastJSONResponse({
             "upload_id": upload_id,
             "record_count": len(df),
             "column_count": df.shape[1],
             "anomaly_count": anomaly_count,
             "forecast": forecast_values,
             "summary_stats": summary
-        }
+        })
     except Exception as e:
         print(f"Preprocessing hatası: {str(e)}")
         import traceback
@@ -407,8 +803,18 @@ def preprocess_file(
         )
 
 # Auth endpoints
+def _get_or_create_tenant(tenant_name: str, db: Session) -> Tenant:
+    """İsme göre tenant'ı getir, yoksa oluştur"""
+    tenant = db.query(Tenant).filter(Tenant.name == tenant_name).first()
+    if not tenant:
+        tenant = Tenant(name=tenant_name, domain=tenant_name.lower().replace(" ", "_"))
+        db.add(tenant)
+        db.commit()
+        db.refresh(tenant)
+    return tenant
+
 @app.post("/api/v1/auth/register")
-def register_user(
+async def register_user(
     email: str,
     password: str,
     full_name: str,
@@ -417,7 +823,7 @@ def register_user(
 ):
     """Kullanıcı kayıt endpoint'i"""
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == email).first()
+    existing_user = await run_in_threadpool(lambda: db.query(User).filter(User.email == email).first())
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -425,15 +831,10 @@ def register_user(
         )
     
     # Create or get tenant
-    tenant = db.query(Tenant).filter(Tenant.name == tenant_name).first()
-    if not tenant:
-        tenant = Tenant(name=tenant_name, domain=tenant_name.lower().replace(" ", "_"))
-        db.add(tenant)
-        db.commit()
-        db.refresh(tenant)
+    tenant = await run_in_threadpool(_get_or_create_tenant, tenant_name, db)
     
-    # Create user
-    user = create_user(email, password, full_name, tenant.id, db)
+    # Create user (bcrypt hash işlemi ayrı havuzda)
+    user = await create_user_async(email, password, full_name, tenant.id, db)
     
     return {
         "user_id": user.id,
@@ -444,7 +845,7 @@ def register_user(
     }
 
 @app.post("/api/v1/auth/login")
-def login_user(
+async def login_user(
     login_data: dict,
     db: Session = Depends(get_db)
 ):
@@ -458,7 +859,7 @@ def login_user(
             detail="Email ve şifre gerekli"
         )
     
-    user = authenticate_user(email, password, db)
+    user = await authenticate_user_async(email, password, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -467,7 +868,7 @@ def login_user(
     
     # Create access token
     from auth import create_access_token
-    access_token = create_access_token(data={"sub": str(user.id)})
+    access_token = create_access_token(data={"sub": str(user.id), "tenant_id": user.tenant_id})
     
     return {
         "access_token": access_token,
@@ -478,31 +879,41 @@ def login_user(
         "tenant_id": user.tenant_id
     }
 
+@app.get("/api/v1/metrics/auth")
+def auth_metrics():
+    """Şifre hash havuzunun kuyruk metrikleri"""
+    return get_hash_pool_stats()
+
 # Churn Model Endpoints
 @app.post("/api/v1/churn/train")
 def train_churn(
+    tenant_id: int = 2,  # Default test tenant
+    incremental: bool = False,
+    tune: bool = False,
     db: Session = Depends(get_db)
 ):
     """Churn model eğitimi endpoint'i"""
     try:
         # Churn verisi var mı kontrol et
         customer_count = db.query(Customer).filter(
-            Customer.tenant_id == 2,  # Default test tenant
+            Customer.tenant_id == tenant_id,
             Customer.churned.isnot(None)
         ).count()
 
-        if customer_count < 10:
+        if customer_count < MIN_TRAINING_CUSTOMERS:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Model eğitimi için en az 10 müşteri verisi gerekli. Mevcut: {customer_count}"
+                detail=f"Model eğitimi için en az {MIN_TRAINING_CUSTOMERS} müşteri verisi gerekli. Mevcut: {customer_count}"
             )
 
         # Model eğitimi
-        result = train_churn_model(2)  # Default test tenant
+        from train import train_churn_model
+        result = train_churn_model(tenant_id, incremental=incremental, tune=tune)
         
         if result['success']:
             return {
                 "message": result['message'],
+                "mode": result['mode'],
                 "model_id": result['model_id'],
                 "metrics": result['metrics']
             }
@@ -521,6 +932,29 @@ def train_churn(
             detail=f"Model eğitimi hatası: {str(e)}"
         )
 
+@app.post("/api/v1/churn/train/fleet")
+def train_churn_fleet(
+    background_tasks: BackgroundTasks,
+    max_workers: int = None,
+    incremental: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Tüm uygun tenant'lar için paralel churn model eğitimi başlat"""
+    from orchestrator import list_trainable_tenants, run_fleet_training
+
+    tenants = list_trainable_tenants(db, MIN_TRAINING_CUSTOMERS)
+    if not tenants:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"En az {MIN_TRAINING_CUSTOMERS} etiketli müşterisi olan tenant bulunamadı"
+        )
+
+    background_tasks.add_task(run_fleet_training, max_workers, incremental=incremental)
+    return {
+        "message": f"{len(tenants)} tenant için model eğitimi başlatıldı",
+        "tenants": [{"tenant_id": tenant_id, "customers": count} for tenant_id, count in tenants]
+    }
+
 @app.post("/api/v1/churn/predict")
 def predict_churn_endpoint(
     customer_data: dict,
@@ -542,6 +976,7 @@ def predict_churn_endpoint(
             )
 
         # Tahmin yap
+        from predict import predict_churn
         result = predict_churn(2, customer_data)  # Default test tenant
         
         if result['success']:
@@ -612,6 +1047,180 @@ def get_churn_predictions(
         } for pred in predictions
     ]
 
+@app.get("/api/v1/feature-store/customers")
+def get_customer_features(
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant),
+    offset: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """Upload'lardan biriktirilen müşteri feature'ları ve RFM skorları (sayfalı)"""
+    tenant_id = current_tenant.id
+    if offset < 0 or not 1 <= limit <= 1000:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="offset >= 0 ve 1 <= limit <= 1000 olmalı"
+        )
+
+    features = load_customer_features(db, tenant_id)
+    page = features.iloc[offset:offset + limit]
+    return {
+        "tenant_id": tenant_id,
+        "total": len(features),
+        "offset": offset,
+        "limit": limit,
+        "items": page.to_dict(orient="records")
+    }
+
+@app.get("/api/v1/schema-profiles")
+def list_schema_profiles(
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant),
+    db: Session = Depends(get_db)
+):
+    """Tenant'ın başlık imzası başına kayıtlı şema profilleri"""
+    tenant_id = current_tenant.id
+    records = db.query(SchemaProfile).filter(
+        SchemaProfile.tenant_id == tenant_id
+    ).order_by(SchemaProfile.id).all()
+    return {
+        "tenant_id": tenant_id,
+        "items": [profile_to_dict(record) for record in records]
+    }
+
+@app.put("/api/v1/schema-profiles/{signature}/overrides")
+def update_schema_profile_overrides(
+    signature: str,
+    overrides: dict,
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant),
+    db: Session = Depends(get_db)
+):
+    """Şema profiline manuel override (kolon rolü, dtype, tarih formatı, doldurma değeri)"""
+    tenant_id = current_tenant.id
+    try:
+        record = set_overrides(db, tenant_id, signature, overrides)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if record is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Şema profili bulunamadı"
+        )
+    return profile_to_dict(record)
+
+def _get_dataset(db: Session, dataset_id: int, tenant_id: int) -> Dataset:
+    dataset = db.query(Dataset).filter(Dataset.id == dataset_id, Dataset.tenant_id == tenant_id).first()
+    if dataset is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Veri seti bulunamadı"
+        )
+    return dataset
+
+@app.post("/api/v1/datasets")
+def create_dataset_endpoint(
+    name: str,
+    date_col: str = "order_date",
+    value_col: str = "quantity",
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant),
+    db: Session = Depends(get_db)
+):
+    """Birden çok upload'u gruplayan mantıksal veri seti oluştur"""
+    tenant_id = current_tenant.id
+    try:
+        dataset = create_dataset(db, tenant_id, name, date_col, value_col)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return dataset_to_dict(dataset)
+
+@app.get("/api/v1/datasets")
+def list_datasets(
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant),
+    db: Session = Depends(get_db)
+):
+    """Tenant'ın veri setleri ve bölümleri"""
+    tenant_id = current_tenant.id
+    records = db.query(Dataset).filter(Dataset.tenant_id == tenant_id).order_by(Dataset.id).all()
+    return {
+        "tenant_id": tenant_id,
+        "items": [dataset_to_dict(record) for record in records]
+    }
+
+@app.post("/api/v1/datasets/{dataset_id}/uploads/{upload_id}")
+def add_dataset_upload(
+    dataset_id: int,
+    upload_id: int,
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant),
+    db: Session = Depends(get_db)
+):
+    """Upload'u veri setine bölüm olarak ekle; sadece bu upload işlenir"""
+    tenant_id = current_tenant.id
+    dataset = _get_dataset(db, dataset_id, tenant_id)
+    upload = db.query(Upload).filter(Upload.id == upload_id, Upload.tenant_id == tenant_id).first()
+    if upload is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload bulunamadı"
+        )
+    try:
+        add_partition(db, dataset, upload)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    db.refresh(dataset)
+    return dataset_to_dict(dataset)
+
+@app.get("/api/v1/datasets/{dataset_id}/summary")
+def get_dataset_summary(
+    dataset_id: int,
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant),
+    db: Session = Depends(get_db)
+):
+    """Veri setinin artımlı güncellenen kolon özetleri (describe düzeninde)"""
+    tenant_id = current_tenant.id
+    _get_dataset(db, dataset_id, tenant_id)
+    return FastJSONResponse({"dataset_id": dataset_id, **dataset_summary(dataset_id)})
+
+@app.get("/api/v1/datasets/{dataset_id}/analysis")
+def analyze_dataset(
+    dataset_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    days_ahead: int = 7,
+    current_user: User = Depends(get_current_user),
+    current_tenant: Tenant = Depends(get_current_tenant),
+    db: Session = Depends(get_db)
+):
+    """Veri setinin tarih aralığıyla elenmiş bölümleri üzerinde özet, anomali ve forecast"""
+    tenant_id = current_tenant.id
+    if start is not None and end is not None and start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start, end'den sonra olamaz"
+        )
+    dataset = _get_dataset(db, dataset_id, tenant_id)
+    result = LogicalDataset.from_db(db, dataset).analyze(start, end, days_ahead=days_ahead)
+    return FastJSONResponse({
+        "dataset_id": dataset_id,
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        **result
+    })
+
 @app.post("/api/v1/churn/customers")
 def add_customer_data(
     customer_data: dict,
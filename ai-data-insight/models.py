@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, JSON, Float
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, JSON, Float, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -50,6 +50,8 @@ class Upload(Base):
     file_size = Column(Integer, nullable=True)
     mime_type = Column(String(100), nullable=True)
     status = Column(String(50), default="uploaded", index=True)
+    # İşlemeye alındığı an; süresi dolmuş "processing" kaydı (çöken worker) yeniden alınabilir
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
     
     # Foreign Keys
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
@@ -75,6 +77,7 @@ class Analysis(Base):
     insights = Column(JSON, nullable=True)  # JSON field for insights
     anomaly_count = Column(Integer, default=0)
     forecast_data = Column(JSON, nullable=True)  # JSON field for forecast results
+    precision = Column(String(16), default="exact")  # preview (örneklem) veya exact
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -195,5 +198,87 @@ class Prediction(Base):
     model = relationship("MLModel")
     tenant = relationship("Tenant")
 
+class CustomerFeature(Base):
+    """Upload'lardaki siparişlerden biriktirilen müşteri feature'ları (feature store)"""
+    __tablename__ = "customer_features"
+    __table_args__ = (UniqueConstraint("tenant_id", "customer_id", name="uq_customer_features_tenant_customer"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
+    customer_id = Column(String(255), nullable=False)
+    
+    # Birleştirilebilir (mergeable) toplamlar; RFM skorları okuma anında hesaplanır
+    order_count = Column(Integer, default=0)
+    total_quantity = Column(Float, default=0.0)
+    total_spent = Column(Float, default=0.0)
+    first_order_date = Column(DateTime(timezone=True), nullable=True)
+    last_order_date = Column(DateTime(timezone=True), nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class FeatureStoreUpload(Base):
+    """Feature store'a işlenmiş upload'lar (aynı upload iki kez sayılmasın)"""
+    __tablename__ = "feature_store_uploads"
+    
+    upload_id = Column(Integer, ForeignKey("uploads.id"), primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    row_count = Column(Integer, default=0)
+    customer_count = Column(Integer, default=0)
+    processed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class SchemaProfile(Base):
+    """Tenant'ın başlık imzası başına tespit edilen şema profili (kolon rolleri, dtype, tarih formatı)"""
+    __tablename__ = "schema_profiles"
+    __table_args__ = (UniqueConstraint("tenant_id", "signature", name="uq_schema_profiles_tenant_signature"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
+    signature = Column(String(64), nullable=False)
+    columns = Column(JSON, nullable=False)
+    
+    # Tespit edilen profil ve üzerine uygulanan manuel override'lar
+    profile = Column(JSON, nullable=True)
+    overrides = Column(JSON, nullable=True)
+    use_count = Column(Integer, default=0)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class Dataset(Base):
+    """Birden çok upload'u tek tablo gibi gösteren mantıksal veri seti"""
+    __tablename__ = "datasets"
+    __table_args__ = (UniqueConstraint("tenant_id", "name", name="uq_datasets_tenant_name"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    date_col = Column(String(255), default="order_date")
+    value_col = Column(String(255), default="quantity")
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relationships
+    partitions = relationship("DatasetPartition", back_populates="dataset", order_by="DatasetPartition.min_date")
+
+class DatasetPartition(Base):
+    """Veri setindeki bir upload ve bölüm eleme için tarih aralığı istatistikleri"""
+    __tablename__ = "dataset_partitions"
+    
+    dataset_id = Column(Integer, ForeignKey("datasets.id"), primary_key=True)
+    upload_id = Column(Integer, ForeignKey("uploads.id"), primary_key=True)
+    row_count = Column(Integer, default=0)
+    min_date = Column(DateTime, nullable=True, index=True)
+    max_date = Column(DateTime, nullable=True, index=True)
+    added_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    dataset = relationship("Dataset", back_populates="partitions")
+    upload = relationship("Upload")
+
 # Alembic için metadata
 metadata = Base.metadata
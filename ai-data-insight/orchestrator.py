@@ -0,0 +1,163 @@
+"""
+Çok tenant'lı churn eğitim orkestratörü
+Yeterli etiketli müşterisi olan tenant'ları bulur ve ChurnTrainer
+çalıştırmalarını process havuzuna dağıtır. Her işin LightGBM thread sayısı
+toplam çekirdek sayısını aşmayacak şekilde sınırlanır; tenant başına süre,
+satır sayısı ve tepe bellek kullanımı raporlanır.
+
+Kullanım: python orchestrator.py [--workers N] [--threads-per-job M] [--min-customers K] [--incremental]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from sqlalchemy import func
+
+from config import MIN_TRAINING_CUSTOMERS, TRAINING_MAX_WORKERS, TRAINING_REPORT_DIR
+from database import SessionLocal
+from models import Customer, Tenant
+
+logger = logging.getLogger(__name__)
+
+
+def plan_resources(cpu_count: int, max_workers: int = None, threads_per_job: int = None):
+    """Process ve iş başına thread sayısını çekirdek sayısını aşmayacak şekilde belirle"""
+    cpu_count = max(1, cpu_count)
+    workers = max_workers or TRAINING_MAX_WORKERS or cpu_count
+    workers = max(1, min(workers, cpu_count))
+    threads = threads_per_job or max(1, cpu_count // workers)
+    threads = max(1, min(threads, cpu_count // workers or 1))
+    return workers, threads
+
+
+def list_trainable_tenants(db, min_customers: int = MIN_TRAINING_CUSTOMERS):
+    """Etiketli müşteri sayısı yeterli aktif tenant'lar (büyükten küçüğe)"""
+    rows = db.query(
+        Customer.tenant_id, func.count(Customer.id)
+    ).join(
+        Tenant, Tenant.id == Customer.tenant_id
+    ).filter(
+        Customer.churned.isnot(None),
+        Tenant.is_active.isnot(False)
+    ).group_by(
+        Customer.tenant_id
+    ).having(
+        func.count(Customer.id) >= min_customers
+    ).all()
+
+    # Büyük tenant'lar önce: uzun işler başta dağıtılınca toplam süre kısalır
+    return sorted(((tenant_id, count) for tenant_id, count in rows), key=lambda r: r[1], reverse=True)
+
+
+def _peak_memory_mb() -> float:
+    """Process'in tepe bellek kullanımı (MB; Linux'ta ru_maxrss KB cinsinden)"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def train_tenant_job(tenant_id: int, num_threads: int, incremental: bool = False) -> dict:
+    """Tek tenant eğitimi (worker process'te çalışır)"""
+    from train import train_churn_model
+
+    started = time.perf_counter()
+    result = train_churn_model(tenant_id, num_threads=num_threads, incremental=incremental)
+    metrics = result.get('metrics') or {}
+    return {
+        'tenant_id': tenant_id,
+        'success': result['success'],
+        'mode': result.get('mode'),
+        'model_id': result.get('model_id'),
+        'error': result.get('error'),
+        'rows': result.get('training_rows'),
+        'auc': metrics.get('auc'),
+        'duration_seconds': round(time.perf_counter() - started, 3),
+        'peak_memory_mb': _peak_memory_mb(),
+        'num_threads': num_threads,
+    }
+
+
+def _default_executor(workers: int):
+    # spawn: SQLAlchemy bağlantı havuzları fork ile paylaşılmasın;
+    # max_tasks_per_child=1: tepe bellek ölçümü tenant başına olsun
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=1,
+    )
+
+
+def run_fleet_training(max_workers: int = None, threads_per_job: int = None,
+                       min_customers: int = MIN_TRAINING_CUSTOMERS,
+                       incremental: bool = False, job=train_tenant_job,
+                       executor_factory=_default_executor, save_report: bool = True) -> dict:
+    """Tüm uygun tenant'ların churn modellerini paralel eğit"""
+    db = SessionLocal()
+    try:
+        tenants = list_trainable_tenants(db, min_customers)
+    finally:
+        db.close()
+
+    workers, threads = plan_resources(os.cpu_count() or 1, max_workers, threads_per_job)
+    logger.info(f"Fleet eğitimi: {len(tenants)} tenant, {workers} process x {threads} thread")
+
+    started_at = datetime.now()
+    started = time.perf_counter()
+    results = []
+    if tenants:
+        with executor_factory(workers) as executor:
+            futures = {
+                executor.submit(job, tenant_id, threads, incremental): tenant_id
+                for tenant_id, _ in tenants
+            }
+            for future in as_completed(futures):
+                tenant_id = futures[future]
+                try:
+                    job_result = future.result()
+                except Exception as e:
+                    job_result = {'tenant_id': tenant_id, 'success': False, 'error': str(e)}
+                results.append(job_result)
+                logger.info(
+                    f"Tenant {tenant_id} eğitimi {'tamamlandı' if job_result['success'] else 'başarısız'} "
+                    f"({job_result.get('duration_seconds')} sn, {job_result.get('rows')} satır, "
+                    f"{job_result.get('peak_memory_mb')} MB)"
+                )
+
+    report = {
+        'started_at': started_at.isoformat(),
+        'duration_seconds': round(time.perf_counter() - started, 3),
+        'workers': workers,
+        'threads_per_job': threads,
+        'incremental': incremental,
+        'tenant_count': len(tenants),
+        'succeeded': sum(1 for r in results if r['success']),
+        'failed': sum(1 for r in results if not r['success']),
+        'results': sorted(results, key=lambda r: r['tenant_id']),
+    }
+
+    if save_report:
+        os.makedirs(TRAINING_REPORT_DIR, exist_ok=True)
+        report_path = os.path.join(TRAINING_REPORT_DIR, f"fleet_{started_at:%Y%m%d_%H%M%S}.json")
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+        report['report_path'] = report_path
+
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Tüm tenant'lar için churn modeli eğitimi")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads-per-job", type=int, default=None)
+    parser.add_argument("--min-customers", type=int, default=MIN_TRAINING_CUSTOMERS)
+    parser.add_argument("--incremental", action="store_true", help="Değişen müşterilerle önceki modeli güncelle")
+    args = parser.parse_args()
+
+    summary = run_fleet_training(args.workers, args.threads_per_job, args.min_customers, args.incremental)
+    print(json.dumps({k: v for k, v in summary.items() if k != 'results'}, indent=2))
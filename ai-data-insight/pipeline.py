@@ -0,0 +1,188 @@
+"""
+Bildirimsel pipeline DAG yürütücüsü
+Her aşama girdi ve çıktılarını isimle bildirir; yürütücü bağımlılıkları bu
+isimlerden çıkarır ve girdileri hazır olan aşamaları thread havuzunda
+eşzamanlı çalıştırır. Her aşamanın kendi zaman aşımı vardır. Zorunlu
+olmayan bir aşama hata verir ya da zaman aşımına uğrarsa çıktıları
+varsayılan değerleri alır ve diğer aşamalar etkilenmez. Thread
+durdurulamadığından zaman aşımına uğrayan ya da çalıştırma bittiğinde hâlâ
+süren aşamaların iptal olayı işaretlenir; iptal edilebilir aşamalar bunu
+artefakt yayınlamadan önce kontrol eder. Yeni bir analiz,
+pipeline'ı uzatmadan bağımsız bir aşama olarak eklenebilir. Başlangıç
+değerleri (örn. checkpoint'ten) bir aşamanın çıktılarını karşılıyorsa o
+aşama çalıştırılmaz.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from config import PIPELINE_MAX_WORKERS, PIPELINE_STAGE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineError(RuntimeError):
+    """Zorunlu bir aşama başarısız oldu"""
+
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"{stage} aşaması başarısız: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    """Pipeline aşaması: fonksiyon girdileri isimle alır, çıktıları sırayla döndürür"""
+
+    def __init__(self, name: str, func, inputs=(), outputs=(), timeout: float = None,
+                 required: bool = False, defaults: dict = None, cancellable: bool = False):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.timeout = timeout if timeout is not None else PIPELINE_STAGE_TIMEOUT
+        # Zorunlu aşamanın hatası tüm çalıştırmayı durdurur
+        self.required = required
+        # Hata/zaman aşımında çıktılara verilecek değerler (verilmeyenler None)
+        self.defaults = defaults or {}
+        # True ise fonksiyon cancelled=threading.Event alır (terk edilince işaretlenir)
+        self.cancellable = cancellable
+
+    def call(self, values: dict, cancelled: threading.Event = None) -> dict:
+        kwargs = {name: values[name] for name in self.inputs}
+        if self.cancellable:
+            kwargs["cancelled"] = cancelled if cancelled is not None else threading.Event()
+        result = self.func(**kwargs)
+        if len(self.outputs) == 0:
+            return {}
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        return dict(zip(self.outputs, result))
+
+
+class PipelineDAG:
+    """Aşamaları bağımlılık sırasına göre, bağımsız olanları eşzamanlı çalıştırır"""
+
+    def __init__(self, stages: list = None, max_workers: int = PIPELINE_MAX_WORKERS):
+        self.stages = {}
+        self.max_workers = max_workers
+        for stage in stages or []:
+            self.add(stage)
+
+    def add(self, stage: Stage) -> "PipelineDAG":
+        if stage.name in self.stages:
+            raise ValueError(f"Aşama iki kez tanımlandı: {stage.name}")
+        for other in self.stages.values():
+            shared = set(other.outputs) & set(stage.outputs)
+            if shared:
+                raise ValueError(f"{', '.join(shared)} çıktısı hem {other.name} hem {stage.name} aşamasında")
+        self.stages[stage.name] = stage
+        return self
+
+    def validate(self, initial=()):
+        """Her girdi bir aşamadan ya da başlangıç değerlerinden gelmeli; döngü olmamalı"""
+        produced = set(initial)
+        for stage in self.stages.values():
+            produced.update(stage.outputs)
+        for stage in self.stages.values():
+            missing = set(stage.inputs) - produced
+            if missing:
+                raise ValueError(f"{stage.name} aşamasının girdisi üretilmiyor: {', '.join(sorted(missing))}")
+
+        available, remaining = set(initial), dict(self.stages)
+        while remaining:
+            ready = [name for name, stage in remaining.items() if set(stage.inputs) <= available]
+            if not ready:
+                raise ValueError(f"Aşamalar arasında döngü var: {', '.join(sorted(remaining))}")
+            for name in ready:
+                available.update(remaining.pop(name).outputs)
+
+    def restored(self, initial=()) -> set:
+        """Başlangıç değerleriyle karşılanan, çalıştırılmayacak aşamalar"""
+        provided = set(initial)
+        skipped = {name for name, stage in self.stages.items()
+                   if stage.outputs and set(stage.outputs) <= provided}
+        # Çıktılarının bir kısmı verilmiş, kalanını da kimse kullanmıyorsa aşama gereksiz
+        changed = True
+        while changed:
+            changed = False
+            needed = set()
+            for name, stage in self.stages.items():
+                if name not in skipped:
+                    needed.update(stage.inputs)
+            for name, stage in self.stages.items():
+                if name in skipped or not set(stage.outputs) & provided:
+                    continue
+                if not (set(stage.outputs) - provided) & needed:
+                    skipped.add(name)
+                    changed = True
+        return skipped
+
+    def run(self, initial: dict = None) -> tuple:
+        """Aşamaları çalıştır; (değerler, aşama raporu) döndürür"""
+        values = dict(initial or {})
+        self.validate(values)
+        skipped = self.restored(values)
+        report = {name: {"status": "restored", "seconds": 0.0} for name in skipped}
+        pending = {name: stage for name, stage in self.stages.items() if name not in skipped}
+        running = {}
+        # Süre aşama havuzda beklerken değil, çalışmaya başlayınca işler
+        started_at = {}
+        # Aşama başına iptal olayı: terk edilen aşamanın sonradan yayın yapmaması için
+        cancelled = {name: threading.Event() for name in pending}
+
+        def call(stage: Stage, inputs: dict) -> dict:
+            started_at[stage.name] = time.monotonic()
+            return stage.call(inputs, cancelled[stage.name])
+
+        def started(stage: Stage) -> float:
+            return started_at.get(stage.name, time.monotonic())
+
+        def finish(stage: Stage, status: str, error: Exception = None):
+            report[stage.name] = {"status": status, "seconds": round(time.monotonic() - started(stage), 3)}
+            if error is not None:
+                report[stage.name]["error"] = str(error)
+                if stage.required:
+                    raise PipelineError(stage.name, error)
+                logger.warning(f"Pipeline aşaması {stage.name} {status}: {error}")
+                for name in stage.outputs:
+                    values[name] = stage.defaults.get(name)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline")
+        try:
+            while pending or running:
+                for name in [n for n, s in pending.items() if all(i in values for i in s.inputs)]:
+                    stage = pending.pop(name)
+                    running[executor.submit(call, stage, {i: values[i] for i in stage.inputs})] = stage
+                if not running:
+                    break
+
+                deadline = min(started(stage) + stage.timeout for stage in running.values())
+                done, _ = wait(running, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        outputs = future.result()
+                    except Exception as e:
+                        finish(stage, "failed", e)
+                        continue
+                    values.update(outputs)
+                    finish(stage, "completed")
+
+                now = time.monotonic()
+                for future, stage in list(running.items()):
+                    if now - started(stage) >= stage.timeout:
+                        # Thread durdurulamaz; sonucu yok sayılır, aşamaya iptal bildirilir
+                        running.pop(future)
+                        future.cancel()
+                        cancelled[stage.name].set()
+                        finish(stage, "timeout", TimeoutError(f"{stage.timeout:g} sn aşıldı"))
+        finally:
+            # Zaman aşımına uğrayan aşamalar çalıştırmayı bekletmez; zorunlu aşama hatasında
+            # hâlâ süren aşamalar da terk edilir
+            for stage in running.values():
+                cancelled[stage.name].set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        return values, report
@@ -13,6 +13,7 @@ import logging
 
 from database import SessionLocal
 from models import MLModel, Prediction, Customer
+from features import ChurnFeaturePipeline, feature_pipeline_path
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,7 @@ class ChurnPredictor:
         self.db = SessionLocal()
         self.model = None
         self.features = None
+        self.pipeline = None
         self.model_record = None
         
     def __del__(self):
@@ -46,7 +48,17 @@ class ChurnPredictor:
                 raise FileNotFoundError(f"Model dosyası bulunamadı: {self.model_record.model_path}")
             
             self.model = joblib.load(self.model_record.model_path)
+            
             self.features = self.model_record.features
+            
+            # Eğitimde fit edilen feature pipeline'ı (eski modellerde kolon isimlerinden)
+            pipeline_path = feature_pipeline_path(self.model_record.model_path)
+            if os.path.exists(pipeline_path):
+                self.pipeline = ChurnFeaturePipeline.load(pipeline_path)
+            else:
+                self.pipeline = ChurnFeaturePipeline.from_feature_names(self.features)
+            if self.pipeline.feature_names != list(self.features):
+                raise ValueError("Feature pipeline'ı model feature'larıyla eşleşmiyor")
             # Kaydedilen threshold'u metadata'dan al (feature_importance içine __threshold__ eklenmişti)
             self.threshold = 0.5
             try:
@@ -63,100 +75,61 @@ class ChurnPredictor:
             logger.error(f"Model yükleme hatası: {e}")
             raise
     
-    def prepare_features(self, customer_data):
-        """Müşteri verilerini model için hazırla"""
+    def prepare_features(self, customers):
+        """Müşteri kayıtlarını (dict veya dict listesi) model matrisine dönüştür"""
         try:
+            records = [customers] if isinstance(customers, dict) else list(customers)
+            
             # Input validation
             required_fields = ['age', 'gender', 'segment', 'subscription_length', 'last_login_date']
-            for field in required_fields:
-                if field not in customer_data:
-                    raise ValueError(f"Gerekli alan eksik: {field}")
-            
-            # DataFrame oluştur
-            df = pd.DataFrame([customer_data])
-            
-            # Feature engineering (train.py ile aynı işlemler)
-            df_processed = df.copy()
-            
-            # 1. Tarih feature'ları
-            df_processed['last_login_date'] = pd.to_datetime(df_processed['last_login_date'], utc=True)
-            current_date = datetime.now().replace(tzinfo=None)
-            df_processed['days_since_last_login'] = (current_date - df_processed['last_login_date'].dt.tz_localize(None)).dt.days
-            df_processed['days_since_last_login'] = df_processed['days_since_last_login'].fillna(365)
-            
-            # 2. Subscription length
-            df_processed['subscription_length'] = df_processed['subscription_length'].fillna(0)
-            
-            # 3. Demografik feature'lar
-            df_processed['age'] = df_processed['age'].fillna(df_processed['age'].median())
-            df_processed['gender'] = df_processed['gender'].fillna('Unknown')
-            df_processed['segment'] = df_processed['segment'].fillna('Unknown')
-            
-            # 4. İş feature'ları (varsayılan değerler)
-            df_processed['total_orders'] = customer_data.get('total_orders', 0)
-            df_processed['total_spent'] = customer_data.get('total_spent', 0.0)
-            df_processed['avg_order_value'] = customer_data.get('avg_order_value', 0.0)
-            
-            # 5. Categorical encoding (One-hot encoding)
-            categorical_cols = ['gender', 'segment']
-            for col in categorical_cols:
-                if col in df_processed.columns:
-                    dummies = pd.get_dummies(df_processed[col], prefix=col)
-                    df_processed = pd.concat([df_processed, dummies], axis=1)
-                    df_processed.drop(col, axis=1, inplace=True)
-            
-            # 6. Feature'ları model ile aynı sırada hazırla
-            feature_cols = [
-                'age', 'subscription_length', 'days_since_last_login',
-                'total_orders', 'total_spent', 'avg_order_value'
-            ]
-            
-            # Categorical dummy column'ları ekle
-            categorical_dummies = [col for col in df_processed.columns if any(cat in col for cat in ['gender_', 'segment_'])]
-            feature_cols.extend(categorical_dummies)
-            
-            # Model feature'ları ile eşleştir
-            X = pd.DataFrame(index=[0])
-            for feature in self.features:
-                if feature in df_processed.columns:
-                    X[feature] = df_processed[feature].iloc[0]
-                else:
-                    X[feature] = 0  # Eksik feature için 0
-            
-            # Feature'ları model ile aynı sırada düzenle
-            X = X[self.features]
+            for record in records:
+                for field in required_fields:
+                    if field not in record:
+                        raise ValueError(f"Gerekli alan eksik: {field}")
             
-            return X
+            # Eğitimdeki pipeline tüm batch'e tek seferde uygulanır
+            return self.pipeline.transform(pd.DataFrame.from_records(records))
             
         except Exception as e:
             logger.error(f"Feature hazırlama hatası: {e}")
             raise
     
+    def predict_proba(self, customers) -> np.ndarray:
+        """Bir veya birden çok müşteri için churn olasılıkları"""
+        # Model yüklü değilse yükle
+        if self.model is None:
+            self.load_model()
+        
+        X = self.prepare_features(customers)
+        # ndarray ile çağrı DataFrame doğrulama maliyetini atlar
+        return self.model.predict(X)
+    
+    def _result(self, churn_probability):
+        # Confidence hesapla (basit bir yaklaşım)
+        confidence = min(max(abs(churn_probability - 0.5) * 2, 0.1), 0.9)
+        thr = getattr(self, 'threshold', 0.5)
+        return {
+            'churn_probability': float(churn_probability),
+            'confidence': float(confidence),
+            'prediction': 'High Risk' if churn_probability >= max(thr, 0.7) else ('Medium Risk' if churn_probability >= thr else 'Low Risk'),
+            'threshold': float(thr)
+        }
+    
     def predict_churn(self, customer_data):
         """Churn tahmini yap"""
         try:
-            # Model yüklü değilse yükle
-            if self.model is None:
-                self.load_model()
-            
-            # Feature'ları hazırla
-            X = self.prepare_features(customer_data)
-            
-            # Tahmin yap
-            churn_probability = self.model.predict(X)[0]
-            
-            # Confidence hesapla (basit bir yaklaşım)
-            confidence = min(max(abs(churn_probability - 0.5) * 2, 0.1), 0.9)
-            
+            churn_probability = self.predict_proba(customer_data)[0]
             logger.info(f"Churn tahmini tamamlandı. Probability: {churn_probability:.3f}")
+            return self._result(churn_probability)
             
-            thr = getattr(self, 'threshold', 0.5)
-            return {
-                'churn_probability': float(churn_probability),
-                'confidence': float(confidence),
-                'prediction': 'High Risk' if churn_probability >= max(thr, 0.7) else ('Medium Risk' if churn_probability >= thr else 'Low Risk'),
-                'threshold': float(thr)
-            }
+        except Exception as e:
+            logger.error(f"Churn tahmin hatası: {e}")
+            raise
+    
+    def predict_batch(self, customers):
+        """Birden çok müşteri için tek matris üzerinden churn tahmini"""
+        try:
+            return [self._result(p) for p in self.predict_proba(customers)]
             
         except Exception as e:
             logger.error(f"Churn tahmin hatası: {e}")
@@ -3,50 +3,148 @@ import numpy as np
 import logging
 from anomaly import detect_anomalies, detect_anomalies_customer
 from forecast import forecast_sales, moving_average_forecast, naive_forecast
+from serialization import describe_to_dict
+from events import is_event_log, analyze_event_upload
+from aggregates import AggregateCube
+from dates import column_date_format, date_format_key, infer_date_format, parse_with_format
+from sketches import approximate_describe, sketch_frame
+from readers import read_csv
+from pipeline import PipelineDAG, Stage
+from checkpoints import load_checkpoint, save_checkpoint
+from config import SUMMARY_SKETCH_MIN_ROWS, SUMMARY_SKETCH_CHUNK_SIZE
 
 logger = logging.getLogger(__name__)
 
+# Şema profilinden read_csv'ye verilen dtype'lar (int/bool/datetime parser'a bırakılır)
+PROFILE_READ_DTYPES = ("float64", "float32", "str", "string", "object", "category")
+
+# Checkpoint'in geçerli olması için verilen profille aynı olması gereken alanlar
+CHECKPOINT_PROFILE_KEYS = ("columns", "date_col", "qty_col", "event_log", "date_formats", "fill_values")
+
+
+def _json_value(value):
+    """numpy/pandas skalerini JSON uyumlu python değerine çevir"""
+    if value is None or pd.isna(value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
 class Preprocessor:
-    def __init__(self, filepath: str):
+    def __init__(self, filepath: str, profile: dict = None, approximate: bool = None,
+                 checkpoint: str = None, tenant_id: int = None):
         self.filepath = filepath
+        # Tarih formatı önbelleğinin kapsamı (aynı kolon adı tenant'lar arasında paylaşılmaz)
+        self.tenant_id = tenant_id
+        # Checkpoint klasörü (None: checkpoint kullanılmaz)
+        self.checkpoint = checkpoint
+        # None: satır sayısına göre otomatik (SUMMARY_SKETCH_MIN_ROWS)
+        self.approximate = approximate
         self.df = None
+        # Aynı başlık için önceden tespit edilmiş şema profili (varsa tespit atlanır)
+        self.profile = profile
+        self.profile_reused = False
+        self.dtypes = {}
+        self.date_formats = {}
+        self.fill_values = {}
+        self.event_analysis = None
+        self.cube = None
+        # Son çalıştırmanın aşama çıktıları ve durum raporu
+        self.values = {}
+        self.stage_report = {}
 
     def load(self):
         try:
-            self.df = pd.read_csv(self.filepath)
+            if self.profile:
+                self.df = self._load_typed(self.profile)
+            if self.df is None:
+                self.df = read_csv(self.filepath)
+            self.dtypes = {col: str(dtype) for col, dtype in self.df.dtypes.items()}
             logger.info(f"Dosya yüklendi: {self.filepath} | {self.df.shape[0]} satır, {self.df.shape[1]} kolon")
         except Exception as e:
             logger.error(f"Dosya yükleme hatası: {e}")
             raise
 
-    def clean_missing(self):
+    def _load_typed(self, profile: dict):
+        """Profildeki dtype'larla oku; profil dosyaya uymuyorsa None (yeniden tespit)"""
+        date_formats = profile.get("date_formats", {})
+        dtypes = {
+            col: dtype for col, dtype in profile.get("dtypes", {}).items()
+            if dtype in PROFILE_READ_DTYPES and col not in date_formats
+        }
+        try:
+            df = read_csv(self.filepath, dtype=dtypes)
+        except (ValueError, TypeError) as e:
+            logger.info(f"Şema profili dosyaya uymadı, kolonlar yeniden tespit edilecek: {e}")
+            return None
+        if list(df.columns) != profile.get("columns"):
+            return None
+        self.profile_reused = True
+        return df
+
+    def clean_missing(self, fill_values: dict = None):
         if self.df is None:
             raise ValueError("DataFrame yüklenmedi.")
         
+        # Profilden gelen doldurma değerleri varsa yeniden hesaplanmaz
+        if fill_values is not None:
+            fills = {col: value for col, value in fill_values.items()
+                     if value is not None and col in self.df.columns}
+            if fills:
+                self.df = self.df.fillna(fills)
+            self.fill_values = dict(fill_values)
+            return
+        
         # Basit strateji: sayısal kolonlarda ortalama, kategoriklerde en sık değer
         for col in self.df.columns:
             if self.df[col].dtype in [np.float64, np.int64]:
-                self.df[col] = self.df[col].fillna(self.df[col].mean())
+                fill = self.df[col].mean()
+                self.df[col] = self.df[col].fillna(fill)
             else:
                 mode_val = self.df[col].mode()
-                if len(mode_val) > 0:
-                    self.df[col] = self.df[col].fillna(mode_val[0])
+                fill = mode_val[0] if len(mode_val) > 0 else None
+                if fill is not None:
+                    self.df[col] = self.df[col].fillna(fill)
+            self.fill_values[col] = _json_value(fill)
 
-    def parse_dates(self):
+    def parse_dates(self, date_formats: dict = None):
         if self.df is None:
             raise ValueError("DataFrame yüklenmedi.")
         
+        # Profildeki formatlarla doğrudan parse (format çıkarımı yapılmaz)
+        if date_formats is not None:
+            for col, fmt in date_formats.items():
+                if col in self.df.columns:
+                    self.df[col] = parse_with_format(self.df[col], fmt)
+            self.date_formats = dict(date_formats)
+            return
+        
         for col in self.df.columns:
             if "date" in col.lower() or "tarih" in col.lower():
                 try:
-                    self.df[col] = pd.to_datetime(self.df[col], errors="coerce")
+                    fmt = self._guess_date_format(self.df[col])
+                    # Format çıkarılamazsa serbest parse
+                    if fmt:
+                        parsed = parse_with_format(self.df[col], fmt)
+                    else:
+                        parsed = pd.to_datetime(self.df[col], errors="coerce")
+                    self.df[col] = parsed
+                    if fmt:
+                        self.date_formats[col] = fmt
                 except Exception as e:
                     logger.warning(f"{col} tarih parse edilemedi: {e}")
 
+    def _guess_date_format(self, values: pd.Series):
+        """Örneklemden çıkarılıp doğrulanan tarih formatı (tenant + başlık + kolon başına önbellekli)"""
+        return column_date_format(values, date_format_key(self.tenant_id, self.df.columns, values.name))
+
     def enforce_numeric(self):
         if self.df is None:
             raise ValueError("DataFrame yüklenmedi.")
         
+        # Profilli okumada kolon tipleri zaten belli
+        if self.profile_reused:
+            return
+        
         for col in self.df.columns:
             if self.df[col].dtype == object:
                 try:
@@ -54,10 +152,15 @@ class Preprocessor:
                 except:
                     pass  # string kolonlar bırakılacak
 
-    def summary(self):
+    def summary(self, approximate: bool = None):
         if self.df is None:
             raise ValueError("DataFrame yüklenmedi.")
         
+        if approximate is None:
+            approximate = len(self.df) >= SUMMARY_SKETCH_MIN_ROWS
+        if approximate:
+            # Sketch'lerle yaklaşık özet; hata sınırları ayrı satırlarda
+            return approximate_describe(sketch_frame(self.df, SUMMARY_SKETCH_CHUNK_SIZE))
         return self.df.describe(include="all")
 
     def _find_date_column(self):
@@ -86,11 +189,8 @@ class Preprocessor:
                 return col
             # String kolonlarda tarih formatını kontrol et
             if self.df[col].dtype == 'object':
-                try:
-                    pd.to_datetime(self.df[col].dropna().head(10))
+                if infer_date_format(self.df[col].dropna().head(10)) is not None:
                     return col
-                except:
-                    pass
         
         return None
 
@@ -123,86 +223,181 @@ class Preprocessor:
         
         return None
 
-    def run(self):
-        try:
-            self.load()
-            self.clean_missing()
-            self.parse_dates()
-            self.enforce_numeric()
-            summary_stats = self.summary()
-            
-            # Anomali tespiti (e-ticaret verisi varsa)
-            anomaly_count = 0
-            date_col = None
-            qty_col = None
-            
+    def _reused(self):
+        """Yeniden kullanılan şema profili (yoksa None)"""
+        return self.profile if self.profile_reused else None
+
+    def _load_stage(self):
+        self.load()
+        profile = self._reused()
+        event_log = profile["event_log"] if profile else is_event_log(self.df.columns)
+        return self.df, event_log
+
+    def _event_stage(self, raw, event_log):
+        # Event log: oturum/funnel analizi eksik değer doldurmadan önce ham veriyle yapılır
+        if not event_log:
+            return None
+        self.event_analysis = analyze_event_upload(self.filepath, raw)
+        logger.info(f"Event log analizi: {self.event_analysis['sessions']} oturum")
+        return self.event_analysis
+
+    def _clean_stage(self, raw):
+        profile = self._reused()
+        # Temizlik kopya üzerinde; event analizi ham çerçeveyi aynı anda okuyabilir
+        self.df = raw.copy(deep=False)
+        self.clean_missing(profile["fill_values"] if profile else None)
+        self.parse_dates(profile["date_formats"] if profile else None)
+        self.enforce_numeric()
+        return self.df
+
+    def _roles_stage(self, clean, event_log):
+        profile = self._reused()
+        if profile:
+            # Aynı başlık daha önce görüldü: kolon rolleri profilden
+            date_col = profile["date_col"]
+            qty_col = profile["qty_col"]
+        else:
             # Kolon isimlerini akıllı tespit et
             date_col = self._find_date_column()
             qty_col = self._find_quantity_column()
             
-            logger.info(f"Tespit edilen kolonlar - Date: {date_col}, Quantity: {qty_col}")
-            
-            # Anomali tespiti (güvenli)
-            if date_col and qty_col:
-                try:
-                    # Veri temizleme
-                    self.df[qty_col] = pd.to_numeric(self.df[qty_col], errors="coerce").fillna(0)
-                    
-                    # Minimum veri kontrolü
-                    if len(self.df) < 10:
-                        logger.warning("Veri seti çok küçük, anomali tespiti atlanıyor")
-                        anomaly_count = 0
-                    else:
-                        anomalies, daily = detect_anomalies(self.df, date_col, qty_col)
-                        anomaly_count = len(anomalies)
-                        logger.info(f"Anomali tespiti: {anomaly_count} anomali bulundu")
-                except Exception as e:
-                    logger.warning(f"Anomali tespiti başarısız: {e}")
-                    anomaly_count = 0
-            else:
-                logger.info("Tarih veya miktar kolonu bulunamadı, anomali tespiti atlanıyor")
-                anomaly_count = 0
-            
-            # Forecast (güvenli)
-            forecast_values = []
-            if date_col and qty_col:
-                try:
-                    # Veri temizleme
-                    self.df[qty_col] = pd.to_numeric(self.df[qty_col], errors="coerce").fillna(0)
-                    
-                    # Minimum veri kontrolü
-                    if len(self.df) < 5:
-                        logger.warning("Veri seti çok küçük, forecast atlanıyor")
-                        forecast_values = []
-                    else:
-                        forecast_df, model = forecast_sales(self.df, date_col, qty_col)
-                        # NaN ve infinity değerlerini temizle
-                        forecast_values = forecast_df["forecast"].replace([np.inf, -np.inf], np.nan).fillna(0).tolist()
-                        logger.info(f"Forecast tamamlandı: {len(forecast_values)} günlük tahmin")
-                except Exception as e:
-                    logger.warning(f"Forecast başarısız: {e}")
-                    forecast_values = []
-            else:
-                logger.info("Tarih veya miktar kolonu bulunamadı, forecast atlanıyor")
-                forecast_values = []
+            # Event log'larda sayısal kolon (user id) miktar değildir
+            if event_log:
+                qty_col = None
             
-            # Summary stats'ı JSON uyumlu hale getir
-            summary_dict = summary_stats.to_dict()
-            for col in summary_dict:
-                for stat in summary_dict[col]:
-                    value = summary_dict[col][stat]
-                    if pd.isna(value):
-                        summary_dict[col][stat] = 0
-                    elif isinstance(value, (int, float)) and (np.isinf(value) or np.isnan(value)):
-                        summary_dict[col][stat] = 0
+            self.profile = {
+                "columns": list(self.dtypes),
+                "date_col": date_col,
+                "qty_col": qty_col,
+                "event_log": event_log,
+                "dtypes": self.dtypes,
+                "date_formats": self.date_formats,
+                "fill_values": self.fill_values,
+            }
+        
+        logger.info(f"Tespit edilen kolonlar - Date: {date_col}, Quantity: {qty_col}")
+        return date_col, qty_col
+
+    def _summary_stage(self, clean):
+        # Summary stats'ı JSON uyumlu hale getir (NaN/inf -> 0)
+        return describe_to_dict(self.summary(self.approximate))
+
+    def _aggregate_stage(self, clean, date_col, qty_col):
+        # Günlük/haftalık/aylık agregalar bir kez hesaplanır; anomali ve forecast buradan okur
+        if not (date_col and qty_col):
+            logger.info("Tarih veya miktar kolonu bulunamadı, anomali tespiti ve forecast atlanıyor")
+            return clean, None
+        frame = self._quantity_frame(clean, qty_col)
+        try:
+            self.cube = AggregateCube.build(frame, date_col, qty_col)
+        except Exception as e:
+            logger.warning(f"Aggregate cube oluşturulamadı: {e}")
+        return frame, self.cube
+
+    @staticmethod
+    def _quantity_frame(clean, qty_col):
+        # Özet aşaması temiz çerçeveyi okurken miktar kolonu kopyada düzeltilir
+        frame = clean.copy(deep=False)
+        frame[qty_col] = pd.to_numeric(frame[qty_col], errors="coerce").fillna(0)
+        return frame
+
+    def _checkpoint_stage(self, clean, cube, event_analysis, cancelled=None):
+        schema = {"profile": self.profile, "event_analysis": event_analysis}
+        save_checkpoint(self.checkpoint, self.filepath, clean, cube, schema, cancelled)
+        logger.info(f"Checkpoint kaydedildi: {self.checkpoint}")
+
+    def _restore(self) -> dict:
+        """Geçerli checkpoint'ten temizlik/rol/aggregate çıktıları (yoksa boş)"""
+        saved = load_checkpoint(self.checkpoint, self.filepath)
+        if saved is None:
+            return {}
+        profile = saved["schema"]["profile"]
+        # Profil (örn. override ile) değiştiyse kolon rolleri/temizlik farklı olur
+        if self.profile and any(self.profile.get(key) != profile.get(key) for key in CHECKPOINT_PROFILE_KEYS):
+            logger.info("Şema profili checkpoint'ten farklı, aşamalar yeniden çalışacak")
+            return {}
+
+        self.profile_reused = self.profile is not None
+        self.profile = profile
+        self.dtypes = profile["dtypes"]
+        self.date_formats = profile["date_formats"]
+        self.fill_values = profile["fill_values"]
+        self.event_analysis = saved["schema"]["event_analysis"]
+        self.cube = saved["cube"]
+        self.df = saved["frame"]
+        date_col, qty_col = profile["date_col"], profile["qty_col"]
+        logger.info(f"Checkpoint'ten devam ediliyor: {self.checkpoint} | {len(self.df)} satır")
+        return {
+            "clean": self.df,
+            "event_log": profile["event_log"],
+            "event_analysis": self.event_analysis,
+            "date_col": date_col,
+            "qty_col": qty_col,
+            "frame": self._quantity_frame(self.df, qty_col) if date_col and qty_col else self.df,
+            "cube": self.cube,
+        }
+
+    def _anomaly_stage(self, frame, cube, date_col, qty_col):
+        if not (date_col and qty_col):
+            return 0
+        # Minimum veri kontrolü
+        if len(frame) < 10:
+            logger.warning("Veri seti çok küçük, anomali tespiti atlanıyor")
+            return 0
+        anomalies, daily = detect_anomalies(frame, date_col, qty_col, cube=cube)
+        logger.info(f"Anomali tespiti: {len(anomalies)} anomali bulundu")
+        return len(anomalies)
+
+    def _forecast_stage(self, frame, cube, date_col, qty_col):
+        if not (date_col and qty_col):
+            return []
+        # Minimum veri kontrolü
+        if len(frame) < 5:
+            logger.warning("Veri seti çok küçük, forecast atlanıyor")
+            return []
+        forecast_df, model = forecast_sales(frame, date_col, qty_col, cube=cube)
+        # NaN ve infinity değerlerini temizle
+        forecast_values = forecast_df["forecast"].replace([np.inf, -np.inf], np.nan).fillna(0).tolist()
+        logger.info(f"Forecast tamamlandı: {len(forecast_values)} günlük tahmin")
+        return forecast_values
+
+    def stages(self) -> list:
+        """Preprocessing aşamaları; anomali ve forecast sadece temiz çerçeveye bağlı, eşzamanlı çalışır"""
+        return [
+            Stage("load", self._load_stage, outputs=("raw", "event_log"), required=True),
+            Stage("event_analysis", self._event_stage, inputs=("raw", "event_log"), outputs=("event_analysis",)),
+            Stage("clean", self._clean_stage, inputs=("raw",), outputs=("clean",), required=True),
+            Stage("roles", self._roles_stage, inputs=("clean", "event_log"),
+                  outputs=("date_col", "qty_col"), required=True),
+            Stage("summary", self._summary_stage, inputs=("clean",), outputs=("summary",), required=True),
+            Stage("aggregate", self._aggregate_stage, inputs=("clean", "date_col", "qty_col"),
+                  outputs=("frame", "cube"), required=True),
+            Stage("anomaly", self._anomaly_stage, inputs=("frame", "cube", "date_col", "qty_col"),
+                  outputs=("anomaly_count",), defaults={"anomaly_count": 0}),
+            Stage("forecast", self._forecast_stage, inputs=("frame", "cube", "date_col", "qty_col"),
+                  outputs=("forecast",), defaults={"forecast": []}),
+        ]
+
+    def run(self, extra_stages: list = None):
+        """Aşamaları DAG olarak çalıştır; extra_stages aynı çalıştırmaya eklenir (örn. talep tahmini).
+        Geçerli checkpoint varsa okuma/temizlik/rol/aggregate aşamaları atlanır."""
+        try:
+            stages = self.stages() + list(extra_stages or [])
+            initial = self._restore() if self.checkpoint else {}
+            if self.checkpoint and not initial:
+                # Anomali/forecast ile eşzamanlı; sonraki çalıştırmalar buradan devam eder
+                stages.append(Stage("checkpoint", self._checkpoint_stage,
+                                    inputs=("clean", "cube", "event_analysis"), cancellable=True))
+            dag = PipelineDAG(stages)
+            self.values, self.stage_report = dag.run(initial)
+            self.df = self.values["frame"]
             
             logger.info("Preprocessing tamamlandı.")
-            return self.df, summary_dict, anomaly_count, forecast_values
+            return self.df, self.values["summary"], self.values["anomaly_count"], self.values["forecast"]
         except Exception as e:
             logger.error(f"Preprocessing hatası: {e}")
             raise
 
-
 if __name__ == "__main__":
     pre = Preprocessor("sample_orders.csv")
     df, summary = pre.run()
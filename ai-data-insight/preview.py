@@ -0,0 +1,116 @@
+"""
+Upload sırasında önizleme analizi
+Dosya parça parça diske yazılırken satırlardan reservoir örneklem
+(Algorithm L: atlama miktarı rastgele seçilir, her satır için rastgele
+sayı üretilmez) tutulur. Upload biter bitmez örneklemden şema, özet
+istatistikler, top SKU'lar ve kaba anomali/forecast üretilir; tam analiz
+bittiğinde aynı sonuç kaydı kesin sonuçla değiştirilir.
+"""
+
+import io
+import logging
+import math
+import random
+
+import numpy as np
+import pandas as pd
+
+from aggregates import AggregateCube
+from anomaly import detect_anomalies
+from dates import parse_dates
+from readers import detect_bytes_encoding
+from forecast import forecast_sales
+from serialization import describe_to_dict
+
+logger = logging.getLogger(__name__)
+
+
+class ReservoirSampler:
+    """Akan byte'lardan (CSV) sabit boyutlu düzgün satır örneklemi"""
+
+    def __init__(self, size: int, seed: int = None):
+        self.size = size
+        self.header = None
+        self.rows = []
+        self.seen = 0
+        self._tail = b""
+        self._rng = random.Random(seed)
+        self._w = 1.0
+        self._next = 0
+        self._advance()
+        # İlk size satır doğrudan alınır; sonraki değiştirme en az size'dan başlar
+        self._next += size - 1
+
+    def _advance(self):
+        """Bir sonraki değiştirilecek satırın sırası (Algorithm L)"""
+        self._w *= math.exp(math.log(self._rng.random()) / self.size)
+        self._next += int(math.floor(math.log(self._rng.random()) / math.log(1 - self._w))) + 1
+
+    def feed(self, data: bytes):
+        lines = (self._tail + data).split(b"\n")
+        self._tail = lines.pop()
+        if self.header is None and lines:
+            self.header = lines.pop(0)
+        self._add(lines)
+
+    def close(self):
+        """Son satırı (sonunda newline yoksa) örnekleme kat"""
+        if self._tail.strip():
+            if self.header is None:
+                self.header = self._tail
+            else:
+                self._add([self._tail])
+        self._tail = b""
+
+    def _add(self, lines: list):
+        start, count = self.seen, len(lines)
+        if len(self.rows) < self.size:
+            self.rows.extend(lines[:self.size - len(self.rows)])
+        while self._next < start + count:
+            self.rows[self._rng.randrange(self.size)] = lines[self._next - start]
+            self._advance()
+        self.seen += count
+
+    def frame(self) -> pd.DataFrame:
+        """Örneklemi DataFrame olarak oku"""
+        if self.header is None:
+            return pd.DataFrame()
+        data = b"\n".join([self.header] + self.rows)
+        return pd.read_csv(io.BytesIO(data), on_bad_lines="skip", encoding=detect_bytes_encoding(data))
+
+
+def build_preview(sample: pd.DataFrame, total_rows: int):
+    """Örneklemden önizleme özeti ve içgörüleri (ölçekli, yaklaşık)"""
+    scale = total_rows / len(sample) if len(sample) else 1.0
+    summary = {
+        "rows": total_rows,
+        "sample_rows": len(sample),
+        "columns": list(sample.columns),
+        "schema": {col: str(dtype) for col, dtype in sample.dtypes.items()},
+        "last_order_date": str(sample["order_date"].max()) if "order_date" in sample.columns else None,
+    }
+
+    insights = {"scale": scale}
+    if len(sample.columns):
+        insights["approximate_stats"] = describe_to_dict(sample.describe(include="all"))
+
+    if "sku" in sample.columns and "quantity" in sample.columns:
+        quantity = pd.to_numeric(sample["quantity"], errors="coerce").fillna(0) * scale
+        top_skus = quantity.groupby(sample["sku"]).sum().sort_values(ascending=False).head(5)
+        insights["top_skus"] = top_skus.to_dict()
+
+    if "order_date" in sample.columns and "quantity" in sample.columns and len(sample) >= 10:
+        try:
+            scaled = pd.DataFrame({
+                "order_date": parse_dates(sample["order_date"]),
+                "quantity": pd.to_numeric(sample["quantity"], errors="coerce").fillna(0) * scale,
+            })
+            cube = AggregateCube.build(scaled, dimensions=())
+            anomalies, _ = detect_anomalies(None, cube=cube)
+            forecast_df, _ = forecast_sales(None, cube=cube)
+            insights["anomaly_days"] = [str(day.date()) for day in anomalies["order_date"]]
+            insights["forecast"] = forecast_df["forecast"].replace([np.inf, -np.inf], np.nan).fillna(0).tolist()
+        except Exception as e:
+            logger.warning(f"Önizleme anomali/forecast başarısız: {e}")
+
+    return summary, insights
@@ -0,0 +1,137 @@
+"""
+Upload pipeline ilerleme olayları
+Process içi pub/sub: pipeline her durum değişikliğinde tek bir olay yayınlar,
+SSE endpoint'ine bağlı istemciler bu olayları DB'ye gitmeden alır.
+
+Not: Yayın process içidir; upload'u işleyen worker ile SSE bağlantısının
+aynı process'te olması gerekir (tek worker ya da sticky session).
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Pipeline aşamalarının yaklaşık ilerleme yüzdeleri
+STAGE_PROGRESS = {
+    "started": 0,
+    "uploaded": 0,
+    "processing": 10,
+    "preprocessing_completed": 60,
+    "prediction_completed": 90,
+    "prediction_failed": 90,
+    "completed": 100,
+    "failed": 100,
+}
+
+TERMINAL_STATUSES = {"completed", "failed"}
+
+# Abone başına bekleyen en fazla olay; yavaş istemcide en eskisi düşer
+SUBSCRIBER_QUEUE_SIZE = 100
+# Son olayı saklanan en fazla upload sayısı
+LAST_EVENT_CACHE_SIZE = 1000
+
+
+def stage_progress(stage_status: str) -> int:
+    """Aşama durumunun ilerleme yüzdesi"""
+    return STAGE_PROGRESS.get(stage_status, 0)
+
+
+def is_terminal(event: dict) -> bool:
+    """Olay pipeline'ın bittiğini mi gösteriyor?"""
+    return event.get("status") in TERMINAL_STATUSES
+
+
+def format_sse(event: dict) -> str:
+    """Olayı Server-Sent Events formatına çevir"""
+    return f"event: progress\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+class ProgressBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # upload_id -> {(loop, queue), ...}
+        self._subscribers = defaultdict(set)
+        self._last_events = OrderedDict()
+
+    def subscribe(self, upload_id: int) -> asyncio.Queue:
+        """Çalışan event loop'a bağlı bir olay kuyruğu ile abone ol"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[upload_id].add((loop, queue))
+        return queue
+
+    def unsubscribe(self, upload_id: int, queue: asyncio.Queue):
+        """Aboneliği kaldır"""
+        with self._lock:
+            subscribers = self._subscribers.get(upload_id)
+            if not subscribers:
+                return
+            subscribers.difference_update({s for s in subscribers if s[1] is queue})
+            if not subscribers:
+                del self._subscribers[upload_id]
+
+    def last_event(self, upload_id: int):
+        """Upload için yayınlanmış son olay (yoksa None)"""
+        with self._lock:
+            return self._last_events.get(upload_id)
+
+    def subscriber_count(self, upload_id: int) -> int:
+        with self._lock:
+            return len(self._subscribers.get(upload_id, ()))
+
+    def publish(self, upload_id: int, event: dict):
+        """Olayı yayınla - herhangi bir thread'den çağrılabilir"""
+        with self._lock:
+            self._last_events[upload_id] = event
+            self._last_events.move_to_end(upload_id)
+            while len(self._last_events) > LAST_EVENT_CACHE_SIZE:
+                self._last_events.popitem(last=False)
+            subscribers = list(self._subscribers.get(upload_id, ()))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # Event loop kapanmış; abonelik artık geçersiz
+                self.unsubscribe(upload_id, queue)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: dict):
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(event)
+
+
+broker = ProgressBroker()
+
+
+def build_event(upload_id: int, stage_status: str, message=None, upload_status=None) -> dict:
+    """Pipeline durumundan ilerleme olayı oluştur"""
+    return {
+        "upload_id": upload_id,
+        "status": stage_status,
+        "upload_status": upload_status,
+        "message": message,
+        "progress": stage_progress(stage_status),
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+def publish_history(history, upload_status=None):
+    """Commit edilmiş PipelineHistory durumunu abonelere yayınla"""
+    try:
+        broker.publish(
+            history.upload_id,
+            build_event(history.upload_id, history.status, history.message, upload_status)
+        )
+    except Exception as e:
+        logger.warning(f"İlerleme olayı yayınlanamadı: {e}")
@@ -0,0 +1,243 @@
+"""
+CSV okuma katmanı
+Upload'lar tek giriş noktasından okunur; arka uç deployment başına config ile
+seçilir: pandas C engine (varsayılan) ya da pyarrow'un çok thread'li CSV
+okuyucusu (kurulu değilse pandas'a düşülür). Arrow tablosu varsayılan
+olarak pandas'ın kendi dtype'larına çevrilir; iki arka uç da aynı tipte
+çerçeve döndürür. Dosya kodlaması baştaki örneklemden
+tespit edilir; UTF-8 değilse Türkçe tenant dosyaları için cp1254 /
+ISO-8859-9 kullanılır. Sıkıştırılmış dosyalar (.csv.gz, .csv.zst, .zip)
+diske açılmadan akış halinde okunur.
+"""
+
+import codecs
+import gzip
+import logging
+import zipfile
+import zlib
+
+import pandas as pd
+
+from config import (
+    CSV_READER_BACKEND,
+    CSV_READER_THREADS,
+    CSV_ARROW_DTYPES,
+    CSV_ENCODING_SAMPLE_BYTES,
+    CSV_FALLBACK_ENCODINGS,
+)
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:  # pragma: no cover - pyarrow opsiyonel
+    pa = None
+    pa_csv = None
+
+# Kodlaması yanlış tespit edilen dosyada okuyucuların verdiği hatalar (arrow: ArrowInvalid)
+DECODE_ERRORS = (UnicodeDecodeError,) + ((pa.ArrowInvalid,) if pa is not None else ())
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard opsiyonel
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+if pa is not None and CSV_READER_THREADS > 0:
+    pa.set_cpu_count(CSV_READER_THREADS)
+
+# pandas dtype adı -> arrow tipi (profildeki dtype'lar arrow okuyucusuna bu şekilde verilir)
+ARROW_TYPES = {
+    "float64": "float64",
+    "float32": "float32",
+    "str": "string",
+    "string": "string",
+    "object": "string",
+}
+
+
+# Kabul edilen dosya uzantısı -> sıkıştırma
+UPLOAD_SUFFIXES = {".csv": None, ".csv.gz": "gzip", ".csv.zst": "zstd", ".zip": "zip"}
+
+
+def compression_of(filename: str, strict: bool = True):
+    """Dosya adından sıkıştırma türü (düz CSV için None); strict ise desteklenmeyen uzantıda ValueError"""
+    name = filename.lower()
+    for suffix, compression in UPLOAD_SUFFIXES.items():
+        if name.endswith(suffix):
+            if compression == "zstd" and zstandard is None:
+                raise ValueError("zstandard kurulu değil, .csv.zst dosyaları okunamıyor")
+            return compression
+    if strict:
+        raise ValueError(f"Desteklenmeyen dosya türü: {filename} ({', '.join(UPLOAD_SUFFIXES)})")
+    return None
+
+
+def _zip_member(archive: zipfile.ZipFile) -> str:
+    members = [info.filename for info in archive.infolist()
+               if not info.is_dir() and info.filename.lower().endswith(".csv")]
+    if len(members) != 1:
+        raise ValueError("Zip arşivinde tek bir CSV dosyası olmalı")
+    return members[0]
+
+
+def _open_zip(path: str):
+    """Zip içindeki tek CSV'yi akış olarak aç"""
+    with zipfile.ZipFile(path) as archive:
+        # Arşiv kapansa da alttaki dosya açık üye kapanana kadar açık kalır
+        return archive.open(_zip_member(archive))
+
+
+def open_stream(path: str):
+    """Dosyayı (gerekirse açarak) ikili akış olarak aç; içerik diske açılmaz"""
+    compression = compression_of(path, strict=False)
+    if compression == "gzip":
+        return gzip.open(path, "rb")
+    if compression == "zstd":
+        return zstandard.open(path, "rb")
+    if compression == "zip":
+        return _open_zip(path)
+    return open(path, "rb")
+
+
+class StreamDecompressor:
+    """Parça parça gelen sıkıştırılmış baytları açar (gzip çok üyeli, zstd çok çerçeveli)"""
+
+    def __init__(self, compression: str):
+        self.compression = compression
+        self._decoder = self._new()
+
+    def _new(self):
+        if self.compression == "gzip":
+            return zlib.decompressobj(zlib.MAX_WBITS | 16)
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        out = []
+        while data:
+            out.append(self._decoder.decompress(data))
+            if not self._decoder.eof:
+                break
+            # Üye/çerçeve bitti; kalan baytlar yeni üyeye ait
+            data = self._decoder.unused_data
+            self._decoder = self._new()
+        return b"".join(out)
+
+
+def detect_bytes_encoding(head: bytes) -> str:
+    """Bayt örnekleminin kodlaması: BOM / UTF-8, değilse sıradaki yedek kodlama"""
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # Örneklem çok baytlı bir karakterin ortasında bitebilir
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    for encoding in CSV_FALLBACK_ENCODINGS:
+        try:
+            head.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "iso-8859-9"
+
+
+def detect_encoding(path: str, sample_bytes: int = CSV_ENCODING_SAMPLE_BYTES) -> str:
+    """Dosyanın (açılmış) baştaki örneklemden tespit edilen kodlaması"""
+    with open_stream(path) as f:
+        return detect_bytes_encoding(f.read(sample_bytes))
+
+
+def _read_pandas(path, encoding: str, dtype: dict = None, usecols: list = None) -> pd.DataFrame:
+    return pd.read_csv(path, encoding=encoding, dtype=dtype, usecols=usecols)
+
+
+def _arrow_type(dtype: str):
+    if dtype == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    name = ARROW_TYPES.get(dtype)
+    return getattr(pa, name)() if name else None
+
+
+def _read_arrow(path, encoding: str, dtype: dict = None, usecols: list = None) -> pd.DataFrame:
+    column_types = {}
+    for col, name in (dtype or {}).items():
+        arrow_type = _arrow_type(name)
+        if arrow_type is None:
+            raise TypeError(f"Arrow okuyucusu bu dtype'ı desteklemiyor: {name}")
+        column_types[col] = arrow_type
+
+    table = pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(use_threads=True, encoding=encoding.replace("-sig", "")),
+        # Boş hücreler pandas'taki gibi eksik değer olur
+        convert_options=pa_csv.ConvertOptions(
+            column_types=column_types, include_columns=usecols, strings_can_be_null=True
+        ),
+    )
+    # pandas okuyucusu gibi tarih/saat kolonları metin kalır; parse dates.py'de profil formatıyla yapılır
+    for i, field in enumerate(table.schema):
+        if pa.types.is_binary(field.type):
+            # Arrow çözülemeyen metni hata vermeden binary okur; yedek kodlamaya düşülmesi için hata
+            raise pa.ArrowInvalid(f"{field.name} kolonu {encoding} ile çözülemedi")
+        if field.name not in column_types and pa.types.is_temporal(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+    if CSV_ARROW_DTYPES:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+# Arka uç adı -> okuyucu(dosya yolu veya ikili akış, encoding, dtype, usecols)
+READERS = {
+    "pandas": _read_pandas,
+    "pyarrow": _read_arrow,
+}
+
+
+def register_reader(name: str, reader):
+    """Yeni okuma arka ucu ekle"""
+    READERS[name] = reader
+
+
+def resolve_backend(backend: str = None) -> str:
+    """İstenen arka uç; pyarrow kurulu değilse pandas"""
+    backend = backend or CSV_READER_BACKEND
+    if backend not in READERS:
+        raise ValueError(f"Bilinmeyen CSV okuma arka ucu: {backend} ({', '.join(READERS)})")
+    if backend == "pyarrow" and pa_csv is None:
+        logger.warning("pyarrow kurulu değil, CSV pandas ile okunacak")
+        return "pandas"
+    return backend
+
+
+def read_csv(path: str, dtype: dict = None, usecols: list = None,
+             encoding: str = None, backend: str = None) -> pd.DataFrame:
+    """CSV'yi seçili arka uçla oku (kodlama verilmezse tespit edilir, sıkıştırılmışsa akışla açılır)"""
+    backend = resolve_backend(backend)
+    encoding = encoding or detect_encoding(path)
+    try:
+        with open_stream(path) as f:
+            df = READERS[backend](f, encoding, dtype=dtype, usecols=usecols)
+    except DECODE_ERRORS:
+        # Örneklem UTF-8 görünüp dosyanın devamı değilse yedek kodlamayla tekrar
+        if encoding not in ("utf-8", "utf-8-sig") or not CSV_FALLBACK_ENCODINGS:
+            raise
+        encoding = CSV_FALLBACK_ENCODINGS[0]
+        logger.info(f"{path} UTF-8 değil, {encoding} ile yeniden okunuyor")
+        with open_stream(path) as f:
+            df = READERS[backend](f, encoding, dtype=dtype, usecols=usecols)
+
+    if usecols is not None:
+        # pandas gibi dosyadaki kolon sırası korunur (arrow usecols sırasıyla döndürür)
+        order = [col for col in read_header(path, encoding) if col in df.columns]
+        if order != list(df.columns):
+            df = df[order]
+    return df
+
+
+def read_header(path: str, encoding: str = None) -> list:
+    """Dosyanın sadece başlık satırını oku"""
+    encoding = encoding or detect_encoding(path)
+    with open_stream(path) as f:
+        return list(pd.read_csv(f, nrows=0, encoding=encoding).columns)
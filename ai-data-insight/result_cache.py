@@ -0,0 +1,76 @@
+"""
+Analiz sonuçları için HTTP önbellek yardımcıları
+Tamamlanmış analizlerin serialize edilmiş response byte'ları process içi
+LRU'da tutulur. Sonuç sonradan değişebildiği için (kesin sonuç önizlemenin
+yerine yazılır, pipeline tekrar çalışır) önbellek ve istemci her istekte
+ETag ile doğrular; eşleşirse gövde yeniden üretilmez ya da 304 döner.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+
+from config import RESULT_CACHE_SIZE
+
+CachedResult = namedtuple("CachedResult", ["etag", "body"])
+
+# Analizi biten upload durumları
+COMPLETED_UPLOAD_STATUSES = {"ready", "completed"}
+
+
+def analysis_etag(analysis) -> str:
+    """Analiz id'si ve versiyonundan (son güncelleme zamanı) ETag üret"""
+    stamp = analysis.updated_at or analysis.created_at
+    version = int(stamp.timestamp() * 1000) if stamp else 0
+    # Önizleme ve kesin sonuç aynı saniyede yazılsa da ETag farklı olmalı
+    if analysis.precision == "preview":
+        return f'"analysis-{analysis.id}-{version}-preview"'
+    return f'"analysis-{analysis.id}-{version}"'
+
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    """If-None-Match başlığı ETag ile eşleşiyor mu? (zayıf karşılaştırma)"""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    return any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def cache_control() -> str:
+    """Aynı URL'nin sonucu değişebilir; istemci her seferinde ETag ile doğrulamalı"""
+    return "private, no-cache"
+
+
+class ResultCache:
+    def __init__(self, max_size: int = RESULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, upload_id: int):
+        with self._lock:
+            entry = self._entries.get(upload_id)
+            if entry is not None:
+                self._entries.move_to_end(upload_id)
+            return entry
+
+    def put(self, upload_id: int, etag: str, body: bytes):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[upload_id] = CachedResult(etag, body)
+            self._entries.move_to_end(upload_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, upload_id: int):
+        with self._lock:
+            self._entries.pop(upload_id, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+result_cache = ResultCache()
@@ -0,0 +1,138 @@
+"""
+Tenant bazlı şema profilleri
+Tenant'lar her gün aynı başlık düzeninde dosya yükler. Başlık imzası
+(kolon adları ve sırası) başına tespit edilen kolon rolleri, dtype'lar,
+tarih formatları ve eksik değer doldurma değerleri saklanır; aynı imzalı
+sonraki upload'lar tespit/çıkarım yapmadan doğrudan tipli okunur. Manuel
+override'lar tespit edilen profilin üzerine uygulanır.
+"""
+
+import hashlib
+import logging
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from models import SchemaProfile
+from preprocess import PROFILE_READ_DTYPES
+
+logger = logging.getLogger(__name__)
+
+# Override edilebilen alanlar
+SCALAR_FIELDS = ("date_col", "qty_col", "event_log")
+MAPPING_FIELDS = ("dtypes", "date_formats", "fill_values")
+
+
+def header_signature(columns) -> str:
+    """Kolon adları ve sırasından başlık imzası"""
+    return hashlib.sha1("\x1f".join(str(c) for c in columns).encode("utf-8")).hexdigest()
+
+
+def apply_overrides(profile: dict, overrides: dict) -> dict:
+    """Tespit edilen profile manuel override'ları uygula"""
+    effective = dict(profile)
+    for field, value in (overrides or {}).items():
+        if field in MAPPING_FIELDS:
+            effective[field] = {**profile.get(field, {}), **value}
+        else:
+            effective[field] = value
+    return effective
+
+
+def _check_date_format(col: str, fmt) -> None:
+    """Tarih formatı strptime direktifi içermeli ve derlenebilmeli"""
+    if not isinstance(fmt, str) or "%" not in fmt:
+        raise ValueError(f"{col} için geçersiz tarih formatı: {fmt}")
+    try:
+        pd.to_datetime(pd.Series(["2024-01-01"]), format=fmt, errors="coerce")
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{col} için geçersiz tarih formatı: {fmt} ({e})")
+
+
+def validate_overrides(columns: list, overrides: dict) -> dict:
+    """Override'ları kontrol et (bilinmeyen alan/kolon, desteklenmeyen dtype/format -> ValueError)"""
+    unknown = set(overrides) - set(SCALAR_FIELDS) - set(MAPPING_FIELDS)
+    if unknown:
+        raise ValueError(f"Bilinmeyen override alanı: {', '.join(sorted(unknown))}")
+
+    for field in ("date_col", "qty_col"):
+        value = overrides.get(field)
+        if value is not None and value not in columns:
+            raise ValueError(f"{field} kolonu bulunamadı: {value}")
+    for field in MAPPING_FIELDS:
+        value = overrides.get(field, {})
+        if not isinstance(value, dict):
+            raise ValueError(f"{field} kolon -> değer eşlemesi olmalı")
+        missing = [col for col in value if col not in columns]
+        if missing:
+            raise ValueError(f"{field} içinde bilinmeyen kolon: {', '.join(missing)}")
+
+    # Okumada uygulanmayacak dtype'lar sessizce yok sayılmak yerine reddedilir
+    invalid = [
+        f"{col}={dtype}" for col, dtype in overrides.get("dtypes", {}).items() if dtype not in PROFILE_READ_DTYPES
+    ]
+    if invalid:
+        raise ValueError(
+            f"Desteklenmeyen dtype ({', '.join(invalid)}); izin verilenler: {', '.join(PROFILE_READ_DTYPES)}"
+        )
+    for col, fmt in overrides.get("date_formats", {}).items():
+        _check_date_format(col, fmt)
+    return overrides
+
+
+def get_profile(db: Session, tenant_id: int, columns: list):
+    """Başlığa ait (override'lı) profili getir; yoksa None"""
+    record = db.query(SchemaProfile).filter(
+        SchemaProfile.tenant_id == tenant_id,
+        SchemaProfile.signature == header_signature(columns)
+    ).first()
+    if record is None or not record.profile:
+        return None
+
+    record.use_count = (record.use_count or 0) + 1
+    db.commit()
+    return apply_overrides(record.profile, record.overrides)
+
+
+def save_profile(db: Session, tenant_id: int, profile: dict) -> SchemaProfile:
+    """Tespit edilen profili kaydet (varsa override'lar korunur)"""
+    signature = header_signature(profile["columns"])
+    record = db.query(SchemaProfile).filter(
+        SchemaProfile.tenant_id == tenant_id,
+        SchemaProfile.signature == signature
+    ).first()
+    if record is None:
+        record = SchemaProfile(tenant_id=tenant_id, signature=signature, overrides={}, use_count=0)
+        db.add(record)
+    record.columns = profile["columns"]
+    record.profile = profile
+    db.commit()
+    logger.info(f"Tenant {tenant_id} için şema profili kaydedildi: {signature[:12]}")
+    return record
+
+
+def set_overrides(db: Session, tenant_id: int, signature: str, overrides: dict):
+    """Profilin manuel override'larını değiştir (profil yoksa None)"""
+    record = db.query(SchemaProfile).filter(
+        SchemaProfile.tenant_id == tenant_id,
+        SchemaProfile.signature == signature
+    ).first()
+    if record is None:
+        return None
+
+    record.overrides = validate_overrides(record.columns or [], overrides)
+    db.commit()
+    return record
+
+
+def profile_to_dict(record: SchemaProfile) -> dict:
+    return {
+        "signature": record.signature,
+        "columns": record.columns,
+        "profile": record.profile,
+        "overrides": record.overrides or {},
+        "effective": apply_overrides(record.profile or {}, record.overrides),
+        "use_count": record.use_count or 0,
+        "updated_at": (record.updated_at or record.created_at).isoformat()
+        if (record.updated_at or record.created_at) else None,
+    }
@@ -0,0 +1,81 @@
+"""
+Hızlı JSON serileştirme
+orjson kuruluysa onu kullanır (NumPy dizilerini ve skalerlerini doğrudan
+serialize eder), yoksa standart json modülüne düşer.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson opsiyonel
+    orjson = None
+
+
+def _default(obj):
+    """orjson/json'un doğrudan tanımadığı tipleri dönüştür"""
+    if isinstance(obj, np.generic):
+        value = obj.item()
+        if isinstance(value, float) and not np.isfinite(value):
+            return None
+        return value
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (pd.Timestamp, datetime, date)):
+        return None if pd.isna(obj) else obj.isoformat()
+    if isinstance(obj, pd.Timedelta):
+        return None if pd.isna(obj) else str(obj)
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj) -> bytes:
+        """Nesneyi JSON byte'larına çevir"""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(obj) -> bytes:
+        """Nesneyi JSON byte'larına çevir"""
+        return json.dumps(obj, default=_default, ensure_ascii=False).encode("utf-8")
+
+
+def dumps_str(obj) -> str:
+    """Nesneyi JSON string'ine çevir (SQLAlchemy JSON kolonları için)"""
+    return dumps(obj).decode("utf-8")
+
+
+def loads_field(value, default=None):
+    """JSON kolon değerini oku; eski kayıtlardaki JSON string'lerini de çözer"""
+    if value is None or value == "":
+        return {} if default is None else default
+    if isinstance(value, (str, bytes)):
+        return json.loads(value)
+    return value
+
+
+def describe_to_dict(summary_stats: pd.DataFrame) -> dict:
+    """describe() çıktısını NaN/inf değerleri 0 yapılmış dict'e çevir.
+
+    Hücre hücre Python döngüsü yerine tüm tablo üzerinde maske ile çalışır.
+    """
+    cleaned = summary_stats.replace([np.inf, -np.inf], np.nan).astype(object)
+    cleaned = cleaned.mask(cleaned.isna(), 0)
+    return cleaned.to_dict()
+
+
+class FastJSONResponse(JSONResponse):
+    """jsonable_encoder'ı atlayıp doğrudan hızlı serileştirici kullanan response"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
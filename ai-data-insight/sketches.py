@@ -0,0 +1,336 @@
+"""
+Birleştirilebilir (mergeable) özet sketch'leri
+Büyük upload'larda describe() yerine kullanılan yaklaşık özet:
+KLL quantile sketch'i, HyperLogLog distinct sayımı ve space-saving top-k.
+Her sketch parça parça (chunk) beslenir, farklı parça/worker'ların
+sketch'leri merge() ile birleştirilir ve değerlerin yanında hata sınırları
+raporlanır.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+# describe() satır sırası + hata sınırı satırları
+SUMMARY_ROWS = ["count", "unique", "top", "freq", "mean", "std", "min", "25%", "50%", "75%", "max"]
+ERROR_ROWS = ["unique_error", "freq_error", "rank_error"]
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """Değerlerin 64-bit hash'leri (vektörel)"""
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+class KLLSketch:
+    """KLL quantile sketch'i; seviye h'deki her eleman 2^h ağırlık taşır"""
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def update(self, values) -> "KLLSketch":
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.n += len(values)
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # Tek sayıda eleman varsa biri seviyede kalır
+                keep = items[:1] if len(items) % 2 else items[:0]
+                pairs = items[len(keep):]
+                promoted = pairs[int(self._rng.integers(2))::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantiles(self, qs=QUANTILES) -> list:
+        if self.n == 0:
+            return [np.nan for _ in qs]
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        total = cumulative[-1]
+        return [float(items[min(np.searchsorted(cumulative, q * total, side="left"), len(items) - 1)])
+                for q in qs]
+
+    @property
+    def rank_error(self) -> float:
+        """Normalize rank hatası (tek quantile için, ~%99 güven; DataSketches yaklaşımı)"""
+        return 0.0 if self.n <= self.k else 2.296 / self.k ** 0.9723
+
+
+class HyperLogLog:
+    """HyperLogLog distinct sayacı (2^p register)"""
+
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update_hashes(self, hashes: np.ndarray) -> "HyperLogLog":
+        if len(hashes):
+            index = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+            rest = (hashes & np.uint64((1 << (64 - self.p)) - 1)).astype(np.float64)
+            # Kalan bitlerde baştaki sıfır sayısı + 1 (rest < 2^53, float'a tam sığar)
+            _, bit_length = np.frexp(rest)
+            rank = (64 - self.p - bit_length + 1).astype(np.uint8)
+            np.maximum.at(self.registers, index, rank)
+        return self
+
+    def update(self, values: pd.Series) -> "HyperLogLog":
+        return self.update_hashes(hash_values(values.dropna()))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # Küçük kardinalitede linear counting
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+    @property
+    def relative_error(self) -> float:
+        """Tahminin göreli standart hatası"""
+        return 1.04 / math.sqrt(len(self.registers))
+
+
+class SpaceSaving:
+    """Space-saving top-k; her sayaç (tahmini sayım, aşım payı) tutar"""
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        # Özette olmayan herhangi bir elemanın en fazla sayımı
+        self.floor = 0
+        self.n = 0
+
+    def update(self, values: pd.Series) -> "SpaceSaving":
+        counts = values.dropna().value_counts(sort=True)
+        chunk = SpaceSaving(self.capacity)
+        chunk.n = int(counts.sum())
+        chunk.counts = {key: int(count) for key, count in counts.head(self.capacity).items()}
+        chunk.errors = dict.fromkeys(chunk.counts, 0)
+        if len(counts) > self.capacity:
+            chunk.floor = int(counts.iloc[self.capacity])
+        return self.merge(chunk)
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        counts, errors = {}, {}
+        for key in self.counts.keys() | other.counts.keys():
+            # Bir özette olmayan eleman orada en fazla floor kadar görülmüş olabilir
+            counts[key] = self.counts.get(key, self.floor) + other.counts.get(key, other.floor)
+            errors[key] = self.errors.get(key, self.floor) + other.errors.get(key, other.floor)
+        top = sorted(counts, key=counts.get, reverse=True)
+        dropped = counts[top[self.capacity]] if len(top) > self.capacity else 0
+        top = top[:self.capacity]
+        self.counts = {key: counts[key] for key in top}
+        self.errors = {key: errors[key] for key in top}
+        self.floor = max(dropped, self.floor + other.floor)
+        self.n += other.n
+        return self
+
+    def top(self, k: int = 1) -> list:
+        """[(değer, tahmini sayım, aşım payı)]; gerçek sayım [sayım - pay, sayım] aralığında"""
+        keys = sorted(self.counts, key=self.counts.get, reverse=True)[:k]
+        return [(key, self.counts[key], self.errors[key]) for key in keys]
+
+
+class ColumnSketch:
+    """Tek kolonun birleştirilebilir özeti"""
+
+    def __init__(self, kind: str, k: int = 200, p: int = 14, capacity: int = 64):
+        # kind: "numeric", "datetime" veya "categorical"
+        self.kind = kind
+        self.count = 0
+        self.nulls = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.distinct = HyperLogLog(p)
+        self.quantiles = KLLSketch(k) if kind != "categorical" else None
+        self.top_k = SpaceSaving(capacity) if kind == "categorical" else None
+
+    @staticmethod
+    def kind_of(values: pd.Series) -> str:
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return "datetime"
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            return "numeric"
+        return "categorical"
+
+    def update(self, values: pd.Series) -> "ColumnSketch":
+        self.nulls += int(values.isna().sum())
+        values = values.dropna()
+        self.distinct.update(values)
+        if self.kind == "categorical":
+            self.count += len(values)
+            self.top_k.update(values)
+            return self
+
+        if self.kind == "datetime":
+            numbers = values.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+        else:
+            numbers = values.to_numpy(dtype=np.float64)
+        if len(numbers):
+            chunk = ColumnSketch(self.kind)
+            chunk.count = len(numbers)
+            chunk.mean = float(numbers.mean())
+            chunk.m2 = float(((numbers - chunk.mean) ** 2).sum())
+            chunk.min, chunk.max = float(numbers.min()), float(numbers.max())
+            self._merge_moments(chunk)
+            self.quantiles.update(numbers)
+        return self
+
+    def _merge_moments(self, other: "ColumnSketch"):
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+
+    def merge(self, other: "ColumnSketch") -> "ColumnSketch":
+        self.nulls += other.nulls
+        self.distinct.merge(other.distinct)
+        if self.kind == "categorical":
+            self.count += other.count
+            self.top_k.merge(other.top_k)
+        else:
+            self._merge_moments(other)
+            self.quantiles.merge(other.quantiles)
+        return self
+
+    def to_state(self):
+        """Kalıcı durum: (JSON'a yazılabilir alanlar, numpy dizileri)"""
+        meta = {
+            "kind": self.kind, "count": self.count, "nulls": self.nulls,
+            "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max,
+            "p": self.distinct.p,
+        }
+        arrays = {"registers": self.distinct.registers}
+        if self.quantiles is not None:
+            meta["kll"] = {"k": self.quantiles.k, "n": self.quantiles.n, "levels": len(self.quantiles.levels)}
+            for h, level in enumerate(self.quantiles.levels):
+                arrays[f"level_{h}"] = level
+        if self.top_k is not None:
+            meta["top_k"] = {
+                "capacity": self.top_k.capacity, "floor": self.top_k.floor, "n": self.top_k.n,
+                "items": [[key.item() if hasattr(key, "item") else key, count, error]
+                          for key, count, error in self.top_k.top(self.top_k.capacity)],
+            }
+        return meta, arrays
+
+    @classmethod
+    def from_state(cls, meta: dict, arrays: dict) -> "ColumnSketch":
+        sketch = cls(meta["kind"], p=meta["p"])
+        for name in ("count", "nulls", "mean", "m2", "min", "max"):
+            setattr(sketch, name, meta[name])
+        sketch.distinct.registers = np.array(arrays["registers"], dtype=np.uint8)
+        if "kll" in meta:
+            sketch.quantiles = KLLSketch(meta["kll"]["k"])
+            sketch.quantiles.n = meta["kll"]["n"]
+            sketch.quantiles.levels = [np.array(arrays[f"level_{h}"], dtype=np.float64)
+                                       for h in range(meta["kll"]["levels"])]
+        if "top_k" in meta:
+            state = meta["top_k"]
+            sketch.top_k = SpaceSaving(state["capacity"])
+            sketch.top_k.floor, sketch.top_k.n = state["floor"], state["n"]
+            sketch.top_k.counts = {key: count for key, count, _ in state["items"]}
+            sketch.top_k.errors = {key: error for key, _, error in state["items"]}
+        return sketch
+
+    def describe(self) -> dict:
+        """describe() satırları + hata sınırları"""
+        unique = self.distinct.estimate()
+        row = {"count": float(self.count), "nulls": self.nulls, "unique_error": self.distinct.relative_error}
+        if self.kind == "categorical":
+            top = self.top_k.top(1)
+            row.update({
+                "unique": unique,
+                "top": top[0][0] if top else np.nan,
+                "freq": top[0][1] if top else np.nan,
+                "freq_error": top[0][2] if top else np.nan,
+            })
+            return row
+
+        q25, q50, q75 = self.quantiles.quantiles()
+        std = math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+        stats = {"mean": self.mean, "min": self.min, "25%": q25, "50%": q50, "75%": q75, "max": self.max}
+        if self.kind == "datetime":
+            stats = {key: pd.Timestamp(int(value)) if not np.isnan(value) else pd.NaT
+                     for key, value in stats.items()}
+        else:
+            stats["std"] = std
+        row.update(stats)
+        row["rank_error"] = self.quantiles.rank_error
+        return row
+
+
+def sketch_frame(df: pd.DataFrame, chunk_size: int = 1_000_000) -> dict:
+    """DataFrame'i parça parça sketch'le; {kolon: ColumnSketch}"""
+    sketches = {col: ColumnSketch(ColumnSketch.kind_of(df[col])) for col in df.columns}
+    for start in range(0, max(len(df), 1), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        for col, sketch in sketches.items():
+            sketch.update(chunk[col])
+    return sketches
+
+
+def merge_sketches(parts) -> dict:
+    """Farklı parça/worker'ların kolon sketch'lerini birleştir"""
+    merged = {}
+    for part in parts:
+        for col, sketch in part.items():
+            if col in merged:
+                merged[col].merge(sketch)
+            else:
+                merged[col] = sketch
+    return merged
+
+
+def approximate_describe(sketches: dict) -> pd.DataFrame:
+    """describe(include="all") düzeninde yaklaşık özet (hata satırlarıyla)"""
+    columns = {col: sketch.describe() for col, sketch in sketches.items()}
+    table = pd.DataFrame(columns, index=SUMMARY_ROWS + ERROR_ROWS)
+    return table.dropna(how="all")
@@ -0,0 +1,90 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import aggregates
+from aggregates import AggregateCube, load_cube, save_cube
+from anomaly import detect_anomalies
+from forecast import forecast_sales, naive_forecast
+from main import app
+
+
+class TestAggregateCube:
+    """Önceden hesaplanmış günlük/haftalık/aylık agregaların testleri"""
+
+    @pytest.fixture
+    def orders(self):
+        return pd.DataFrame({
+            "sku": ["A", "B", "A", "A", "B", "A"],
+            "segment": ["Gold", "Gold", "Silver", "Gold", "Silver", "Gold"],
+            "quantity": [1, 2, 3, 4, 5, 6],
+            "order_date": pd.to_datetime([
+                "2024-01-01 09:00", "2024-01-01 18:30", "2024-01-02 00:00",
+                "2024-01-08 12:00", "2024-01-31 08:15", "2024-02-01 10:00",
+            ]),
+        })
+
+    @pytest.fixture
+    def artifact_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(aggregates, "ARTIFACT_DIR", str(tmp_path))
+        return tmp_path
+
+    def test_daily_totals(self, orders):
+        """Aynı günün saatleri tek güne toplanmalı"""
+        daily = AggregateCube.build(orders).daily()
+
+        assert list(daily.columns) == ["order_date", "quantity"]
+        assert daily["quantity"].tolist() == [3, 3, 4, 5, 6]
+        assert daily["order_date"].iloc[0] == pd.Timestamp("2024-01-01")
+
+    def test_rollups_and_dimensions(self, orders):
+        """Haftalık/aylık seviyeler ve kırılımlar günlük tablodan türetilmeli"""
+        cube = AggregateCube.build(orders)
+
+        weekly = cube.query("week")
+        assert weekly["period"].tolist() == [
+            pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-08"), pd.Timestamp("2024-01-29"),
+        ]
+        assert weekly["sum"].tolist() == [6, 4, 11]
+
+        monthly = cube.query("month", dimension="sku", key="A")
+        assert monthly["sum"].tolist() == [8, 6]
+        assert monthly["count"].tolist() == [3, 1]
+
+        gold = cube.query("day", dimension="segment", key="Gold", start="2024-01-02")
+        assert gold["sum"].tolist() == [4, 6]
+
+        with pytest.raises(ValueError):
+            cube.query("year")
+
+    def test_analytics_read_from_cube(self, orders):
+        """Anomali ve forecast cube ile ham veriyle aynı sonucu vermeli"""
+        cube = AggregateCube.build(orders)
+
+        _, daily = detect_anomalies(orders, cube=cube)
+        _, expected = detect_anomalies(orders)
+        pd.testing.assert_frame_equal(daily, expected)
+
+        forecast, _ = forecast_sales(None, cube=cube)
+        pd.testing.assert_frame_equal(forecast, forecast_sales(orders)[0])
+        assert naive_forecast(None, cube=cube)[0]["forecast"].tolist() == [6] * 7
+
+    def test_saved_cube_and_endpoint(self, orders, artifact_dir):
+        """Kaydedilen cube okunabilmeli ve endpoint'ten sorgulanabilmeli"""
+        save_cube(7, AggregateCube.build(orders))
+
+        loaded = load_cube(7)
+        assert loaded.dimensions == ["sku", "segment"]
+        assert loaded.query("month")["sum"].tolist() == [15, 6]
+
+        client = TestClient(app)
+        response = client.get("/api/v1/upload/7/aggregates?grain=week&dimension=sku&key=B")
+        assert response.status_code == 200
+        assert response.json()["items"] == [
+            {"period": "2024-01-01", "sum": 2.0, "count": 1, "mean": 2.0, "sku": "B"},
+            {"period": "2024-01-29", "sum": 5.0, "count": 1, "mean": 5.0, "sku": "B"},
+        ]
+
+        assert client.get("/api/v1/upload/7/aggregates?grain=year").status_code == 400
+        assert client.get("/api/v1/upload/7/aggregates?dimension=city").status_code == 400
+        assert client.get("/api/v1/upload/8/aggregates").status_code == 404
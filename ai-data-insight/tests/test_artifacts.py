@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from artifacts import write_dir
+
+
+def _write(target: str, text: str):
+    with write_dir(target) as tmp:
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            f.write(text)
+
+
+def _read(target: str) -> str:
+    with open(os.path.join(target, "meta.json")) as f:
+        return f.read()
+
+
+class TestAtomicArtifacts:
+    """Artefakt klasörlerinin atomik yazımının testleri"""
+
+    def test_replaces_previous_version(self, tmp_path):
+        """Yeni sürüm hedefin yerine geçmeli, en fazla iki sürüm tutulmalı"""
+        target = str(tmp_path / "aggregates")
+        for i in range(4):
+            _write(target, f"v{i}")
+
+        assert _read(target) == "v3"
+        versions = [name for name in os.listdir(tmp_path) if name.startswith("aggregates@")]
+        assert len(versions) == 2
+
+    def test_failed_write_keeps_old(self, tmp_path):
+        """Yazım yarıda kalırsa eski sürüm okunmaya devam etmeli, yarım klasör kalmamalı"""
+        target = str(tmp_path / "aggregates")
+        _write(target, "eski")
+
+        with pytest.raises(RuntimeError):
+            with write_dir(target) as tmp:
+                open(os.path.join(tmp, "meta.json"), "w").close()
+                raise RuntimeError("yarıda kaldı")
+
+        assert _read(target) == "eski"
+        assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    def test_concurrent_writers_isolated(self, tmp_path):
+        """Eşzamanlı yazıcılar ayrı klasörlere yazmalı; son yayınlayan kazanmalı"""
+        target = str(tmp_path / "predictions")
+        with write_dir(target) as first:
+            with write_dir(target) as second:
+                assert first != second
+                with open(os.path.join(second, "meta.json"), "w") as f:
+                    f.write("ikinci")
+            with open(os.path.join(first, "meta.json"), "w") as f:
+                f.write("birinci")
+
+        assert _read(target) == "birinci"
+
+    def test_legacy_directory_migrated(self, tmp_path):
+        """Eski düzendeki gerçek klasör yeni sürümle değiştirilmeli"""
+        target = tmp_path / "summary"
+        target.mkdir()
+        (target / "meta.json").write_text("eski")
+
+        _write(str(target), "yeni")
+
+        assert os.path.islink(target)
+        assert _read(str(target)) == "yeni"
+
+    def test_rename_fallback_without_symlinks(self, tmp_path, monkeypatch):
+        """Sembolik bağlantı oluşturulamazsa hedef gerçek klasör olarak değiştirilmeli"""
+        def no_symlink(*args, **kwargs):
+            raise OSError("symbolic link privilege not held")
+
+        monkeypatch.setattr(os, "symlink", no_symlink)
+        target = str(tmp_path / "aggregates")
+        for i in range(4):
+            _write(target, f"v{i}")
+
+        assert not os.path.islink(target)
+        assert _read(target) == "v3"
+        versions = [name for name in os.listdir(tmp_path) if name.startswith("aggregates@")]
+        assert len(versions) == 1
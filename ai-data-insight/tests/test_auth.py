@@ -0,0 +1,200 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import auth
+from auth import create_access_token, get_current_user, get_current_tenant
+from models import Base, Tenant, User
+
+
+class TestPrincipalCache:
+    """Kullanıcı/tenant çözümleme önbelleğinin testleri"""
+
+    @pytest.fixture
+    def session_factory(self):
+        """SQLite üzerinde izole bir session factory oluşturur"""
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+
+        db = factory()
+        tenant = Tenant(name="Test Tenant", domain="test_tenant")
+        db.add(tenant)
+        db.commit()
+        db.add(User(email="a@test.com", hashed_password="x", full_name="A", tenant_id=tenant.id))
+        db.commit()
+        db.close()
+
+        auth.invalidate_user_cache()
+        auth.invalidate_tenant_cache()
+        yield factory, engine
+        auth.invalidate_user_cache()
+        auth.invalidate_tenant_cache()
+
+    @staticmethod
+    def _count_selects(engine):
+        counter = {"selects": 0}
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                counter["selects"] += 1
+
+        return counter
+
+    @staticmethod
+    def _credentials(user_id=1, tenant_id=1):
+        token = create_access_token(data={"sub": str(user_id), "tenant_id": tenant_id})
+        return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    def _resolve(self, factory, credentials):
+        db = factory()
+        try:
+            user = get_current_user(credentials, db)
+            tenant = get_current_tenant(user, db)
+            return user.email, tenant.name
+        finally:
+            db.close()
+
+    def test_repeat_requests_skip_db(self, session_factory):
+        """Aynı token ile ikinci istek DB'ye gitmemeli"""
+        factory, engine = session_factory
+        counter = self._count_selects(engine)
+        credentials = self._credentials()
+
+        assert self._resolve(factory, credentials) == ("a@test.com", "Test Tenant")
+        first_selects = counter["selects"]
+        assert first_selects == 2
+
+        assert self._resolve(factory, credentials) == ("a@test.com", "Test Tenant")
+        assert counter["selects"] == first_selects
+
+    def test_user_deactivation_invalidates_cache(self, session_factory):
+        """Kullanıcı pasif yapılınca önbellek düşmeli ve istek reddedilmeli"""
+        factory, _ = session_factory
+        credentials = self._credentials()
+        self._resolve(factory, credentials)
+
+        db = factory()
+        db.query(User).filter(User.id == 1).first().is_active = False
+        db.commit()
+        db.close()
+
+        with pytest.raises(HTTPException) as exc:
+            self._resolve(factory, credentials)
+        assert exc.value.status_code == 401
+
+    def test_tenant_deactivation_invalidates_cache(self, session_factory):
+        """Tenant pasif yapılınca önbellek düşmeli ve istek reddedilmeli"""
+        factory, _ = session_factory
+        credentials = self._credentials()
+        self._resolve(factory, credentials)
+
+        db = factory()
+        db.query(Tenant).filter(Tenant.id == 1).first().is_active = False
+        db.commit()
+        db.close()
+
+        with pytest.raises(HTTPException) as exc:
+            self._resolve(factory, credentials)
+        assert exc.value.status_code == 403
+
+    def test_token_tenant_mismatch_rejected(self, session_factory):
+        """Token'daki tenant_id kullanıcınınkiyle uyuşmazsa reddedilmeli"""
+        factory, _ = session_factory
+
+        with pytest.raises(HTTPException) as exc:
+            self._resolve(factory, self._credentials(tenant_id=99))
+        assert exc.value.status_code == 401
+
+
+class TestPasswordHashPool:
+    """Bcrypt işlemlerinin ayrı havuzda çalıştığını doğrulayan yük testi"""
+
+    HASH_SECONDS = 0.05
+    STORM_SIZE = 60
+
+    @pytest.fixture
+    def slow_verify(self, monkeypatch):
+        """Bcrypt maliyetini taklit eden yavaş doğrulama"""
+        import time
+
+        def _verify(plain, hashed):
+            time.sleep(self.HASH_SECONDS)
+            return plain == hashed
+
+        monkeypatch.setattr(auth.pwd_context, "verify", _verify)
+
+    @staticmethod
+    def _p99(values):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+    async def _probe_latency_during_storm(self, storm_call):
+        """Login fırtınası sırasında sync endpoint gecikmesini (ms) ölç"""
+        import asyncio
+        import time
+        from starlette.concurrency import run_in_threadpool
+
+        async def _probe():
+            # Status endpoint'i gibi varsayılan threadpool'da çalışan sync iş
+            started = time.perf_counter()
+            await run_in_threadpool(lambda: None)
+            return (time.perf_counter() - started) * 1000
+
+        storm = [asyncio.ensure_future(storm_call()) for _ in range(self.STORM_SIZE)]
+        await asyncio.sleep(0.01)
+        latencies = []
+        for _ in range(20):
+            latencies.append(await _probe())
+        await asyncio.gather(*storm)
+        return self._p99(latencies)
+
+    def test_login_storm_does_not_block_default_threadpool(self, slow_verify):
+        """Login fırtınası status endpoint'lerinin p99 gecikmesini artırmamalı"""
+        import asyncio
+        from starlette.concurrency import run_in_threadpool
+
+        baseline_p99 = asyncio.run(self._probe_latency_during_storm(
+            lambda: run_in_threadpool(auth.verify_password, "secret", "secret")
+        ))
+        pooled_p99 = asyncio.run(self._probe_latency_during_storm(
+            lambda: auth.verify_password_async("secret", "secret")
+        ))
+
+        assert pooled_p99 < self.HASH_SECONDS * 1000
+        assert pooled_p99 < baseline_p99
+
+    @staticmethod
+    def _verify_many(count):
+        import asyncio
+
+        async def _run():
+            return await asyncio.gather(
+                *[auth.verify_password_async("a", "a") for _ in range(count)],
+                return_exceptions=True
+            )
+
+        return asyncio.run(_run())
+
+    def test_pool_reports_queue_depth(self, slow_verify):
+        """Kuyruk derinliği metrikleri güncellenmeli"""
+        before = auth.get_hash_pool_stats()
+        results = self._verify_many(auth.PASSWORD_HASH_WORKERS * 3)
+        stats = auth.get_hash_pool_stats()
+
+        assert all(r is True for r in results)
+        assert stats["in_flight"] == 0
+        assert stats["completed"] - before["completed"] == auth.PASSWORD_HASH_WORKERS * 3
+        assert stats["peak_queue_depth"] >= auth.PASSWORD_HASH_WORKERS
+
+    def test_pool_rejects_when_queue_full(self, slow_verify, monkeypatch):
+        """Kuyruk dolduğunda 503 dönmeli"""
+        monkeypatch.setattr(auth, "PASSWORD_HASH_MAX_QUEUE", 0)
+        results = self._verify_many(auth.PASSWORD_HASH_WORKERS + 2)
+        rejected = [r for r in results if isinstance(r, HTTPException)]
+
+        assert len(rejected) == 2
+        assert rejected[0].status_code == 503
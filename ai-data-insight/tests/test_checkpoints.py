@@ -0,0 +1,170 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import main
+import readers
+from checkpoints import load_checkpoint, load_frame, save_checkpoint, save_frame
+from database import get_db
+from models import Base, Tenant, Upload, User
+from preprocess import Preprocessor
+
+
+def _orders_csv(path, days: int = 30):
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({
+        "order_date": pd.date_range("2024-01-01", periods=days).strftime("%Y-%m-%d"),
+        "sku": ["A", "B", "C"] * (days // 3),
+        "quantity": rng.integers(1, 20, days),
+        "price": rng.random(days) * 100,
+    })
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+class TestCheckpointFrame:
+    """Kolon bazlı checkpoint çerçevesinin testleri"""
+
+    def test_roundtrip(self, tmp_path):
+        """Sayısal, metin, kategori ve tarih kolonları aynen geri okunmalı"""
+        df = pd.DataFrame({
+            "qty": np.array([1, 2, 3], dtype=np.int64),
+            "price": [1.5, np.nan, 3.0],
+            "sku": pd.Series(["A", None, "A"], dtype="str"),
+            "note": pd.Series(["x", "y", np.nan], dtype=object),
+            "segment": pd.Categorical(["vip", "new", "vip"]),
+            "day": pd.to_datetime(["2024-01-01", "2024-01-02", None]),
+            "ts": pd.to_datetime(["2024-01-01 10:00", "2024-01-02 11:00", "2024-01-03 12:00"]).tz_localize("Europe/Istanbul"),
+        })
+        columns = save_frame(df, str(tmp_path))
+
+        pd.testing.assert_frame_equal(load_frame(str(tmp_path), columns), df)
+
+    def test_mixed_object_rejected(self, tmp_path):
+        """Metne çevrilince değişecek karışık kolonlar yazılmamalı"""
+        with pytest.raises(TypeError):
+            save_frame(pd.DataFrame({"x": pd.Series([1, "a"], dtype=object)}), str(tmp_path))
+
+    def test_source_change_invalidates(self, tmp_path):
+        """Kaynak dosya değiştiyse checkpoint kullanılmamalı"""
+        source = tmp_path / "orders.csv"
+        source.write_text("a\n1\n")
+        target = str(tmp_path / "checkpoint")
+        save_checkpoint(target, str(source), pd.DataFrame({"a": [1]}), None, {"profile": {}})
+
+        assert load_checkpoint(target, str(source))["frame"]["a"].tolist() == [1]
+        source.write_text("a\n1\n2\n")
+        assert load_checkpoint(target, str(source)) is None
+
+
+class TestResumablePreprocessing:
+    """Preprocessing'in checkpoint'ten devam etmesinin testleri (her iki CSV arka ucuyla)"""
+
+    @pytest.fixture(autouse=True, params=["pandas", "pyarrow"])
+    def backend(self, request, monkeypatch):
+        if request.param == "pyarrow":
+            pytest.importorskip("pyarrow")
+        monkeypatch.setattr(readers, "CSV_READER_BACKEND", request.param)
+        return request.param
+
+    def test_resume_skips_parsing(self, tmp_path, monkeypatch):
+        """İkinci çalıştırma okuma/temizlik aşamalarını atlayıp aynı sonucu vermeli"""
+        path = _orders_csv(tmp_path / "orders.csv")
+        checkpoint = str(tmp_path / "checkpoint")
+        first = Preprocessor(path, checkpoint=checkpoint)
+        df, summary, anomaly_count, forecast = first.run()
+        assert first.stage_report["checkpoint"]["status"] == "completed"
+
+        def no_read(*args, **kwargs):
+            raise AssertionError("Dosya yeniden okunmamalı")
+
+        monkeypatch.setattr("preprocess.read_csv", no_read)
+        second = Preprocessor(path, profile=first.profile, checkpoint=checkpoint)
+        resumed = second.run()
+
+        for stage in ("load", "clean", "roles", "aggregate"):
+            assert second.stage_report[stage]["status"] == "restored"
+        assert "checkpoint" not in second.stage_report
+        pd.testing.assert_frame_equal(resumed[0], df)
+        assert resumed[1:] == (summary, anomaly_count, forecast)
+        assert second.profile_reused
+        assert second.cube.tables[None].equals(first.cube.tables[None])
+
+    def test_changed_profile_reruns(self, tmp_path):
+        """Kolon rolleri değişmiş profil checkpoint'i geçersiz kılmalı"""
+        path = _orders_csv(tmp_path / "orders.csv")
+        checkpoint = str(tmp_path / "checkpoint")
+        first = Preprocessor(path, checkpoint=checkpoint)
+        first.run()
+
+        second = Preprocessor(path, profile={**first.profile, "qty_col": "price"}, checkpoint=checkpoint)
+        second.run()
+
+        assert second.stage_report["load"]["status"] == "completed"
+        assert second.profile["qty_col"] == "price"
+
+
+class TestRetryUpload:
+    """Upload pipeline'ını tekrar çalıştırma endpoint'inin testleri"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+        db = factory()
+        db.add(Tenant(id=2, name="Test", domain="test"))
+        db.add(User(id=2, email="a@test.com", hashed_password="x", tenant_id=2))
+        db.add(Upload(id=1, filename="orders.csv", path="orders.csv", status="failed", tenant_id=2, user_id=2))
+        db.commit()
+        db.close()
+
+        def override_get_db():
+            session = factory()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        runs = []
+        monkeypatch.setattr(main, "process_pipeline", lambda *args: runs.append(args))
+        main.app.dependency_overrides[get_db] = override_get_db
+        yield TestClient(main.app), factory, runs
+        main.app.dependency_overrides.pop(get_db, None)
+
+    def test_retry_claims_upload_once(self, client):
+        """Retry upload'u hemen işleniyor yapmalı; ikinci retry ve scheduler çalıştıramamalı"""
+        client, factory, runs = client
+
+        first = client.post("/api/v1/upload/1/retry")
+        second = client.post("/api/v1/upload/1/retry")
+
+        assert first.status_code == 200 and first.json()["status"] == "processing"
+        assert second.status_code == 409
+        assert runs == [(1, True)]
+        db = factory()
+        assert db.get(Upload, 1).status == "processing"
+        # Scheduler'ın çağrısı zaten işlenen upload'u tekrar almamalı
+        assert not main._claim_upload(db, 1)
+        db.close()
+        assert client.post("/api/v1/upload/99/retry").status_code == 404
+
+    def test_stale_claim_can_be_retried(self, client):
+        """Kiralaması dolmuş "processing" upload'u (çöken worker) tekrar alınabilmeli"""
+        client, factory, runs = client
+        db = factory()
+        upload = db.get(Upload, 1)
+        upload.status = "processing"
+        upload.claimed_at = datetime.now(timezone.utc) - timedelta(seconds=main.PIPELINE_CLAIM_TTL + 60)
+        db.commit()
+        db.close()
+
+        assert client.post("/api/v1/upload/1/retry").status_code == 200
+        assert client.post("/api/v1/upload/1/retry").status_code == 409
+        assert runs == [(1, True)]
@@ -0,0 +1,159 @@
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from hypothesis import given, settings, strategies as st
+
+import dataset_stats
+from dataset_stats import dataset_summary, load_stats, update_stats
+from sketches import ColumnSketch, merge_sketches, sketch_frame
+
+values = st.lists(
+    st.one_of(st.floats(min_value=-1e6, max_value=1e6, allow_nan=False), st.none()),
+    min_size=1, max_size=120,
+)
+
+
+def _split(items: list, cuts: list) -> list:
+    bounds = sorted({0, len(items), *(c % (len(items) + 1) for c in cuts)})
+    return [items[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+class TestIncrementalStats:
+    """Upload'lar eklendikçe artımlı güncellenen özet durumunun testleri"""
+
+    @settings(max_examples=60, deadline=None)
+    @given(values, st.lists(st.integers(min_value=0, max_value=200), max_size=4))
+    def test_merged_moments_match_full(self, items, cuts):
+        """Parça parça birleştirilen moment'ler tüm verinin describe()'ıyla aynı olmalı"""
+        full = pd.Series(items, dtype="float64")
+        parts = [sketch_frame(pd.DataFrame({"x": pd.Series(part, dtype="float64")})) for part in _split(items, cuts)]
+
+        sketch = merge_sketches(parts)["x"]
+
+        present = full.dropna()
+        assert sketch.count == len(present)
+        assert sketch.nulls == full.isna().sum()
+        if len(present):
+            assert sketch.mean == pytest.approx(present.mean(), rel=1e-9, abs=1e-6)
+            assert sketch.min == present.min() and sketch.max == present.max()
+            described = sketch.describe()
+            if len(present) > 1:
+                assert described["std"] == pytest.approx(present.std(), rel=1e-6, abs=1e-6)
+            # n <= k iken KLL kesin: ters CDF quantile'ı
+            for q, key in zip((0.25, 0.5, 0.75), ("25%", "50%", "75%")):
+                assert described[key] == np.quantile(present, q, method="inverted_cdf")
+
+    @settings(max_examples=30, deadline=None)
+    @given(st.lists(st.sampled_from(["A", "B", "C", "ş", None]), min_size=1, max_size=80),
+           st.lists(st.integers(min_value=0, max_value=100), max_size=3))
+    def test_state_roundtrip_and_categorical_merge(self, items, cuts):
+        """Kaydedilip geri okunan durum aynı özeti vermeli; kategorik top-k/distinct birleşmeli"""
+        full = pd.Series(items, dtype=object)
+        with tempfile.TemporaryDirectory() as tmp:
+            original = dataset_stats.ARTIFACT_DIR
+            dataset_stats.ARTIFACT_DIR = tmp
+            try:
+                for upload_id, part in enumerate(_split(items, cuts)):
+                    update_stats(1, upload_id, pd.DataFrame({"c": pd.Series(part, dtype=object)}))
+                sketches, _ = load_stats(1)
+            finally:
+                dataset_stats.ARTIFACT_DIR = original
+
+        sketch = sketches["c"]
+        counts = full.dropna().value_counts()
+        assert sketch.count == counts.sum()
+        assert sketch.nulls == full.isna().sum()
+        assert sketch.distinct.estimate() == len(counts)
+        if len(counts):
+            top, freq, _ = sketch.top_k.top(1)[0]
+            assert freq == counts.max() and counts[top] == counts.max()
+
+    def test_numeric_state_roundtrip(self):
+        """Sıkıştırılmış KLL seviyeleri dahil durum birebir geri okunmalı"""
+        rng = np.random.default_rng(0)
+        sketch = ColumnSketch("numeric").update(pd.Series(rng.normal(size=50_000)))
+
+        restored = ColumnSketch.from_state(*sketch.to_state())
+
+        assert restored.describe() == sketch.describe()
+        assert len(restored.quantiles.levels) > 1
+
+    def test_update_is_incremental(self, tmp_path, monkeypatch):
+        """Yeni upload sadece kendi satırlarıyla işlenmeli, aynı upload iki kez sayılmamalı"""
+        monkeypatch.setattr(dataset_stats, "ARTIFACT_DIR", str(tmp_path))
+        rng = np.random.default_rng(1)
+        frames = [pd.DataFrame({
+            "quantity": rng.integers(1, 50, 1000).astype(float),
+            "sku": rng.choice(["A", "B"], 1000),
+            "order_date": pd.date_range("2024-01-01", periods=1000, freq="h") + pd.Timedelta(days=60 * i),
+        }) for i in range(3)]
+        frames[1].loc[::7, "quantity"] = np.nan
+
+        for upload_id, df in enumerate(frames):
+            update_stats(5, upload_id, df)
+        sketched = []
+        monkeypatch.setattr(dataset_stats, "sketch_frame", lambda df, chunk: sketched.append(len(df)) or sketch_frame(df))
+        update_stats(5, 2, frames[2])
+        update_stats(5, 3, frames[0].head(10))
+        summary = dataset_summary(5)
+
+        full = pd.concat(frames + [frames[0].head(10)], ignore_index=True)
+        assert sketched == [10]
+        assert summary["upload_ids"] == [0, 1, 2, 3]
+        assert summary["rows"] == len(full)
+        assert summary["nulls"]["quantity"] == full["quantity"].isna().sum()
+        assert summary["stats"]["quantity"]["mean"] == pytest.approx(full["quantity"].mean())
+        assert summary["stats"]["quantity"]["std"] == pytest.approx(full["quantity"].std())
+        assert summary["stats"]["order_date"]["max"] == full["order_date"].max()
+
+    def test_type_conflict_keeps_state(self, tmp_path, monkeypatch):
+        """Tipi değişen kolonun geçmişi silinmemeli, çakışma kaydedilmeli"""
+        monkeypatch.setattr(dataset_stats, "ARTIFACT_DIR", str(tmp_path))
+        first = pd.DataFrame({"code": [1.0, 2.0, 3.0], "quantity": [1.0, 2.0, 3.0]})
+        second = pd.DataFrame({"code": ["x", "y"], "quantity": [4.0, 5.0]})
+
+        update_stats(6, 1, first)
+        update_stats(6, 2, second)
+        summary = dataset_summary(6)
+
+        assert summary["stats"]["code"]["count"] == 3
+        assert summary["stats"]["code"]["mean"] == pytest.approx(2.0)
+        assert summary["stats"]["quantity"]["count"] == 5
+        assert summary["conflicts"] == {"code": [{"upload_id": 2, "kind": "categorical"}]}
+        assert load_stats(6)[1] == [1, 2]
+
+    def test_concurrent_processes_serialized(self, tmp_path, monkeypatch):
+        """Ayrı süreçlerden eşzamanlı güncellemeler birbirinin upload'unu kaybettirmemeli"""
+        pytest.importorskip("fcntl")
+        monkeypatch.setattr(dataset_stats, "ARTIFACT_DIR", str(tmp_path))
+        context = multiprocessing.get_context("fork")
+        frame = pd.DataFrame({"quantity": np.arange(2000, dtype=float)})
+
+        with ProcessPoolExecutor(4, mp_context=context) as pool:
+            list(pool.map(update_stats, [7] * 8, range(8), [frame] * 8))
+
+        summary = dataset_summary(7)
+        assert summary["upload_ids"] == list(range(8))
+        assert summary["rows"] == 8 * 2000
+
+    def test_summary_reads_one_version(self, tmp_path, monkeypatch):
+        """Okuma sırasında yeni sürüm yayınlansa da özet çözülen sürümden okunmalı"""
+        monkeypatch.setattr(dataset_stats, "ARTIFACT_DIR", str(tmp_path))
+        update_stats(8, 1, pd.DataFrame({"quantity": [1.0, 2.0, 3.0]}))
+        load = np.load
+
+        def load_and_republish(path, *args, **kwargs):
+            monkeypatch.setattr(np, "load", load)
+            dataset_stats.save_stats(8, sketch_frame(pd.DataFrame({"sku": ["A", "B"]})), [1, 2])
+            return load(path, *args, **kwargs)
+
+        monkeypatch.setattr(np, "load", load_and_republish)
+        summary = dataset_summary(8)
+
+        assert summary["upload_ids"] == [1]
+        assert summary["stats"]["quantity"]["count"] == 3
+        assert dataset_summary(8)["upload_ids"] == [1, 2]
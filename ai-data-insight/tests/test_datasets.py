@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import aggregates
+import dataset_stats
+import datasets
+import main
+from aggregates import AggregateCube
+from auth import get_current_tenant, get_current_user
+from database import get_db
+from datasets import LogicalDataset
+from models import Base, Tenant, Upload, User
+
+
+def _daily_file(path, start: str, days: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "sku": rng.choice(["A", "B"], days * 4),
+        "quantity": rng.integers(1, 20, days * 4),
+        "order_date": np.repeat(pd.date_range(start, periods=days, freq="D"), 4).strftime("%Y-%m-%d %H:%M"),
+    })
+    df.to_csv(path, index=False)
+    return df
+
+
+class TestDatasets:
+    """Upload'ları birleştiren mantıksal veri setlerinin testleri"""
+
+    @pytest.fixture
+    def artifact_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(aggregates, "ARTIFACT_DIR", str(tmp_path / "artifacts"))
+        monkeypatch.setattr(dataset_stats, "ARTIFACT_DIR", str(tmp_path / "artifacts"))
+        return tmp_path
+
+    @pytest.fixture
+    def monthly(self, artifact_dir):
+        """Üç aylık dosya ve kaydedilmiş cube'ları"""
+        partitions, frames = [], []
+        for upload_id, start in enumerate(["2024-01-01", "2024-02-01", "2024-03-01"], start=1):
+            path = artifact_dir / f"orders_{upload_id}.csv"
+            df = _daily_file(path, start, 28, upload_id)
+            cube = AggregateCube.build(df)
+            aggregates.save_cube(upload_id, cube)
+            days = cube.tables[None]["period"]
+            partitions.append((upload_id, str(path), days.min(), days.max(), len(df)))
+            frames.append(df)
+        return LogicalDataset("order_date", "quantity", partitions), pd.concat(frames, ignore_index=True)
+
+    def test_partition_pruning(self, monthly, monkeypatch):
+        """Tarih aralığı dışındaki bölümlerin dosyaları hiç açılmamalı"""
+        dataset, full = monthly
+        opened = []
+        read_csv = datasets.read_csv
+        monkeypatch.setattr(datasets, "read_csv", lambda path, **kw: opened.append(path) or read_csv(path, **kw))
+
+        assert [p[0] for p in dataset.prune("2024-02-10", "2024-03-05")] == [2, 3]
+        assert [p[0] for p in dataset.prune(end="2024-01-28")] == [1]
+        frame = dataset.to_frame("2024-02-10", "2024-03-05")
+
+        assert len(opened) == 2
+        dates = pd.to_datetime(full["order_date"])
+        assert len(frame) == ((dates >= "2024-02-10") & (dates < "2024-03-06")).sum()
+
+    def test_merged_cube_matches_full_data(self, monthly):
+        """Bölüm cube'larının birleşimi tüm verinin cube'uyla aynı olmalı"""
+        dataset, full = monthly
+
+        merged = dataset.cube()
+        expected = AggregateCube.build(full)
+
+        pd.testing.assert_frame_equal(merged.daily(), expected.daily())
+        pd.testing.assert_frame_equal(merged.query("month", "sku"), expected.query("month", "sku"))
+        ranged = dataset.cube("2024-02-10", "2024-02-20").daily()
+        assert ranged["order_date"].min() == pd.Timestamp("2024-02-10")
+        assert len(ranged) == 11
+
+    def test_cube_columns_match_dataset(self, monthly):
+        """Pipeline cube'u başka değer kolonuyla kurulmuşsa veri setinin kolonlarıyla yeniden kurulmalı"""
+        dataset, full = monthly
+        for upload_id, path, _, _, _ in dataset.partitions:
+            df = pd.read_csv(path)
+            df["price"] = 1.0
+            df.to_csv(path, index=False)
+            aggregates.save_cube(upload_id, AggregateCube.build(df, value_col="price"))
+
+        merged = dataset.cube()
+
+        assert merged.value_col == "quantity"
+        assert merged.daily()["quantity"].sum() == full["quantity"].sum()
+        # Pipeline cube'una dokunulmaz; kolon çiftinin cube'u ayrı saklanır
+        assert aggregates.load_cube(1).value_col == "price"
+        assert aggregates.load_cube(1, "order_date", "quantity") is not None
+
+    def test_dataset_api(self, artifact_dir):
+        """Upload'lar veri setine eklenip birleşik analiz edilebilmeli"""
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+        db = factory()
+        db.add(Tenant(id=2, name="Test", domain="test"))
+        db.add(User(id=2, email="a@test.com", hashed_password="x", tenant_id=2))
+        for upload_id, start in enumerate(["2024-01-01", "2024-01-29"], start=1):
+            path = artifact_dir / f"orders_{upload_id}.csv"
+            _daily_file(path, start, 28, upload_id)
+            db.add(Upload(id=upload_id, filename=path.name, path=str(path), status="ready", tenant_id=2, user_id=2))
+        db.add(Tenant(id=3, name="Diğer", domain="other"))
+        db.add(User(id=3, email="b@test.com", hashed_password="x", tenant_id=3))
+        db.add(Upload(id=3, filename="b.csv", path="b.csv", status="ready", tenant_id=3, user_id=3))
+        db.commit()
+        db.close()
+
+        def override_get_db():
+            session = factory()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        main.app.dependency_overrides[get_db] = override_get_db
+        try:
+            client = TestClient(main.app)
+            # Tenant token'dan gelir; oturumsuz istek reddedilmeli
+            assert client.get("/api/v1/datasets").status_code in (401, 403)
+            main.app.dependency_overrides[get_current_user] = lambda: User(id=2, tenant_id=2)
+            main.app.dependency_overrides[get_current_tenant] = lambda: Tenant(id=2)
+            dataset = client.post("/api/v1/datasets", params={"name": "2024"}).json()
+            assert client.post("/api/v1/datasets", params={"name": "2024"}).status_code == 400
+
+            for upload_id in (1, 2):
+                response = client.post(f"/api/v1/datasets/{dataset['id']}/uploads/{upload_id}")
+                assert response.status_code == 200
+            partitions = response.json()["partitions"]
+            assert [p["upload_id"] for p in partitions] == [1, 2]
+            assert partitions[1]["min_date"].startswith("2024-01-29")
+            # Cube eksikse bölüm eklenirken bir kez kurulup kaydedilmeli
+            assert aggregates.load_cube(2, "order_date", "quantity") is not None
+
+            analysis = client.get(f"/api/v1/datasets/{dataset['id']}/analysis", params={"start": "2024-02-01"}).json()
+            assert analysis["summary"]["scanned_partitions"] == 1
+            assert analysis["summary"]["min_date"] == "2024-02-01"
+            assert len(analysis["forecast"]) == 7
+
+            assert client.get(f"/api/v1/datasets/{dataset['id']}/analysis",
+                              params={"start": "2024-02-01", "end": "2024-01-01"}).status_code == 400
+            assert client.get("/api/v1/datasets/99/analysis").status_code == 404
+            assert client.post(f"/api/v1/datasets/{dataset['id']}/uploads/99").status_code == 404
+            # Başka tenant'ın upload'u eklenemez
+            assert client.post(f"/api/v1/datasets/{dataset['id']}/uploads/3").status_code == 404
+            # Değer kolonu olmayan upload bölüm olarak eklenmemeli
+            other = client.post("/api/v1/datasets", params={"name": "fiyat", "value_col": "price"}).json()
+            missing = client.post(f"/api/v1/datasets/{other['id']}/uploads/1")
+            assert missing.status_code == 400
+            assert "price" in missing.json()["detail"]
+
+            summary = client.get(f"/api/v1/datasets/{dataset['id']}/summary").json()
+            assert summary["upload_ids"] == [1, 2]
+            assert summary["rows"] == 2 * 28 * 4
+            assert summary["stats"]["order_date"]["min"].startswith("2024-01-01")
+        finally:
+            for dependency in (get_db, get_current_user, get_current_tenant):
+                main.app.dependency_overrides.pop(dependency, None)
@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from dates import DateFormatCache, column_date_format, date_format_key, format_cache, infer_date_format, parse_with_format
+from preprocess import Preprocessor
+
+
+def _strptime(values, fmt):
+    parsed = []
+    for value in values:
+        try:
+            parsed.append(datetime.strptime(value, fmt) if isinstance(value, str) else pd.NaT)
+        except ValueError:
+            parsed.append(pd.NaT)
+    return pd.to_datetime(pd.Series(parsed, dtype=object))
+
+
+class TestDateParsing:
+    """Vektörel tarih parser'ı ve format çıkarımının testleri"""
+
+    def test_vectorized_parser_matches_strptime(self):
+        """Sabit genişlikli parser strptime ile aynı sonucu (geçersizler NaT) vermeli"""
+        rng = np.random.default_rng(0)
+        stamps = pd.Timestamp("1999-01-01") + pd.to_timedelta(rng.integers(0, 10**9, 2000), unit="s")
+        values = pd.Series(list(stamps.strftime("%d/%m/%Y %H:%M")) + [
+            "29/02/2024 10:00", "29/02/2023 10:00", "31/04/2024 00:00", "1/2/2024 3:04",
+            "15/13/2024 10:00", "15/01/2024 24:00", "15/01/2024", "abc", None, "",
+        ])
+
+        parsed = parse_with_format(values, "%d/%m/%Y %H:%M")
+        expected = _strptime(values, "%d/%m/%Y %H:%M")
+
+        assert parsed.dtype == "datetime64[us]"
+        pd.testing.assert_series_equal(parsed, expected.astype("datetime64[us]"), check_names=False)
+        assert parsed.iloc[-10] == pd.Timestamp("2024-02-29 10:00")
+        assert parsed.iloc[-9:-7].isna().all()
+
+    def test_infer_format(self):
+        """Gün-önce, ISO ve ay-önce formatlar örneklemden doğru çıkarılmalı"""
+        assert infer_date_format(pd.Series(["05/03/2024 10:00", "25/03/2024 11:30"])) == "%d/%m/%Y %H:%M"
+        assert infer_date_format(pd.Series(["2024-03-05", "2024-03-25", None])) == "%Y-%m-%d"
+        assert infer_date_format(pd.Series(["03/25/2024", "03/05/2024"])) == "%m/%d/%Y"
+        assert infer_date_format(pd.Series(["05/03/2024", "06/03/2024"]), dayfirst=False) == "%m/%d/%Y"
+        # Tek tük bozuk değer formatı bozmamalı (ISO gün-önce okunmamalı)
+        assert infer_date_format(pd.Series(["2023-01-02", "bozuk", "2023-03-04"])) == "%Y-%m-%d"
+        assert infer_date_format(pd.Series(["merhaba", "dünya"])) is None
+        assert infer_date_format(pd.Series([None, None], dtype=object)) is None
+
+    def test_format_cache_revalidates(self, monkeypatch):
+        """Önbellekteki format kullanılmadan önce doğrulanmalı, uymuyorsa yeniden çıkarılmalı"""
+        monkeypatch.setattr("dates.format_cache", DateFormatCache(max_size=2))
+        import dates
+
+        key = date_format_key(1, ["tarih"], "tarih")
+        assert column_date_format(pd.Series(["25/03/2024"]), key) == "%d/%m/%Y"
+        assert dates.format_cache.get(key) == "%d/%m/%Y"
+        assert column_date_format(pd.Series(["2024-03-25"]), key) == "%Y-%m-%d"
+        assert dates.format_cache.get(key) == "%Y-%m-%d"
+
+        dates.format_cache.put("a", "%Y")
+        dates.format_cache.put("b", "%Y")
+        assert dates.format_cache.get(key) is None
+
+    def test_format_cache_scoped_and_exact(self, monkeypatch):
+        """Ay-önce format başka tenant'ın gün-önce kolonuna ve kısmen uyan örnekleme uygulanmamalı"""
+        monkeypatch.setattr("dates.format_cache", DateFormatCache())
+        import dates
+
+        us = date_format_key(1, ["order_date", "qty"], "order_date")
+        tr = date_format_key(2, ["order_date", "qty"], "order_date")
+        assert column_date_format(pd.Series(["03/25/2024", "03/05/2024"]), us) == "%m/%d/%Y"
+        assert dates.format_cache.get(tr) is None
+
+        # Yarısı ay-önce formata da uyar; eski %50 eşiğinde 05/03 -> 3 Mayıs okunurdu
+        day_first = pd.Series(["05/03/2024", "25/03/2024"])
+        assert column_date_format(day_first, tr) == "%d/%m/%Y"
+        assert column_date_format(day_first, us) == "%d/%m/%Y"
+        assert dates.format_cache.get(us) == "%d/%m/%Y"
+
+    def test_preprocessor_records_format(self, tmp_path):
+        """Preprocessor çıkarılan formatı profile yazmalı ve gün-önce parse etmeli"""
+        path = tmp_path / "orders.csv"
+        pd.DataFrame({
+            "sku": ["A"] * 20,
+            "quantity": range(20),
+            "order_date": pd.date_range("2024-01-01", periods=20, freq="D").strftime("%d/%m/%Y %H:%M"),
+        }).to_csv(path, index=False)
+
+        pre = Preprocessor(str(path))
+        pre.run()
+
+        assert pre.profile["date_formats"] == {"order_date": "%d/%m/%Y %H:%M"}
+        assert pre.df["order_date"].iloc[12] == pd.Timestamp("2024-01-13")
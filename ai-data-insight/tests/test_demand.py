@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import demand
+from demand import build_feature_matrix, load_predictions_page, predict_in_chunks, run_demand_prediction
+
+
+class QuantityModel:
+    """Tahmin olarak quantity * 2 döndüren sahte model"""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(len(X))
+        return X[:, 0] * 2
+
+
+class TestDemandPrediction:
+    """Batch demand tahmin aşamasının testleri"""
+
+    @pytest.fixture
+    def orders(self):
+        return pd.DataFrame({
+            'sku': ['A', 'B', 'A', None, 'C'],
+            'quantity': ['10', 20, None, 40, 50],
+            'price': [100.0, 200.0, 300.0, 400.0, 500.0],
+            'order_date': ['2023-01-01', '2023-02-15', '2023-03-31', 'bozuk', '2023-12-31']
+        })
+
+    @pytest.fixture
+    def artifact_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(demand, "ARTIFACT_DIR", str(tmp_path))
+        return tmp_path
+
+    def test_feature_matrix_layout(self, orders):
+        """Matris contiguous float32 olmalı ve DataFrame değişmemeli"""
+        original = orders.copy()
+        X = build_feature_matrix(orders)
+
+        assert X.dtype == np.float32
+        assert X.flags['C_CONTIGUOUS']
+        assert X.shape == (5, len(demand.DEMAND_FEATURES))
+        np.testing.assert_array_equal(X[:, 0], [10, 20, 0, 40, 50])
+        np.testing.assert_array_equal(X[1, 2:], [2, 2, 46])  # Şubat, Çarşamba, yılın 46. günü
+        np.testing.assert_array_equal(X[3, 2:], [0, 0, 0])  # Parse edilemeyen tarih
+        pd.testing.assert_frame_equal(orders, original)
+
+    def test_predict_in_chunks(self):
+        """Tahminler parça parça üretilip sırası korunmalı"""
+        X = np.arange(10, dtype=np.float32).reshape(-1, 1)
+        model = QuantityModel()
+
+        predictions = predict_in_chunks(model, X, chunk_size=4)
+
+        assert model.calls == [4, 4, 2]
+        np.testing.assert_array_equal(predictions, np.arange(10) * 2)
+
+    def test_predictions_are_persisted_and_paged(self, orders, artifact_dir):
+        """Tahminler kaydedilip sayfalı okunabilmeli"""
+        count = run_demand_prediction(1, orders, QuantityModel())
+        assert count == 5
+
+        page = load_predictions_page(1, offset=2, limit=2)
+
+        assert page["total"] == 5
+        assert [item["row_index"] for item in page["items"]] == [2, 3]
+        assert page["items"][0] == {
+            "row_index": 2, "predicted_demand": 0.0, "sku": "A", "order_date": "2023-03-31"
+        }
+        assert page["items"][1]["sku"] is None
+        assert page["items"][1]["order_date"] is None
+
+    def test_missing_predictions(self, artifact_dir):
+        """Tahmini olmayan upload için None dönmeli"""
+        assert load_predictions_page(999) is None
+
+    def test_page_reads_one_version(self, orders, artifact_dir, monkeypatch):
+        """Okuma sırasında yeni sürüm yayınlansa da sayfa çözülen sürümden okunmalı"""
+        run_demand_prediction(1, orders, QuantityModel())
+        load = np.load
+
+        def load_and_republish(path, *args, **kwargs):
+            monkeypatch.setattr(np, "load", load)
+            run_demand_prediction(1, orders.iloc[:1], QuantityModel())
+            return load(path, *args, **kwargs)
+
+        monkeypatch.setattr(np, "load", load_and_republish)
+        page = load_predictions_page(1, offset=0, limit=10)
+
+        assert page["total"] == 5
+        assert len(page["items"]) == 5
+        assert load_predictions_page(1)["total"] == 1
@@ -0,0 +1,90 @@
+import os
+
+import pandas as pd
+import pytest
+
+import events as events_module
+from events import analyze_event_file, analyze_event_upload, analyze_events, detect_event_columns, parse_timestamps
+from preprocess import Preprocessor
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(__file__)), "E-commerece sales data 2024.csv")
+
+
+class TestEventAnalysis:
+    """Oturum ve funnel analizinin testleri"""
+
+    @pytest.fixture
+    def events(self):
+        # u1: 2 oturum (40 dk boşluk), ilkinde view -> purchase
+        # u2: tek oturum, purchase view'dan önce (sıralı funnel sayılmaz)
+        # u3: tek olaylı oturum
+        return pd.DataFrame({
+            "user id": [1, 2, 1, 1, 2, 1, 3],
+            "product id": ["A", "B", "A", "A", "B", "C", "A"],
+            "Interaction type": ["view", "purchase", "like", "purchase", "view", "view", "like"],
+            "Time stamp": [
+                "10/10/2023 8:00", "10/10/2023 9:00", "10/10/2023 8:05", "10/10/2023 8:10",
+                "10/10/2023 9:20", "10/10/2023 8:50", "11/10/2023 8:00",
+            ],
+        })
+
+    def test_detect_columns(self, events):
+        """Farklı yazımlardaki event log kolonları tanınmalı"""
+        assert detect_event_columns(events.columns) == {
+            "user": "user id", "product": "product id",
+            "event_type": "Interaction type", "timestamp": "Time stamp",
+        }
+        assert detect_event_columns(["sku", "quantity", "order_date"]) is None
+
+    def test_timestamps_are_day_first(self):
+        """Örnekteki format (gün/ay/yıl) açıkça kullanılmalı"""
+        parsed = parse_timestamps(pd.Series(["13/10/2023 8:00", "01/11/2023 17:45"]))
+        assert parsed.tolist() == [pd.Timestamp("2023-10-13 08:00"), pd.Timestamp("2023-11-01 17:45")]
+
+    def test_sessions_and_funnel(self, events):
+        """Oturumlar boşluğa göre bölünmeli, funnel sıralı sayılmalı"""
+        result = analyze_events(events, gap_minutes=30)
+
+        assert result["events"] == 7
+        assert result["users"] == 3
+        assert result["sessions"] == 4
+        assert result["bounce_rate"] == 0.5
+        assert result["avg_session_duration_seconds"] == (600 + 1200) / 4
+        assert [s["sessions"] for s in result["funnel"]["stages"]] == [3, 2, 2]
+        assert result["funnel"]["view_to_purchase_sessions"] == 1
+        assert result["funnel"]["purchase_sessions_without_view"] == 1
+
+        products = {p["product_id"]: p for p in result["top_products"]}
+        assert products["A"] == {"product_id": "A", "views": 1, "likes": 2, "purchases": 1, "conversion_rate": 1.0}
+        assert products["B"]["conversion_rate"] == 1.0
+
+    def test_chunked_file_matches_in_memory(self, events, tmp_path):
+        """Parçalı/bölümlü dosya analizi bellekteki analizle aynı sonucu vermeli"""
+        path = tmp_path / "events.csv"
+        events.to_csv(path, index=False)
+
+        chunked = analyze_event_file(str(path), gap_minutes=30, chunk_size=2, partitions=3)
+        in_memory = analyze_events(events.astype(str), gap_minutes=30)
+
+        assert chunked == in_memory
+
+    def test_large_upload_uses_file_path(self, events, tmp_path, monkeypatch):
+        """Eşikten büyük upload'lar bellekteki çerçeve yerine dosyadan analiz edilmeli"""
+        path = tmp_path / "events.csv"
+        events.to_csv(path, index=False)
+        calls = []
+        monkeypatch.setattr(events_module, "analyze_event_file", lambda p: calls.append(p) or {"events": 7})
+
+        assert analyze_event_upload(str(path), events, min_file_rows=5) == {"events": 7}
+        assert calls == [str(path)]
+        assert analyze_event_upload(str(path), events, min_file_rows=100)["events"] == 7
+        assert len(calls) == 1
+
+    def test_bundled_dataset(self):
+        """Örnek e-ticaret event log'u Preprocessor'da event modu ile işlenmeli"""
+        pre = Preprocessor(DATASET)
+        pre.run()
+
+        result = pre.event_analysis
+        assert result["events"] == 2999
+        assert result["interaction_counts"] == {"view": 871, "like": 1145, "purchase": 855, "other": 128}
@@ -0,0 +1,172 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from auth import get_current_tenant, get_current_user
+from database import get_db
+from feature_store import aggregate_orders, load_customer_features, update_feature_store
+from main import app
+from models import Base, Customer, CustomerFeature, Tenant, Upload, User
+
+
+class TestFeatureStore:
+    """Upload'lardan beslenen müşteri feature store'unun testleri"""
+
+    @pytest.fixture
+    def session_factory(self):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+
+        db = factory()
+        db.add(Tenant(id=1, name="Test", domain="test"))
+        db.add(User(id=1, email="a@test.com", hashed_password="x", tenant_id=1))
+        for upload_id in (1, 2, 3):
+            db.add(Upload(id=upload_id, filename=f"{upload_id}.csv", path="-", tenant_id=1, user_id=1))
+        db.add(Customer(customer_id="C1", tenant_id=1, churned=0, total_orders=99,
+                        total_spent=1500.0, avg_order_value=15.0, last_login_date=datetime(2023, 1, 15)))
+        db.add(Customer(customer_id="C2", tenant_id=1, churned=1))
+        db.commit()
+        db.close()
+        return factory, engine
+
+    @staticmethod
+    def _orders(rows):
+        return pd.DataFrame(rows, columns=["customer_id", "quantity", "price", "order_date"])
+
+    def test_aggregate_orders(self):
+        """Müşteri başına sayı, harcama ve ilk/son sipariş tarihi"""
+        df = self._orders([
+            ["C1", 2, 10.0, "2023-01-01"],
+            ["C2", None, 5.0, "2023-01-05"],
+            ["C1", 1, 30.0, "2023-02-01"],
+            [None, 1, 1.0, "2023-03-01"],
+        ])
+
+        agg = aggregate_orders(df)
+
+        assert agg.loc["C1", "order_count"] == 2
+        assert agg.loc["C1", "total_spent"] == 50.0
+        assert agg.loc["C1", "last_order_date"] == pd.Timestamp("2023-02-01", tz="UTC")
+        assert agg.loc["C2", "total_spent"] == 0.0
+        assert len(agg) == 2
+
+    def test_incremental_update_touches_only_affected_customers(self, session_factory):
+        """İkinci upload sadece kendi müşterilerini okuyup güncellemeli"""
+        factory, engine = session_factory
+        db = factory()
+        update_feature_store(db, 1, 1, self._orders([
+            ["C1", 1, 10.0, "2023-01-01"],
+            ["C2", 1, 20.0, "2023-01-10"],
+            ["C3", 1, 30.0, "2023-01-20"],
+        ]))
+
+        statements = []
+        event.listen(engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, params, context, many: statements.append((statement, params)))
+        update_feature_store(db, 1, 2, self._orders([
+            ["C1", 2, 10.0, "2023-03-01"],
+            ["C4", 1, 5.0, "2023-03-02"],
+        ]))
+        db.close()
+
+        feature_selects = [p for s, p in statements if s.lstrip().startswith("SELECT") and "customer_features" in s]
+        assert len(feature_selects) == 1
+        assert set(v for v in feature_selects[0] if isinstance(v, str)) == {"C1", "C4"}
+
+        db = factory()
+        rows = {r.customer_id: r for r in db.query(CustomerFeature).all()}
+        assert rows["C1"].order_count == 2
+        assert rows["C1"].total_spent == 30.0
+        assert rows["C1"].first_order_date.date().isoformat() == "2023-01-01"
+        assert rows["C1"].last_order_date.date().isoformat() == "2023-03-01"
+        assert rows["C2"].order_count == 1
+        assert set(rows) == {"C1", "C2", "C3", "C4"}
+
+        # Yüklenmiş Customer toplamları korunmalı, boş olanlar store'dan doldurulmalı
+        customers = {c.customer_id: c for c in db.query(Customer).all()}
+        assert customers["C1"].total_orders == 99
+        assert customers["C1"].total_spent == 1500.0
+        assert customers["C1"].last_login_date.date().isoformat() == "2023-03-01"
+        assert customers["C2"].total_orders == 1
+        assert customers["C2"].avg_order_value == 20.0
+        db.close()
+
+    def test_concurrent_sessions_accumulate(self, session_factory):
+        """Başka bir session'ın eklediği satır üzerine toplamlar eklenmeli"""
+        factory, _ = session_factory
+        first, second = factory(), factory()
+        # İkinci session store'u okuduktan sonra birincisi aynı müşteriyi ekliyor
+        assert second.query(CustomerFeature).count() == 0
+        update_feature_store(first, 1, 1, self._orders([["C9", 1, 10.0, "2023-02-01"]]))
+        update_feature_store(second, 1, 2, self._orders([
+            ["C9", 2, 5.0, "2023-01-01"],
+            ["C9", 1, 5.0, "2023-03-01"],
+        ]))
+        first.close()
+        second.close()
+
+        db = factory()
+        row = db.query(CustomerFeature).filter(CustomerFeature.customer_id == "C9").one()
+        assert row.order_count == 3
+        assert row.total_quantity == 4
+        assert row.total_spent == 25.0
+        assert row.first_order_date.date().isoformat() == "2023-01-01"
+        assert row.last_order_date.date().isoformat() == "2023-03-01"
+        db.close()
+
+    def test_same_upload_is_not_counted_twice(self, session_factory):
+        """Aynı upload tekrar işlenirse toplamlar değişmemeli"""
+        factory, _ = session_factory
+        db = factory()
+        orders = self._orders([["C1", 1, 10.0, "2023-01-01"]])
+
+        assert update_feature_store(db, 1, 1, orders) is not None
+        assert update_feature_store(db, 1, 1, orders) is None
+        assert db.query(CustomerFeature).one().order_count == 1
+        db.close()
+
+    def test_rfm_scores_and_endpoint(self, session_factory):
+        """RFM skorları hesaplanmalı ve endpoint sayfalı dönmeli"""
+        factory, _ = session_factory
+        db = factory()
+        update_feature_store(db, 1, 1, self._orders(
+            [[f"C{i}", i, 10.0, f"2023-01-{i:02d}"] for i in range(1, 11) for _ in range(i)]
+        ))
+
+        features = load_customer_features(db, 1, as_of=datetime(2023, 2, 1, tzinfo=timezone.utc))
+        db.close()
+
+        best = features.set_index("customer_id").loc["C10"]
+        worst = features.set_index("customer_id").loc["C1"]
+        assert best["recency_days"] == 22
+        assert best["rfm_score"] == "555"
+        assert worst["rfm_score"] == "111"
+
+        def override_get_db():
+            session = factory()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_user] = lambda: User(id=1, tenant_id=1)
+        app.dependency_overrides[get_current_tenant] = lambda: Tenant(id=1)
+        try:
+            response = TestClient(app).get("/api/v1/feature-store/customers?offset=8&limit=5")
+        finally:
+            for dependency in (get_db, get_current_user, get_current_tenant):
+                app.dependency_overrides.pop(dependency, None)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total"] == 10
+        assert [item["customer_id"] for item in body["items"]] == ["C8", "C9"]
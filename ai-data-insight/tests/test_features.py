@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import ChurnFeaturePipeline, NUMERIC_FEATURES
+
+NOW = pd.Timestamp("2024-01-31", tz="UTC")
+
+
+class TestChurnFeaturePipeline:
+    """Eğitim ve tahminde ortak kullanılan feature pipeline'ının testleri"""
+
+    @pytest.fixture
+    def customers(self):
+        return pd.DataFrame({
+            'age': [30, None, 50],
+            'gender': ['M', 'F', None],
+            'segment': ['Gold', 'Silver', 'Gold'],
+            'subscription_length': [100, None, 300],
+            'last_login_date': ['2024-01-01', None, '2024-01-21'],
+            'total_orders': [5, 0, None],
+            'total_spent': [500.0, None, 100.0],
+            'avg_order_value': [100.0, 0.0, None],
+            'churned': [0, 1, 0],
+        })
+
+    def test_fit_learns_vocabulary_and_medians(self, customers):
+        """Sözlükler sıralı, eksik kategori 'Unknown', age medyanı öğrenilmeli"""
+        pipeline = ChurnFeaturePipeline().fit(customers)
+
+        assert pipeline.vocabularies == {'gender': ['F', 'M', 'Unknown'], 'segment': ['Gold', 'Silver']}
+        assert pipeline.fill_values['age'] == 40.0
+        assert pipeline.feature_names == NUMERIC_FEATURES + [
+            'gender_F', 'gender_M', 'gender_Unknown', 'segment_Gold', 'segment_Silver'
+        ]
+
+    def test_transform(self, customers):
+        """Numerik doldurma ve one-hot kodlama vektörel yapılmalı"""
+        pipeline = ChurnFeaturePipeline().fit(customers)
+        X = pipeline.transform(customers, now=NOW)
+
+        np.testing.assert_array_equal(X[:, 0], [30, 40, 50])  # age (medyan)
+        np.testing.assert_array_equal(X[:, 1], [100, 0, 300])  # subscription_length
+        np.testing.assert_array_equal(X[:, 2], [30, 365, 10])  # days_since_last_login
+        np.testing.assert_array_equal(X[:, 6:], [
+            [0, 1, 0, 1, 0],
+            [1, 0, 0, 0, 1],
+            [0, 0, 1, 1, 0],
+        ])
+
+    def test_same_features_at_train_and_predict_time(self, customers, tmp_path):
+        """Kaydedilip yüklenen pipeline tek satırda ve batch'te aynı sonucu vermeli"""
+        pipeline = ChurnFeaturePipeline().fit(customers)
+        path = tmp_path / "churn_model.features.json"
+        pipeline.save(str(path))
+        loaded = ChurnFeaturePipeline.load(str(path))
+
+        batch = loaded.transform(customers.drop(columns='churned'), now=NOW)
+        single = loaded.transform(customers.iloc[[2]], now=NOW)
+
+        np.testing.assert_array_equal(batch, pipeline.transform(customers, now=NOW))
+        np.testing.assert_array_equal(single[0], batch[2])
+
+    def test_unseen_categories(self, customers):
+        """Sözlükte olmayan kategori tüm dummy'lerde 0 olmalı ve raporlanmalı"""
+        pipeline = ChurnFeaturePipeline().fit(customers)
+        new = pd.DataFrame({'age': [20], 'gender': ['X'], 'segment': ['Platinum']})
+
+        assert pipeline.unseen_categories(new) == ['gender_X', 'segment_Platinum']
+        assert pipeline.transform(new, now=NOW)[0, 6:].sum() == 0
+
+    def test_legacy_models_without_pipeline_file(self):
+        """Eski modellerin feature listesinden pipeline oluşturulabilmeli"""
+        names = NUMERIC_FEATURES + ['gender_Female', 'gender_Male', 'segment_Premium']
+        pipeline = ChurnFeaturePipeline.from_feature_names(names)
+
+        assert pipeline.feature_names == names
+        X = pipeline.transform(pd.DataFrame({'gender': ['Male'], 'segment': ['Premium']}), now=NOW)
+        assert np.isnan(X[0, 0])  # age medyanı bilinmiyor, LightGBM eksik değer olarak işler
+        np.testing.assert_array_equal(X[0, 6:], [0, 1, 1])
+
+        with pytest.raises(ValueError):
+            ChurnFeaturePipeline.from_feature_names(['age', 'segment_Premium', 'gender_Male'])
@@ -0,0 +1,98 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import orchestrator
+from models import Base, Customer, Tenant
+from orchestrator import list_trainable_tenants, plan_resources, run_fleet_training
+
+
+class TestFleetTraining:
+    """Çok tenant'lı paralel eğitim orkestratörünün testleri"""
+
+    @pytest.fixture
+    def session_factory(self, monkeypatch, tmp_path):
+        """Farklı müşteri sayılarına sahip tenant'lar içeren SQLite veritabanı"""
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+
+        db = factory()
+        tenants = [
+            Tenant(name="Küçük", domain="kucuk"),
+            Tenant(name="Büyük", domain="buyuk"),
+            Tenant(name="Orta", domain="orta"),
+            Tenant(name="Pasif", domain="pasif", is_active=False),
+        ]
+        db.add_all(tenants)
+        db.commit()
+
+        labelled = {tenants[0].id: 3, tenants[1].id: 30, tenants[2].id: 12, tenants[3].id: 50}
+        for tenant_id, count in labelled.items():
+            for i in range(count):
+                db.add(Customer(customer_id=f"C{tenant_id}-{i}", tenant_id=tenant_id, churned=i % 2))
+        # Etiketsiz müşteriler sayılmamalı
+        for i in range(20):
+            db.add(Customer(customer_id=f"U-{i}", tenant_id=tenants[0].id, churned=None))
+        db.commit()
+        ids = {t.name: t.id for t in tenants}
+        db.close()
+
+        monkeypatch.setattr(orchestrator, "SessionLocal", factory)
+        monkeypatch.setattr(orchestrator, "TRAINING_REPORT_DIR", str(tmp_path))
+        return factory, ids
+
+    def test_list_trainable_tenants(self, session_factory):
+        """Sadece yeterli etiketli müşterisi olan aktif tenant'lar, büyükten küçüğe"""
+        factory, ids = session_factory
+        db = factory()
+        try:
+            tenants = list_trainable_tenants(db, min_customers=10)
+        finally:
+            db.close()
+
+        assert tenants == [(ids["Büyük"], 30), (ids["Orta"], 12)]
+
+    def test_plan_resources_does_not_oversubscribe(self):
+        """process x thread çekirdek sayısını aşmamalı"""
+        assert plan_resources(8, max_workers=4) == (4, 2)
+        assert plan_resources(8, max_workers=3) == (3, 2)
+        assert plan_resources(4, max_workers=16) == (4, 1)
+        assert plan_resources(8, max_workers=2, threads_per_job=16) == (2, 4)
+        assert plan_resources(1) == (1, 1)
+
+    def test_run_fleet_training_collects_results(self, session_factory):
+        """Her tenant için sonuç toplanmalı, hatalı işler diğerlerini durdurmamalı"""
+        _, ids = session_factory
+        calls = []
+
+        def fake_job(tenant_id, num_threads, incremental):
+            calls.append((tenant_id, num_threads))
+            if tenant_id == ids["Orta"]:
+                raise RuntimeError("eğitim hatası")
+            return {
+                'tenant_id': tenant_id, 'success': True, 'model_id': 1, 'rows': 30,
+                'duration_seconds': 0.1, 'peak_memory_mb': 100.0,
+            }
+
+        report = run_fleet_training(
+            max_workers=2, threads_per_job=1, min_customers=10,
+            job=fake_job, executor_factory=lambda workers: ThreadPoolExecutor(workers)
+        )
+
+        assert sorted(calls) == sorted([(ids["Büyük"], 1), (ids["Orta"], 1)])
+        assert report['tenant_count'] == 2
+        assert report['succeeded'] == 1
+        assert report['failed'] == 1
+        failed = next(r for r in report['results'] if not r['success'])
+        assert failed['tenant_id'] == ids["Orta"]
+        assert "eğitim hatası" in failed['error']
+
+        with open(report['report_path'], encoding="utf-8") as f:
+            assert json.load(f)['succeeded'] == 1
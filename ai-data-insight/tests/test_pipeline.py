@@ -0,0 +1,211 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from artifacts import Cancelled, write_dir
+from pipeline import PipelineDAG, PipelineError, Stage
+from preprocess import Preprocessor
+
+
+def _orders_csv(path, days: int = 30):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "order_date": pd.date_range("2024-01-01", periods=days).strftime("%Y-%m-%d"),
+        "sku": ["A", "B"] * (days // 2),
+        "quantity": rng.integers(1, 20, days),
+    })
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+class TestPipelineDAG:
+    """Bildirimsel pipeline DAG yürütücüsünün testleri"""
+
+    def test_dependencies_and_outputs(self):
+        """Aşamalar girdileri hazır olunca çalışmalı, çoklu çıktı isimlere dağıtılmalı"""
+        dag = PipelineDAG([
+            Stage("total", lambda a, b: a + b, inputs=("a", "b"), outputs=("total",)),
+            Stage("split", lambda total: (total // 2, total % 2), inputs=("total",), outputs=("half", "rest")),
+        ])
+        values, report = dag.run({"a": 3, "b": 4})
+
+        assert (values["total"], values["half"], values["rest"]) == (7, 3, 1)
+        assert report["total"]["status"] == report["split"]["status"] == "completed"
+
+    def test_independent_stages_run_concurrently(self):
+        """Aynı girdiye bağlı bağımsız aşamalar aynı anda çalışmalı"""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def branch(x):
+            barrier.wait()
+            return x
+
+        dag = PipelineDAG([
+            Stage(name, branch, inputs=("x",), outputs=(name,)) for name in ("anomaly", "forecast", "demand")
+        ], max_workers=3)
+        values, report = dag.run({"x": 1})
+
+        assert all(report[name]["status"] == "completed" for name in ("anomaly", "forecast", "demand"))
+
+    def test_timeout_isolated(self):
+        """Zaman aşımına uğrayan aşama varsayılan değeri almalı, diğerleri etkilenmemeli"""
+        release = threading.Event()
+
+        def slow(x):
+            release.wait(5)
+            return "geç"
+
+        dag = PipelineDAG([
+            Stage("slow", slow, inputs=("x",), outputs=("slow",), timeout=0.2, defaults={"slow": "yok"}),
+            Stage("fast", lambda x: x * 2, inputs=("x",), outputs=("fast",)),
+            Stage("after", lambda fast: fast + 1, inputs=("fast",), outputs=("after",)),
+        ])
+        started = time.monotonic()
+        values, report = dag.run({"x": 5})
+        release.set()
+
+        assert time.monotonic() - started < 2
+        assert report["slow"]["status"] == "timeout"
+        assert values["slow"] == "yok"
+        assert values["after"] == 11
+
+    def test_failure_uses_defaults(self):
+        """Zorunlu olmayan aşamanın hatası raporlanmalı, bağımlı aşamalar varsayılanla çalışmalı"""
+        def broken(x):
+            raise RuntimeError("bozuk")
+
+        dag = PipelineDAG([
+            Stage("broken", broken, inputs=("x",), outputs=("items",), defaults={"items": []}),
+            Stage("count", lambda items: len(items), inputs=("items",), outputs=("count",)),
+        ])
+        values, report = dag.run({"x": 1})
+
+        assert report["broken"] == {"status": "failed", "seconds": report["broken"]["seconds"], "error": "bozuk"}
+        assert values["count"] == 0
+
+    def test_required_failure_raises(self):
+        """Zorunlu aşamanın hatası PipelineError olarak yükselmeli"""
+        def broken():
+            raise ValueError("okunamadı")
+
+        dag = PipelineDAG([Stage("load", broken, outputs=("raw",), required=True)])
+        with pytest.raises(PipelineError) as info:
+            dag.run()
+        assert info.value.stage == "load"
+        assert isinstance(info.value.error, ValueError)
+
+    def test_validation(self):
+        """Eksik girdi, döngü ve çakışan çıktılar reddedilmeli"""
+        with pytest.raises(ValueError):
+            PipelineDAG([Stage("a", int, inputs=("missing",), outputs=("a",))]).run()
+        with pytest.raises(ValueError):
+            PipelineDAG([
+                Stage("a", int, inputs=("b",), outputs=("a",)),
+                Stage("b", int, inputs=("a",), outputs=("b",)),
+            ]).run()
+        with pytest.raises(ValueError):
+            PipelineDAG([Stage("a", int, outputs=("x",)), Stage("b", int, outputs=("x",))])
+
+    def test_restored_stages_skipped(self):
+        """Çıktıları başlangıç değerlerinde olan ve artık gerekmeyen aşamalar çalışmamalı"""
+        def load():
+            raise AssertionError("Çalışmamalı")
+
+        dag = PipelineDAG([
+            Stage("load", load, outputs=("raw", "kind")),
+            Stage("clean", lambda raw: raw, inputs=("raw",), outputs=("clean",)),
+            Stage("count", lambda clean, kind: f"{kind}:{len(clean)}", inputs=("clean", "kind"), outputs=("count",)),
+        ])
+        values, report = dag.run({"clean": [1, 2], "kind": "csv"})
+
+        assert values["count"] == "csv:2"
+        assert report["load"]["status"] == report["clean"]["status"] == "restored"
+
+    def test_timed_out_stage_does_not_publish(self, tmp_path):
+        """Zaman aşımıyla terk edilen aşama sonradan bitse de artefakt yayınlamamalı"""
+        release, finished = threading.Event(), threading.Event()
+        target = tmp_path / "predictions"
+        errors = []
+
+        def slow(x, cancelled):
+            release.wait(5)
+            try:
+                with write_dir(str(target), cancelled) as tmp:
+                    with open(os.path.join(tmp, "meta.json"), "w") as f:
+                        f.write("geç")
+            except Cancelled as e:
+                errors.append(e)
+            finished.set()
+            return x
+
+        dag = PipelineDAG([
+            Stage("slow", slow, inputs=("x",), outputs=("slow",), timeout=0.2, cancellable=True),
+        ])
+        values, report = dag.run({"x": 1})
+        release.set()
+        finished.wait(5)
+
+        assert report["slow"]["status"] == "timeout"
+        assert len(errors) == 1
+        assert not target.exists()
+        assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    def test_required_failure_cancels_running(self):
+        """Zorunlu aşama hatasında hâlâ süren aşamalara iptal bildirilmeli"""
+        started, seen = threading.Event(), []
+
+        def slow(x, cancelled):
+            started.set()
+            seen.append(cancelled.wait(5))
+
+        def broken(x):
+            started.wait(5)
+            raise ValueError("okunamadı")
+
+        dag = PipelineDAG([
+            Stage("slow", slow, inputs=("x",), cancellable=True),
+            Stage("load", broken, inputs=("x",), required=True),
+        ], max_workers=2)
+        with pytest.raises(PipelineError):
+            dag.run({"x": 1})
+
+        for _ in range(50):
+            if seen:
+                break
+            time.sleep(0.1)
+        assert seen == [True]
+
+
+class TestPreprocessorStages:
+    """Preprocessor'ın DAG aşamalarıyla çalışmasının testleri"""
+
+    def test_run_reports_stages(self, tmp_path):
+        """run() tüm aşamaları raporlamalı ve eski dönüş değerlerini korumalı"""
+        pre = Preprocessor(_orders_csv(tmp_path / "orders.csv"))
+        df, summary, anomaly_count, forecast = pre.run()
+
+        assert set(pre.stage_report) == {
+            "load", "event_analysis", "clean", "roles", "summary", "aggregate", "anomaly", "forecast"
+        }
+        assert all(entry["status"] == "completed" for entry in pre.stage_report.values())
+        assert len(df) == 30 and pre.cube is not None
+        assert isinstance(anomaly_count, int) and len(forecast) > 0
+
+    def test_failed_analysis_isolated(self, tmp_path, monkeypatch):
+        """Forecast hatası preprocessing'i durdurmamalı; ek aşama aynı çalıştırmada çalışmalı"""
+        def broken(*args, **kwargs):
+            raise RuntimeError("model yok")
+
+        monkeypatch.setattr("preprocess.forecast_sales", broken)
+        pre = Preprocessor(_orders_csv(tmp_path / "orders.csv"))
+        extra = Stage("rows", lambda frame: len(frame), inputs=("frame",), outputs=("rows",))
+        df, summary, anomaly_count, forecast = pre.run([extra])
+
+        assert forecast == []
+        assert pre.stage_report["forecast"]["status"] == "failed"
+        assert pre.values["rows"] == 30
+
@@ -0,0 +1,188 @@
+import gzip
+import io
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import aggregates
+import checkpoints
+import dataset_stats
+import demand
+import main
+from database import get_db
+from models import Base, Tenant, User
+from preview import ReservoirSampler, build_preview
+from result_cache import result_cache
+
+
+def _orders_csv(rows: int) -> bytes:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "sku": rng.choice(["A", "B", "C"], rows, p=[0.5, 0.3, 0.2]),
+        "quantity": rng.integers(1, 10, rows),
+        "price": rng.uniform(5, 50, rows).round(2),
+        "customer_id": [f"C{i % 50}" for i in range(rows)],
+        "order_date": pd.date_range("2024-01-01", periods=rows, freq="h").strftime("%Y-%m-%d"),
+    })
+    return df.to_csv(index=False).encode()
+
+
+class TestPreview:
+    """Upload sırasında örneklemden önizleme sonucunun testleri"""
+
+    def test_reservoir_sampler_streams_lines(self):
+        """Parça sınırlarında bölünen satırlar bozulmamalı, örneklem boyu sabit olmalı"""
+        data = b"a,b\n" + b"".join(f"{i},{i * 2}\n".encode() for i in range(10_000))
+        sampler = ReservoirSampler(500, seed=1)
+        for start in range(0, len(data), 333):
+            sampler.feed(data[start:start + 333])
+        sampler.close()
+
+        sample = sampler.frame()
+        assert sampler.seen == 10_000
+        assert list(sample.columns) == ["a", "b"]
+        assert len(sample) == 500
+        assert (sample["b"] == sample["a"] * 2).all()
+        # Örneklem dosyanın tamamına yayılmalı
+        assert sample["a"].max() > 9000 and sample["a"].min() < 1000
+
+    def test_preview_scales_to_full_upload(self):
+        """Örneklem toplamları tüm upload'a ölçeklenmeli"""
+        sample = pd.DataFrame({"sku": ["A", "A", "B"], "quantity": [1, 2, 3]})
+
+        summary, insights = build_preview(sample, total_rows=300)
+
+        assert summary["rows"] == 300
+        assert summary["sample_rows"] == 3
+        assert insights["top_skus"] == {"A": 300.0, "B": 300.0}
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+        db = factory()
+        db.add(Tenant(id=2, name="Test", domain="test"))
+        db.add(User(id=2, email="a@test.com", hashed_password="x", tenant_id=2))
+        db.commit()
+        db.close()
+
+        def override_get_db():
+            session = factory()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        background = []
+        process_upload = main.process_upload
+        monkeypatch.setattr(main, "UPLOAD_DIR", str(tmp_path))
+        # Tam analiz artefaktları depodaki ./artifacts yerine geçici klasöre yazılır
+        for module in (aggregates, checkpoints, dataset_stats, demand):
+            monkeypatch.setattr(module, "ARTIFACT_DIR", str(tmp_path / "artifacts"))
+        monkeypatch.setattr(main, "process_upload", lambda *args: background.append(args))
+        main.app.dependency_overrides[get_db] = override_get_db
+        yield TestClient(main.app), factory, background, process_upload
+        main.app.dependency_overrides.pop(get_db, None)
+
+    def test_preview_then_exact_result(self, client):
+        """Sonuç önce preview, tam analiz bitince exact olarak dönmeli"""
+        client, factory, background, process_upload = client
+
+        upload = client.post("/api/v1/upload", files={"file": ("orders.csv", _orders_csv(3000), "text/csv")})
+        upload_id = upload.json()["upload_id"]
+        result_cache.invalidate(upload_id)
+
+        preview = client.get(f"/api/v1/upload/{upload_id}/result")
+        assert preview.status_code == 200
+        assert preview.json()["precision"] == "preview"
+        assert preview.json()["summary"]["rows"] == 3000
+        assert "no-cache" in preview.headers["cache-control"]
+        assert set(preview.json()["insights"]["top_skus"]) == {"A", "B", "C"}
+
+        # Arka plan işi: tam analiz önizleme kaydının yerine yazılır
+        (_, path, _), = background
+        db = factory()
+        process_upload(upload_id, path, db)
+        db.close()
+
+        exact = client.get(f"/api/v1/upload/{upload_id}/result", headers={"If-None-Match": preview.headers["etag"]})
+        assert exact.status_code == 200
+        assert exact.json()["precision"] == "exact"
+        assert exact.json()["summary"]["rows"] == 3000
+        assert exact.headers["etag"] != preview.headers["etag"]
+        result_cache.invalidate(upload_id)
+
+    @pytest.mark.parametrize("filename", ["orders.csv.gz", "orders.zip", "orders.csv"])
+    def test_compressed_upload(self, client, monkeypatch, filename):
+        """Sıkıştırılmış upload'lar olduğu gibi saklanıp akışla analiz edilmeli"""
+        client, factory, background, process_upload = client
+        monkeypatch.setattr(main, "UPLOAD_STORE_COMPRESSED", True)
+        data = _orders_csv(3000)
+        if filename.endswith(".gz"):
+            data = gzip.compress(data)
+        elif filename.endswith(".zip"):
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr("orders.csv", data)
+            data = buffer.getvalue()
+
+        upload = client.post("/api/v1/upload", files={"file": (filename, data, "application/octet-stream")})
+        upload_id = upload.json()["upload_id"]
+        result_cache.invalidate(upload_id)
+        preview = client.get(f"/api/v1/upload/{upload_id}/result").json()
+        assert preview["summary"]["rows"] == 3000
+
+        (_, path, _), = background
+        # Düz CSV diskte gzip olarak saklanır
+        assert path.endswith(".gz") or path.endswith(".zip")
+        assert os.path.getsize(path) < len(_orders_csv(3000))
+        db = factory()
+        process_upload(upload_id, path, db)
+        db.close()
+
+        exact = client.get(f"/api/v1/upload/{upload_id}/result").json()
+        assert exact["precision"] == "exact"
+        assert exact["summary"]["rows"] == 3000
+        result_cache.invalidate(upload_id)
+
+    @pytest.mark.parametrize("filename", ["orders.csv.gz", "orders.zip"])
+    def test_upload_work_off_event_loop(self, client, monkeypatch, filename):
+        """Parça başına sıkıştırma/örnekleme thread'de yapılmalı; zip yanıttan önce açılmamalı"""
+        client, factory, background, process_upload = client
+        monkeypatch.setattr(main, "UPLOAD_CHUNK_SIZE", 4096)
+        calls = []
+        run_in_threadpool = main.run_in_threadpool
+
+        async def recording(func, *args, **kwargs):
+            calls.append(func.__name__)
+            return await run_in_threadpool(func, *args, **kwargs)
+
+        monkeypatch.setattr(main, "run_in_threadpool", recording)
+        data = _orders_csv(3000)
+        if filename.endswith(".gz"):
+            data = gzip.compress(data)
+        else:
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr("orders.csv", data)
+            data = buffer.getvalue()
+
+        upload = client.post("/api/v1/upload", files={"file": (filename, data, "application/octet-stream")})
+        upload_id = upload.json()["upload_id"]
+        result_cache.invalidate(upload_id)
+
+        assert calls.count("_write_chunk") == -(-len(data) // 4096)
+        assert "_sample_stored" not in calls
+        # Zip önizlemesi arka plan işinde üretilir
+        assert client.get(f"/api/v1/upload/{upload_id}/result").json()["summary"]["rows"] == 3000
+        result_cache.invalidate(upload_id)
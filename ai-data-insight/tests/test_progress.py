@@ -0,0 +1,141 @@
+import asyncio
+import json
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import progress
+from auth import get_current_tenant, get_current_user
+from database import get_db
+from main import app
+from models import Base, Tenant, Upload, User
+from progress import ProgressBroker, build_event, format_sse, is_terminal, stage_progress
+
+
+class TestProgressBroker:
+    """İlerleme pub/sub testleri"""
+
+    def test_stage_progress_values(self):
+        """Aşama yüzdeleri monoton artmalı"""
+        assert stage_progress("started") == 0
+        assert stage_progress("processing") < stage_progress("preprocessing_completed")
+        assert stage_progress("preprocessing_completed") < stage_progress("completed")
+        assert stage_progress("unknown_stage") == 0
+
+    def test_terminal_detection(self):
+        """completed ve failed olayları akışı bitirmeli"""
+        assert is_terminal(build_event(1, "completed"))
+        assert is_terminal(build_event(1, "failed"))
+        assert not is_terminal(build_event(1, "preprocessing_completed"))
+
+    def test_format_sse(self):
+        """SSE formatı event ve data satırı içermeli"""
+        payload = format_sse(build_event(1, "processing", "Dosya analiz ediliyor..."))
+        lines = payload.strip().split("\n")
+        assert lines[0] == "event: progress"
+        data = json.loads(lines[1][len("data: "):])
+        assert data["status"] == "processing"
+        assert data["progress"] == 10
+        assert payload.endswith("\n\n")
+
+    def test_publish_from_worker_thread(self):
+        """Başka thread'den yayınlanan olay aboneye ulaşmalı"""
+        broker = ProgressBroker()
+
+        async def scenario():
+            queue = broker.subscribe(7)
+            worker = threading.Thread(
+                target=broker.publish, args=(7, build_event(7, "preprocessing_completed"))
+            )
+            worker.start()
+            event = await asyncio.wait_for(queue.get(), timeout=2)
+            worker.join()
+            broker.unsubscribe(7, queue)
+            return event
+
+        event = asyncio.run(scenario())
+        assert event["status"] == "preprocessing_completed"
+        assert event["progress"] == 60
+        assert broker.subscriber_count(7) == 0
+        assert broker.last_event(7)["status"] == "preprocessing_completed"
+
+    def test_slow_subscriber_keeps_latest_events(self, monkeypatch):
+        """Kuyruk dolduğunda en eski olay düşmeli"""
+        monkeypatch.setattr(progress, "SUBSCRIBER_QUEUE_SIZE", 2)
+        broker = ProgressBroker()
+
+        async def scenario():
+            queue = broker.subscribe(3)
+            for stage in ["started", "processing", "completed"]:
+                broker.publish(3, build_event(3, stage))
+            await asyncio.sleep(0)
+            return [queue.get_nowait()["status"] for _ in range(queue.qsize())]
+
+        assert asyncio.run(scenario()) == ["processing", "completed"]
+
+
+class TestProgressEndpoint:
+    """SSE endpoint testleri"""
+
+    @pytest.fixture
+    def client(self):
+        """Tenant 1 kullanıcısı olarak istek atan client; upload 42 tenant 1'in, 43 tenant 2'nin"""
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+        db = factory()
+        for tenant_id in (1, 2):
+            db.add(Tenant(id=tenant_id, name=f"T{tenant_id}", domain=f"t{tenant_id}"))
+            db.add(User(id=tenant_id, email=f"u{tenant_id}@test.com", hashed_password="x", tenant_id=tenant_id))
+        db.add(Upload(id=42, filename="a.csv", path="a.csv", status="ready", tenant_id=1, user_id=1))
+        db.add(Upload(id=43, filename="b.csv", path="b.csv", status="processing", tenant_id=2, user_id=2))
+        db.commit()
+        user, tenant = db.get(User, 1), db.get(Tenant, 1)
+        db.close()
+
+        def override_get_db():
+            session = factory()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_user] = lambda: user
+        app.dependency_overrides[get_current_tenant] = lambda: tenant
+        yield TestClient(app)
+        for dependency in (get_db, get_current_user, get_current_tenant):
+            app.dependency_overrides.pop(dependency, None)
+
+    def test_finished_upload_streams_snapshot_and_closes(self, client, monkeypatch):
+        """Bitmiş upload için son olay gönderilip akış kapanmalı"""
+        broker = ProgressBroker()
+        broker.publish(42, build_event(42, "completed", "Analiz tamamlandı", "ready"))
+        monkeypatch.setattr("main.progress_broker", broker)
+
+        response = client.get("/api/v1/upload/42/events")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert '"status": "completed"' in response.text
+        assert broker.subscriber_count(42) == 0
+
+    def test_other_tenant_upload_not_streamed(self, client, monkeypatch):
+        """Başka tenant'ın upload'u 404 dönmeli, abonelik açılmamalı; kimliksiz istek reddedilmeli"""
+        broker = ProgressBroker()
+        broker.publish(43, build_event(43, "preprocessing", "gizli hata metni", "processing"))
+        monkeypatch.setattr("main.progress_broker", broker)
+        subscribed = []
+        monkeypatch.setattr(broker, "subscribe", lambda upload_id: subscribed.append(upload_id))
+
+        response = client.get("/api/v1/upload/43/events")
+
+        assert response.status_code == 404
+        assert "gizli" not in response.text
+        assert subscribed == []
+        app.dependency_overrides.pop(get_current_user)
+        app.dependency_overrides.pop(get_current_tenant)
+        assert client.get("/api/v1/upload/42/events").status_code in (401, 403)
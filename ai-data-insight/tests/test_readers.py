@@ -0,0 +1,111 @@
+import gzip
+import zipfile
+
+import pandas as pd
+import pytest
+
+import readers
+from readers import (
+    StreamDecompressor, compression_of, detect_bytes_encoding, detect_encoding, read_csv, read_header, register_reader,
+)
+
+TURKISH = "müşteri,şehir,adet\nÇağrı,İzmir,3\nGülşen,Muğla,5\n"
+
+
+class TestReaders:
+    """Seçilebilir CSV okuma katmanının testleri"""
+
+    def test_detect_encoding(self, tmp_path):
+        """UTF-8, BOM'lu UTF-8 ve Türkçe tek baytlı kodlamalar ayırt edilmeli"""
+        assert detect_bytes_encoding(TURKISH.encode("utf-8")) == "utf-8"
+        assert detect_bytes_encoding(b"\xef\xbb\xbf" + TURKISH.encode("utf-8")) == "utf-8-sig"
+        assert detect_bytes_encoding(TURKISH.encode("cp1254")) == "cp1254"
+        # Örneklem çok baytlı karakterin ortasında bitse de UTF-8 sayılmalı
+        assert detect_bytes_encoding("ş".encode("utf-8")[:1]) == "utf-8"
+
+        path = tmp_path / "iso.csv"
+        path.write_bytes(TURKISH.encode("iso-8859-9"))
+        assert detect_encoding(str(path)) == "cp1254"
+
+    @pytest.mark.parametrize("encoding", ["utf-8", "cp1254", "iso-8859-9"])
+    def test_read_turkish_file(self, tmp_path, encoding):
+        """Kodlamadan bağımsız olarak Türkçe karakterler doğru okunmalı"""
+        path = tmp_path / "orders.csv"
+        path.write_bytes(TURKISH.encode(encoding))
+
+        df = read_csv(str(path))
+
+        assert read_header(str(path)) == ["müşteri", "şehir", "adet"]
+        assert df["şehir"].tolist() == ["İzmir", "Muğla"]
+        assert df["adet"].sum() == 8
+
+    @pytest.mark.parametrize("backend", ["pandas", "pyarrow"])
+    def test_utf8_sample_falls_back(self, tmp_path, backend):
+        """Örneklemden sonra UTF-8 olmayan bayt gelirse yedek kodlamayla okunmalı"""
+        if backend == "pyarrow":
+            pytest.importorskip("pyarrow")
+        path = tmp_path / "orders.csv"
+        path.write_bytes(("a,b\n" + "x,1\n" * 100).encode() + "ş,2\n".encode("cp1254"))
+
+        df = read_csv(str(path), encoding=detect_encoding(str(path), sample_bytes=16), backend=backend)
+
+        assert df["a"].iloc[-1] == "ş"
+
+    def test_backend_selection(self, tmp_path, monkeypatch):
+        """Arka uç seçilebilmeli; pyarrow yoksa pandas'a düşülmeli, bilinmeyen arka uç hata vermeli"""
+        path = tmp_path / "orders.csv"
+        path.write_text("a,b\n1,2\n", encoding="utf-8")
+        calls = []
+        register_reader("kayit", lambda p, encoding, dtype=None, usecols=None: calls.append(encoding) or pd.DataFrame())
+
+        read_csv(str(path), backend="kayit")
+        monkeypatch.setattr(readers, "pa_csv", None)
+        df = read_csv(str(path), backend="pyarrow")
+
+        assert calls == ["utf-8"]
+        assert df.to_dict("list") == {"a": [1], "b": [2]}
+        with pytest.raises(ValueError):
+            read_csv(str(path), backend="yok")
+        readers.READERS.pop("kayit")
+
+    def test_arrow_backend(self, tmp_path):
+        """pyarrow arka ucu Arrow tipli kolonlar ve profil dtype'larıyla okumalı"""
+        pytest.importorskip("pyarrow")
+        path = tmp_path / "orders.csv"
+        path.write_bytes(TURKISH.encode("cp1254"))
+
+        df = read_csv(str(path), dtype={"adet": "float64"}, usecols=["adet", "şehir"], backend="pyarrow")
+
+        assert list(df.columns) == ["şehir", "adet"]
+        assert df["şehir"].tolist() == ["İzmir", "Muğla"]
+        assert df["adet"].sum() == 8.0
+
+    @pytest.mark.parametrize("suffix", [".csv.gz", ".zip", ".csv.zst"])
+    def test_read_compressed(self, tmp_path, suffix):
+        """Sıkıştırılmış dosyalar diske açılmadan ve kodlaması tespit edilerek okunmalı"""
+        data = TURKISH.encode("cp1254")
+        path = tmp_path / f"orders{suffix}"
+        if suffix == ".csv.gz":
+            path.write_bytes(gzip.compress(data))
+        elif suffix == ".zip":
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr("orders.csv", data)
+        else:
+            zstandard = pytest.importorskip("zstandard")
+            path.write_bytes(zstandard.ZstdCompressor().compress(data))
+
+        assert compression_of(str(path)) is not None
+        assert detect_encoding(str(path)) == "cp1254"
+        assert read_header(str(path)) == ["müşteri", "şehir", "adet"]
+        assert read_csv(str(path))["şehir"].tolist() == ["İzmir", "Muğla"]
+
+    def test_stream_decompressor(self):
+        """Parça sınırları ve çok üyeli gzip akışı doğru açılmalı"""
+        data = gzip.compress(b"a,b\n1,2\n") + gzip.compress(b"3,4\n" * 1000)
+        decompressor = StreamDecompressor("gzip")
+
+        out = b"".join(decompressor.decompress(data[i:i + 7]) for i in range(0, len(data), 7))
+
+        assert out == b"a,b\n1,2\n" + b"3,4\n" * 1000
+        with pytest.raises(ValueError):
+            compression_of("orders.xlsx")
@@ -0,0 +1,132 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import get_db
+from main import app
+from models import Base, Tenant, User, Upload, Analysis
+from result_cache import ResultCache, etag_matches, result_cache
+
+
+class TestResultCacheHelpers:
+    """ETag ve LRU yardımcılarının testleri"""
+
+    def test_etag_matching(self):
+        """If-None-Match listesi, zayıf ETag ve * desteklenmeli"""
+        etag = '"analysis-1-100"'
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"other", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"analysis-1-99"', etag)
+        assert not etag_matches(None, etag)
+
+    def test_lru_eviction(self):
+        """LRU en az kullanılan kaydı atmalı"""
+        cache = ResultCache(max_size=2)
+        cache.put(1, '"a"', b"1")
+        cache.put(2, '"b"', b"2")
+        cache.get(1)
+        cache.put(3, '"c"', b"3")
+
+        assert cache.get(2) is None
+        assert cache.get(1).body == b"1"
+        assert cache.get(3).body == b"3"
+        assert len(cache) == 2
+
+
+class TestResultEndpointCaching:
+    """Sonuç endpoint'inin HTTP önbellek davranışı"""
+
+    @pytest.fixture
+    def db_setup(self):
+        """SQLite üzerinde tamamlanmış bir analiz oluşturur"""
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+
+        db = factory()
+        db.add(Tenant(name="T", domain="t"))
+        db.commit()
+        db.add(User(email="u@test.com", hashed_password="x", tenant_id=1))
+        db.commit()
+        db.add(Upload(filename="a.csv", path="/tmp/a.csv", status="ready", tenant_id=1, user_id=1))
+        db.commit()
+        db.add(Analysis(upload_id=1, summary=json.dumps({"rows": 3}), insights=json.dumps({"top_skus": {"A": 5}})))
+        db.commit()
+        db.close()
+
+        def override_get_db():
+            session = factory()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        counter = {"selects": 0, "factory": factory}
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                counter["selects"] += 1
+
+        app.dependency_overrides[get_db] = override_get_db
+        result_cache.invalidate(1)
+        yield counter
+        app.dependency_overrides.pop(get_db, None)
+        result_cache.invalidate(1)
+
+    def test_completed_result_is_cached_and_revalidated(self, db_setup):
+        """Sonraki istekler önbellekten (tek sürüm sorgusuyla) ve 304 ile dönmeli"""
+        client = TestClient(app)
+
+        first = client.get("/api/v1/upload/1/result")
+        assert first.status_code == 200
+        assert first.json()["summary"] == {"rows": 3}
+        assert first.headers["cache-control"] == "private, no-cache"
+        etag = first.headers["etag"]
+        selects_after_first = db_setup["selects"]
+
+        cached = client.get("/api/v1/upload/1/result")
+        assert cached.status_code == 200
+        assert cached.content == first.content
+
+        not_modified = client.get("/api/v1/upload/1/result", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.headers["etag"] == etag
+
+        assert db_setup["selects"] == selects_after_first + 2
+
+    def test_cached_result_revalidated_against_db(self, db_setup):
+        """Sonuç başka bir worker'da değiştiyse önbellekteki eski gövde dönmemeli"""
+        client = TestClient(app)
+        first = client.get("/api/v1/upload/1/result")
+
+        # Başka worker: kesin sonucu yazar, bu process'in önbelleğini temizlemez
+        db = db_setup["factory"]()
+        analysis = db.query(Analysis).first()
+        analysis.summary = {"rows": 5}
+        # SQLite zaman damgası saniye çözünürlüklü; sürüm açıkça ilerletilir
+        analysis.updated_at = datetime.now() + timedelta(seconds=5)
+        db.commit()
+        db.close()
+
+        second = client.get("/api/v1/upload/1/result", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 200
+        assert second.json()["summary"] == {"rows": 5}
+        assert second.headers["etag"] != first.headers["etag"]
+
+    def test_revalidation_without_cache_skips_body(self, db_setup):
+        """Önbellek boşken eşleşen ETag yine 304 döndürmeli"""
+        client = TestClient(app)
+        etag = client.get("/api/v1/upload/1/result").headers["etag"]
+        result_cache.invalidate(1)
+
+        response = client.get("/api/v1/upload/1/result", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
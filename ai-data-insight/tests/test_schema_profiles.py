@@ -0,0 +1,187 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from auth import get_current_tenant, get_current_user
+from database import get_db
+from main import app
+from models import Base, Tenant, User
+from preprocess import Preprocessor
+from schema_profiles import get_profile, header_signature, save_profile, set_overrides
+
+
+class TestSchemaProfiles:
+    """Başlık imzası başına şema profillerinin testleri"""
+
+    @pytest.fixture
+    def csv_path(self, tmp_path):
+        path = tmp_path / "orders.csv"
+        pd.DataFrame({
+            "sku": ["A", "B", None, "A", "B", "A"],
+            "quantity": [1, 2, 3, None, 5, 6],
+            "price": [10.0, 20.0, 30.0, 40.0, 50.0, 60.0],
+            "order_date": ["2024-01-01", "2024-01-02", "2024-01-03",
+                           "2024-01-04", "2024-01-05", "2024-01-06"],
+        }).to_csv(path, index=False)
+        return str(path)
+
+    @pytest.fixture
+    def session_factory(self):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+
+        db = factory()
+        db.add(Tenant(id=1, name="Test", domain="test"))
+        db.commit()
+        db.close()
+        return factory
+
+    def test_detected_profile(self, csv_path):
+        """İlk çalıştırmada kolon rolleri, format ve doldurma değerleri tespit edilmeli"""
+        pre = Preprocessor(csv_path)
+        pre.run()
+
+        profile = pre.profile
+        assert not pre.profile_reused
+        assert profile["columns"] == ["sku", "quantity", "price", "order_date"]
+        assert profile["date_col"] == "order_date"
+        assert profile["qty_col"] == "quantity"
+        assert profile["date_formats"] == {"order_date": "%Y-%m-%d"}
+        assert profile["fill_values"]["quantity"] == pytest.approx(3.4)
+        assert profile["fill_values"]["sku"] == "A"
+
+    def test_repeat_upload_skips_detection(self, csv_path, monkeypatch):
+        """Profil verilirse tespit atlanmalı ve sonuç aynı olmalı"""
+        first = Preprocessor(csv_path)
+        expected = first.run()
+
+        def fail(self):
+            raise AssertionError("tespit çalışmamalı")
+
+        monkeypatch.setattr(Preprocessor, "_find_date_column", fail)
+        monkeypatch.setattr(Preprocessor, "_find_quantity_column", fail)
+        monkeypatch.setattr(Preprocessor, "_guess_date_format", fail)
+
+        second = Preprocessor(csv_path, profile=first.profile)
+        df, _, anomaly_count, forecast = second.run()
+
+        assert second.profile_reused
+        pd.testing.assert_frame_equal(df, expected[0])
+        assert (anomaly_count, forecast) == (expected[2], expected[3])
+
+    def test_mismatched_profile_falls_back_to_detection(self, csv_path):
+        """Profildeki dtype dosyaya uymuyorsa kolonlar yeniden tespit edilmeli"""
+        profile = Preprocessor(csv_path)
+        profile.run()
+        stale = dict(profile.profile, dtypes={**profile.profile["dtypes"], "sku": "float64"})
+
+        pre = Preprocessor(csv_path, profile=stale)
+        pre.run()
+
+        assert not pre.profile_reused
+        assert pre.profile["dtypes"]["sku"] != "float64"
+
+    def test_store_overrides_and_endpoint(self, csv_path, session_factory):
+        """Profil tenant+imza ile saklanmalı, override'lar uygulanmalı"""
+        pre = Preprocessor(csv_path)
+        pre.run()
+        columns = pre.profile["columns"]
+
+        db = session_factory()
+        save_profile(db, 1, pre.profile)
+        set_overrides(db, 1, header_signature(columns), {"qty_col": "price", "fill_values": {"sku": "?"}})
+
+        profile = get_profile(db, 1, columns)
+        assert profile["qty_col"] == "price"
+        assert profile["fill_values"] == {**pre.profile["fill_values"], "sku": "?"}
+        assert get_profile(db, 2, columns) is None
+        with pytest.raises(ValueError):
+            set_overrides(db, 1, header_signature(columns), {"date_col": "missing"})
+        db.close()
+
+        reused = Preprocessor(csv_path, profile=profile)
+        df, *_ = reused.run()
+        assert df["sku"].tolist()[2] == "?"
+        assert reused.cube.value_col == "price"
+
+        def override_get_db():
+            session = session_factory()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_user] = lambda: User(id=1, tenant_id=1)
+        app.dependency_overrides[get_current_tenant] = lambda: Tenant(id=1)
+        try:
+            client = TestClient(app)
+            listed = client.get("/api/v1/schema-profiles").json()
+            updated = client.put(
+                f"/api/v1/schema-profiles/{header_signature(columns)}/overrides",
+                json={"date_formats": {"order_date": "%Y/%m/%d"}},
+            )
+            invalid = client.put(
+                f"/api/v1/schema-profiles/{header_signature(columns)}/overrides",
+                json={"colour": "red"},
+            )
+            missing = client.put("/api/v1/schema-profiles/abc/overrides", json={})
+        finally:
+            for dependency in (get_db, get_current_user, get_current_tenant):
+                app.dependency_overrides.pop(dependency, None)
+
+        assert listed["items"][0]["use_count"] == 1
+        assert updated.status_code == 200
+        assert updated.json()["effective"]["date_formats"] == {"order_date": "%Y/%m/%d"}
+        assert updated.json()["effective"]["qty_col"] == "quantity"
+        assert invalid.status_code == 400
+        assert missing.status_code == 404
+
+    def test_invalid_override_values_rejected(self, csv_path, session_factory):
+        """Okumada uygulanamayacak dtype ve derlenemeyen tarih formatı reddedilmeli"""
+        pre = Preprocessor(csv_path)
+        pre.run()
+        signature = header_signature(pre.profile["columns"])
+
+        db = session_factory()
+        save_profile(db, 1, pre.profile)
+        for overrides in (
+            {"dtypes": {"quantity": "int128"}},
+            {"dtypes": {"quantity": "datetime64[ns]"}},
+            {"date_formats": {"order_date": "%Q"}},
+            {"date_formats": {"order_date": "yyyy-mm-dd"}},
+            {"date_formats": {"order_date": 5}},
+        ):
+            with pytest.raises(ValueError):
+                set_overrides(db, 1, signature, overrides)
+        record = set_overrides(db, 1, signature, {"dtypes": {"sku": "category"}, "date_formats": {"order_date": "%Y-%m-%d"}})
+        assert record.overrides["dtypes"] == {"sku": "category"}
+        db.close()
+
+        def override_get_db():
+            session = session_factory()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_user] = lambda: User(id=1, tenant_id=1)
+        app.dependency_overrides[get_current_tenant] = lambda: Tenant(id=1)
+        try:
+            response = TestClient(app).put(
+                f"/api/v1/schema-profiles/{signature}/overrides",
+                json={"dtypes": {"quantity": "int128"}},
+            )
+        finally:
+            for dependency in (get_db, get_current_user, get_current_tenant):
+                app.dependency_overrides.pop(dependency, None)
+
+        assert response.status_code == 400
+        assert "int128" in response.json()["detail"]
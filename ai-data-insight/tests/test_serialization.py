@@ -0,0 +1,69 @@
+import json
+import numpy as np
+import pandas as pd
+from serialization import FastJSONResponse, describe_to_dict, dumps, loads_field
+
+
+class TestSerialization:
+    """Hızlı JSON serileştirme testleri"""
+
+    @staticmethod
+    def _legacy_clean(summary_stats):
+        """Eski hücre hücre temizleme döngüsü (karşılaştırma için)"""
+        summary_dict = summary_stats.to_dict()
+        for col in summary_dict:
+            for stat in summary_dict[col]:
+                value = summary_dict[col][stat]
+                if pd.isna(value):
+                    summary_dict[col][stat] = 0
+                elif isinstance(value, (int, float)) and (np.isinf(value) or np.isnan(value)):
+                    summary_dict[col][stat] = 0
+        return summary_dict
+
+    def test_describe_to_dict_matches_legacy_cleaning(self):
+        """Vektörel temizleme eski döngü ile aynı sonucu vermeli"""
+        df = pd.DataFrame({
+            'quantity': [10, 20, None, 40],
+            'price': [1.5, np.inf, 3.5, -np.inf],
+            'sku': ['A', 'B', 'A', None],
+            'order_date': pd.to_datetime(['2023-01-01', '2023-01-02', None, '2023-01-04'])
+        })
+        summary_stats = df.describe(include="all")
+
+        cleaned = describe_to_dict(summary_stats)
+
+        assert cleaned == self._legacy_clean(summary_stats)
+        assert cleaned['price']['max'] == 0
+        assert cleaned['sku']['mean'] == 0
+
+    def test_dumps_handles_numpy_and_timestamps(self):
+        """NumPy skalerleri, dizileri ve Timestamp'ler serialize edilmeli"""
+        payload = {
+            "count": np.int64(5),
+            "mean": np.float32(1.5),
+            "values": np.array([1.0, 2.0]),
+            "date": pd.Timestamp("2023-01-01"),
+            "missing": np.float64("nan"),
+        }
+
+        decoded = json.loads(dumps(payload))
+
+        assert decoded == {
+            "count": 5,
+            "mean": 1.5,
+            "values": [1.0, 2.0],
+            "date": "2023-01-01T00:00:00",
+            "missing": None,
+        }
+
+    def test_loads_field_supports_legacy_strings(self):
+        """JSON kolonundaki eski string kayıtlar ve yeni dict'ler okunmalı"""
+        assert loads_field('{"rows": 3}') == {"rows": 3}
+        assert loads_field({"rows": 3}) == {"rows": 3}
+        assert loads_field(None) == {}
+
+    def test_fast_json_response(self):
+        """Response doğrudan JSON byte'larını içermeli"""
+        response = FastJSONResponse({"forecast": np.array([1.0, 2.0])})
+        assert response.media_type == "application/json"
+        assert json.loads(response.body) == {"forecast": [1.0, 2.0]}
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocess import Preprocessor
+from sketches import HyperLogLog, KLLSketch, SpaceSaving, merge_sketches, sketch_frame
+
+
+class TestSketches:
+    """Birleştirilebilir yaklaşık özet sketch'lerinin testleri"""
+
+    def test_kll_quantiles_within_rank_error(self):
+        """Parçalardan birleştirilen KLL quantile'ları rank hatası içinde olmalı"""
+        values = np.random.default_rng(0).lognormal(size=200_000)
+        parts = [KLLSketch(seed=i).update(chunk) for i, chunk in enumerate(np.array_split(values, 8))]
+        sketch = parts[0]
+        for part in parts[1:]:
+            sketch.merge(part)
+
+        assert sketch.n == len(values)
+        assert sum(len(level) for level in sketch.levels) < 1000
+        ordered = np.sort(values)
+        for q, estimate in zip((0.25, 0.5, 0.75), sketch.quantiles()):
+            rank = np.searchsorted(ordered, estimate) / len(values)
+            assert abs(rank - q) <= sketch.rank_error
+
+    def test_hyperloglog_merge_is_union(self):
+        """HLL birleşimi, birleşik verinin sketch'iyle aynı olmalı"""
+        a = pd.Series([f"u{i}" for i in range(0, 60_000)])
+        b = pd.Series([f"u{i}" for i in range(40_000, 100_000)])
+
+        merged = HyperLogLog().update(a).merge(HyperLogLog().update(b))
+        whole = HyperLogLog().update(pd.concat([a, b]))
+
+        assert np.array_equal(merged.registers, whole.registers)
+        assert merged.estimate() == pytest.approx(100_000, rel=3 * merged.relative_error)
+        assert HyperLogLog().update(pd.Series(["x", "y", "x", None])).estimate() == 2
+
+    def test_space_saving_bounds(self):
+        """Sık elemanlar bulunmalı, gerçek sayım [sayım - pay, sayım] aralığında olmalı"""
+        values = pd.Series(np.random.default_rng(1).zipf(1.6, 100_000) % 2000)
+        sketch = SpaceSaving(capacity=20)
+        for chunk in np.array_split(values, 10):
+            sketch.update(pd.Series(chunk))
+
+        exact = values.value_counts()
+        top = sketch.top(3)
+        assert [key for key, _, _ in top] == exact.index[:3].tolist()
+        for key, count, error in sketch.top(20):
+            assert count - error <= exact[key] <= count
+
+    def test_approximate_summary(self, tmp_path):
+        """Yaklaşık özet describe() düzeninde ve hata sınırlarıyla dönmeli"""
+        rng = np.random.default_rng(2)
+        df = pd.DataFrame({
+            "sku": rng.choice(["A", "B", "C"], 5000, p=[0.6, 0.3, 0.1]),
+            "quantity": rng.integers(1, 100, 5000),
+            "order_date": pd.date_range("2024-01-01", periods=5000, freq="h").strftime("%Y-%m-%d %H:%M"),
+        })
+        path = tmp_path / "orders.csv"
+        df.to_csv(path, index=False)
+
+        _, summary, _, _ = Preprocessor(str(path), approximate=True).run()
+
+        assert summary["sku"]["top"] == "A"
+        assert summary["sku"]["unique"] == 3
+        assert summary["quantity"]["mean"] == pytest.approx(df["quantity"].mean())
+        assert summary["quantity"]["std"] == pytest.approx(df["quantity"].std())
+        assert summary["quantity"]["50%"] == pytest.approx(df["quantity"].median(), abs=2)
+        assert summary["quantity"]["rank_error"] > 0
+        assert summary["sku"]["unique_error"] > 0
+
+        # Parça/worker sketch'lerinin birleşimi tek geçişle aynı momentleri vermeli
+        merged = merge_sketches([sketch_frame(df.iloc[:1234]), sketch_frame(df.iloc[1234:])])
+        assert merged["quantity"].count == len(df)
+        assert merged["quantity"].m2 == pytest.approx(sketch_frame(df)["quantity"].m2)
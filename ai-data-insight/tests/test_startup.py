@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import main" için izin verilen en fazla kümülatif süre (ms)
+IMPORT_TIME_BUDGET_MS = int(os.getenv("IMPORT_TIME_BUDGET_MS", "2000"))
+
+# API açılışında yüklenmemesi gereken ağır ML kütüphaneleri
+HEAVY_MODULES = ["lightgbm", "sklearn", "scipy", "train", "predict"]
+
+
+def _importtime(statement: str) -> dict:
+    """python -X importtime çıktısını {modül: kümülatif_us} olarak döndür"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:  self [us] | cumulative | imported package"
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        timings[name.strip()] = int(cumulative_us)
+    return timings
+
+
+class TestStartupTime:
+    """API soğuk açılış (import) süresi testleri"""
+
+    @pytest.fixture(scope="class")
+    def main_timings(self):
+        return _importtime("import main")
+
+    def test_heavy_ml_modules_are_lazy(self, main_timings):
+        """main import edilirken lightgbm/sklearn yüklenmemeli"""
+        loaded = [m for m in main_timings if m.split(".")[0] in HEAVY_MODULES]
+        assert loaded == []
+
+    def test_import_time_within_budget(self, main_timings):
+        """main import süresi bütçe içinde olmalı"""
+        main_ms = main_timings["main"] / 1000
+        assert main_ms < IMPORT_TIME_BUDGET_MS, f"import main {main_ms:.0f} ms > {IMPORT_TIME_BUDGET_MS} ms"
@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import train
+from models import Base, Customer, MLModel, Tenant
+from train import detect_drift, compute_feature_stats, next_model_version, train_churn_model
+
+
+def _customers(tenant_id, count, seed, created_at, spend_scale=1.0, segments=("Gold", "Silver")):
+    """Churn'ün sipariş sayısıyla ilişkili olduğu sentetik müşteriler"""
+    rng = np.random.default_rng(seed)
+    customers = []
+    for i in range(count):
+        orders = int(rng.integers(0, 30))
+        customers.append(Customer(
+            customer_id=f"S{seed}-{i}",
+            tenant_id=tenant_id,
+            age=int(rng.integers(18, 70)),
+            gender=str(rng.choice(["M", "F"])),
+            segment=str(rng.choice(segments)),
+            subscription_length=int(rng.integers(1, 1000)),
+            total_orders=orders,
+            total_spent=float(orders * 50 * spend_scale),
+            avg_order_value=float(50 * spend_scale),
+            churned=int(orders < 10),
+            created_at=created_at,
+        ))
+    return customers
+
+
+class TestIncrementalTraining:
+    """Artımlı (warm-start) churn eğitiminin testleri"""
+
+    @pytest.fixture
+    def session_factory(self, monkeypatch, tmp_path):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+
+        db = factory()
+        db.add(Tenant(id=1, name="Test", domain="test"))
+        db.add_all(_customers(1, 200, seed=1, created_at=datetime.now() - timedelta(days=10)))
+        db.commit()
+        db.close()
+
+        monkeypatch.setattr(train, "SessionLocal", factory)
+        monkeypatch.chdir(tmp_path)
+
+        result = train_churn_model(1)
+        assert result['success'] and result['mode'] == 'full'
+
+        # Sonraki eklemeler "eğitimden sonra" sayılsın
+        db = factory()
+        db.query(MLModel).update({MLModel.training_date: datetime.now() - timedelta(days=1)})
+        db.commit()
+        db.close()
+        return factory
+
+    @staticmethod
+    def _active_model(factory):
+        db = factory()
+        try:
+            return db.query(MLModel).filter(MLModel.is_active == True).one()
+        finally:
+            db.close()
+
+    def test_incremental_continues_previous_booster(self, session_factory):
+        """Değişen müşterilerle önceki modelin üzerine ağaç eklenmeli"""
+        previous = self._active_model(session_factory)
+        previous_trees = train.joblib.load(previous.model_path).num_trees()
+
+        db = session_factory()
+        db.add_all(_customers(1, 60, seed=2, created_at=datetime.now()))
+        db.commit()
+        db.close()
+
+        result = train_churn_model(1, incremental=True)
+
+        assert result['success'], result
+        assert result['mode'] == 'incremental'
+        assert result['training_rows'] == 60
+        current = self._active_model(session_factory)
+        assert current.id == result['model_id']
+        assert current.model_version == "1.1"
+        assert current.features == previous.features
+        assert train.joblib.load(current.model_path).num_trees() > previous_trees
+
+    def test_no_changes_keeps_model(self, session_factory):
+        """Değişiklik yoksa model korunmalı"""
+        previous = self._active_model(session_factory)
+
+        result = train_churn_model(1, incremental=True)
+
+        assert result['mode'] == 'skipped'
+        assert result['model_id'] == previous.id
+
+    def test_schema_change_falls_back_to_full_retrain(self, session_factory):
+        """Yeni kategori (yeni dummy kolonu) gelirse tam eğitim yapılmalı"""
+        db = session_factory()
+        db.add_all(_customers(1, 60, seed=3, created_at=datetime.now(), segments=("Platinum",)))
+        db.commit()
+        db.close()
+
+        result = train_churn_model(1, incremental=True)
+
+        assert result['mode'] == 'full'
+        assert result['training_rows'] == 260
+        assert "segment_Platinum" in self._active_model(session_factory).features
+
+    def test_drift_falls_back_to_full_retrain(self, session_factory):
+        """Harcama dağılımı kayarsa tam eğitim yapılmalı"""
+        db = session_factory()
+        db.add_all(_customers(1, 60, seed=4, created_at=datetime.now(), spend_scale=20.0))
+        db.commit()
+        db.close()
+
+        result = train_churn_model(1, incremental=True)
+
+        assert result['mode'] == 'full'
+        assert self._active_model(session_factory).model_version == "1.0"
+
+    def test_predictor_uses_training_pipeline(self, session_factory, monkeypatch):
+        """Tahmin, eğitimdeki feature pipeline'ı ile tek satır ve batch'te aynı olmalı"""
+        import predict
+
+        monkeypatch.setattr(predict, "SessionLocal", session_factory)
+        customers = [
+            {'age': 30, 'gender': 'M', 'segment': 'Gold', 'subscription_length': 10,
+             'last_login_date': '2024-01-01', 'total_orders': 2},
+            {'age': None, 'gender': 'F', 'segment': 'Platinum', 'subscription_length': 500,
+             'last_login_date': None, 'total_orders': 25, 'total_spent': 1250.0},
+        ]
+
+        predictor = predict.ChurnPredictor(1)
+        batch = predictor.predict_batch(customers)
+        single = [predictor.predict_churn(c) for c in customers]
+
+        assert predictor.pipeline.feature_names == predictor.features
+        assert [r['churn_probability'] for r in batch] == pytest.approx([r['churn_probability'] for r in single])
+        assert batch[0]['churn_probability'] > batch[1]['churn_probability']
+
+    def test_drift_helpers(self):
+        """Drift kontrolü ve sürüm artırma"""
+        reference = compute_feature_stats(pd.DataFrame({'a': [0.0, 1.0, 2.0], 'b': [5.0, 5.0, 5.0]}))
+
+        assert detect_drift(reference, pd.DataFrame({'a': [1.0, 1.2], 'b': [5.0, 5.0]})) == []
+        assert detect_drift(reference, pd.DataFrame({'a': [3.0, 4.0], 'b': [9.0, 9.0]})) == ['a', 'b']
+        assert next_model_version("1.0") == "1.1"
+        assert next_model_version("2.9") == "2.10"
@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import tuning
+from tuning import TrialCache, data_fingerprint, successive_halving
+
+
+def _thread_executor(workers, train_path, valid_path):
+    return ThreadPoolExecutor(
+        max_workers=workers, initializer=tuning._init_worker, initargs=(train_path, valid_path)
+    )
+
+
+class TestHyperparameterSearch:
+    """Paralel successive halving aramasının testleri"""
+
+    BASE_PARAMS = {'objective': 'binary', 'metric': 'auc', 'verbose': -1, 'random_state': 42}
+
+    @pytest.fixture
+    def data(self):
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.normal(size=(400, 4)), columns=['a', 'b', 'c', 'd'])
+        y = pd.Series(((X['a'] + 0.5 * X['b'] + rng.normal(scale=0.5, size=400)) > 0).astype(int))
+        return X.iloc[:300], y.iloc[:300], X.iloc[300:], y.iloc[300:]
+
+    def test_successive_halving_narrows_candidates(self, data, tmp_path):
+        """Her turda adaylar eta kat azalmalı, tur sayısı eta kat artmalı"""
+        result = successive_halving(
+            *data, self.BASE_PARAMS, n_trials=9, eta=3, min_rounds=10, max_rounds=90,
+            max_workers=2, cache=TrialCache(str(tmp_path)), executor_factory=_thread_executor
+        )
+
+        rungs = pd.Series([trial['rounds'] for trial in result['history']]).value_counts().sort_index()
+        assert rungs.to_dict() == {10: 9, 30: 3, 90: 1}
+        assert result['trials'] == 13
+        assert result['cache_hits'] == 0
+        assert result['auc'] > 0.8
+        assert set(result['params']) >= {'num_leaves', 'learning_rate', 'feature_fraction'}
+
+    def test_trials_are_cached(self, data, tmp_path):
+        """Aynı veri ve parametrelerle tekrar arama önbellekten gelmeli"""
+        kwargs = dict(
+            n_trials=4, eta=2, min_rounds=10, max_rounds=20, max_workers=2,
+            cache=TrialCache(str(tmp_path)), executor_factory=_thread_executor
+        )
+        first = successive_halving(*data, self.BASE_PARAMS, **kwargs)
+        second = successive_halving(*data, self.BASE_PARAMS, **kwargs)
+
+        assert second['cache_hits'] == second['trials'] == first['trials']
+        assert second['params'] == first['params']
+
+    def test_different_split_not_cached(self, data, tmp_path):
+        """Aynı satırların farklı train/valid bölünmesi önbelleği paylaşmamalı"""
+        X_train, y_train, X_valid, y_valid = data
+        X, y = pd.concat([X_train, X_valid]), pd.concat([y_train, y_valid])
+        kwargs = dict(
+            n_trials=2, eta=2, min_rounds=10, max_rounds=10, max_workers=2,
+            cache=TrialCache(str(tmp_path)), executor_factory=_thread_executor
+        )
+        successive_halving(*data, self.BASE_PARAMS, **kwargs)
+        other = successive_halving(X.iloc[:250], y.iloc[:250], X.iloc[250:], y.iloc[250:], self.BASE_PARAMS, **kwargs)
+
+        assert other['cache_hits'] == 0
+
+    def test_fingerprint_tracks_data(self, data):
+        """Parmak izi veri değişince değişmeli"""
+        X, y, _, _ = data
+        changed = X.copy()
+        changed.iloc[0, 0] += 1
+
+        assert data_fingerprint(X, y) == data_fingerprint(X.copy(), y.copy())
+        assert data_fingerprint(X, y) != data_fingerprint(changed, y)
+        assert data_fingerprint(X, y) != data_fingerprint(X, 1 - y)
+
+    def test_process_pool(self, data, tmp_path):
+        """Varsayılan process havuzu binary dataset'i worker'larda yüklemeli"""
+        result = successive_halving(
+            *data, self.BASE_PARAMS, n_trials=2, eta=2, min_rounds=10, max_rounds=20,
+            max_workers=2, cache=TrialCache(str(tmp_path))
+        )
+
+        assert result['trials'] == 3
+        assert 0.5 < result['auc'] <= 1.0
@@ -9,37 +9,96 @@ import lightgbm as lgb
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report, roc_auc_score, confusion_matrix, f1_score, precision_recall_fscore_support
 import joblib
+import json
 import os
 from datetime import datetime
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 import logging
 
 from database import SessionLocal
 from models import Customer, MLModel, Tenant
+from features import ChurnFeaturePipeline, feature_pipeline_path
+from config import MIN_TRAINING_CUSTOMERS, CHURN_INCREMENTAL_ROUNDS, CHURN_DRIFT_THRESHOLD
 
 logger = logging.getLogger(__name__)
 
+# Varsayılan LightGBM parametreleri (tuning sonuçları bunların üzerine yazılır)
+DEFAULT_PARAMS = {
+    'objective': 'binary',
+    'metric': 'auc',
+    'boosting_type': 'gbdt',
+    'num_leaves': 31,
+    'learning_rate': 0.05,
+    'feature_fraction': 0.9,
+    'bagging_fraction': 0.8,
+    'bagging_freq': 5,
+    'verbose': -1,
+    # Sınıf dengesizliği için
+    'is_unbalance': True
+}
+
+
+def feature_stats_path(model_path: str) -> str:
+    """Model dosyasının yanındaki eğitim feature istatistikleri dosyası"""
+    return f"{os.path.splitext(model_path)[0]}.stats.json"
+
+
+def compute_feature_stats(X: pd.DataFrame) -> dict:
+    """Drift kontrolü için feature başına ortalama ve standart sapma"""
+    values = X.astype(float)
+    return {
+        col: {'mean': float(values[col].mean()), 'std': float(values[col].std(ddof=0))}
+        for col in values.columns
+    }
+
+
+def detect_drift(reference: dict, X: pd.DataFrame, threshold: float = CHURN_DRIFT_THRESHOLD) -> list:
+    """Ortalaması referansa göre threshold std'den fazla kayan feature'lar"""
+    current = compute_feature_stats(X)
+    drifted = []
+    for col, stats in reference.items():
+        if col not in current:
+            continue
+        scale = stats['std'] if stats['std'] > 0 else max(abs(stats['mean']), 1.0)
+        if abs(current[col]['mean'] - stats['mean']) / scale > threshold:
+            drifted.append(col)
+    return drifted
+
+
+def next_model_version(version: str) -> str:
+    """Artımlı güncellemede alt sürümü artır (1.0 -> 1.1)"""
+    major, _, minor = (version or "1.0").partition(".")
+    return f"{major}.{int(minor or 0) + 1}"
+
 class ChurnTrainer:
-    def __init__(self, tenant_id: int):
+    def __init__(self, tenant_id: int, num_threads: int = None):
         self.tenant_id = tenant_id
+        # LightGBM thread sayısı (None: LightGBM varsayılanı, tüm çekirdekler)
+        self.num_threads = num_threads
         self.db = SessionLocal()
         self.model = None
         self.features = None
         self.feature_importance = None
+        self.feature_stats = None
+        self.pipeline = None
         
     def __del__(self):
         if hasattr(self, 'db'):
             self.db.close()
     
-    def load_customer_data(self):
-        """Tenant'a ait müşteri verilerini yükle"""
+    def load_customer_data(self, since: datetime = None):
+        """Tenant'a ait müşteri verilerini yükle (since: sadece o tarihten sonra eklenen/güncellenenler)"""
         try:
-            customers = self.db.query(Customer).filter(
+            query = self.db.query(Customer).filter(
                 Customer.tenant_id == self.tenant_id,
                 Customer.churned.isnot(None)  # Sadece churn bilgisi olan müşteriler
-            ).all()
+            )
+            if since is not None:
+                query = query.filter(or_(Customer.created_at >= since, Customer.updated_at >= since))
+            customers = query.all()
             
-            if not customers:
+            if not customers and since is None:
                 raise ValueError(f"Tenant {self.tenant_id} için churn verisi bulunamadı")
             
             # DataFrame'e çevir
@@ -59,7 +118,10 @@ class ChurnTrainer:
                     'churned': customer.churned
                 })
             
-            df = pd.DataFrame(data)
+            df = pd.DataFrame(data, columns=[
+                'id', 'customer_id', 'age', 'gender', 'segment', 'subscription_length',
+                'last_login_date', 'total_orders', 'total_spent', 'avg_order_value', 'churned'
+            ])
             logger.info(f"Tenant {self.tenant_id} için {len(df)} müşteri verisi yüklendi")
             return df
             
@@ -67,74 +129,80 @@ class ChurnTrainer:
             logger.error(f"Veri yükleme hatası: {e}")
             raise
     
-    def feature_engineering(self, df):
-        """Feature engineering işlemleri"""
+    def feature_engineering(self, df, pipeline: ChurnFeaturePipeline = None):
+        """Feature engineering (pipeline verilmezse veriden fit edilir)"""
         logger.info("Feature engineering başlatılıyor...")
         
-        # Kopya oluştur
-        df_processed = df.copy()
+        self.pipeline = pipeline or ChurnFeaturePipeline().fit(df)
+        X = self.pipeline.transform_frame(df)
+        y = df['churned']
         
-        # 1. Tarih feature'ları
-        if 'last_login_date' in df_processed.columns:
-            df_processed['last_login_date'] = pd.to_datetime(df_processed['last_login_date'], utc=True)
-            current_date = datetime.now().replace(tzinfo=None)
-            df_processed['days_since_last_login'] = (current_date - df_processed['last_login_date'].dt.tz_localize(None)).dt.days
-            df_processed['days_since_last_login'] = df_processed['days_since_last_login'].fillna(365)  # Hiç login olmamışsa 365 gün
-        else:
-            df_processed['days_since_last_login'] = 365
-        
-        # 2. Subscription length feature
-        if 'subscription_length' in df_processed.columns:
-            df_processed['subscription_length'] = df_processed['subscription_length'].fillna(0)
-        else:
-            df_processed['subscription_length'] = 0
-        
-        # 3. Demografik feature'lar
-        df_processed['age'] = df_processed['age'].fillna(df_processed['age'].median())
-        df_processed['gender'] = df_processed['gender'].fillna('Unknown')
-        df_processed['segment'] = df_processed['segment'].fillna('Unknown')
-        
-        # 4. İş feature'ları
-        df_processed['total_orders'] = df_processed['total_orders'].fillna(0)
-        df_processed['total_spent'] = df_processed['total_spent'].fillna(0.0)
-        df_processed['avg_order_value'] = df_processed['avg_order_value'].fillna(0.0)
+        self.features = self.pipeline.feature_names
+        logger.info(f"Feature engineering tamamlandı. {len(self.features)} feature kullanılıyor: {self.features}")
         
-        # 5. Categorical encoding (One-hot encoding)
-        categorical_cols = ['gender', 'segment']
-        for col in categorical_cols:
-            if col in df_processed.columns:
-                dummies = pd.get_dummies(df_processed[col], prefix=col)
-                df_processed = pd.concat([df_processed, dummies], axis=1)
-                df_processed.drop(col, axis=1, inplace=True)
-        
-        # 6. Numeric feature'ları seç
-        feature_cols = [
-            'age', 'subscription_length', 'days_since_last_login',
-            'total_orders', 'total_spent', 'avg_order_value'
-        ]
-        
-        # Categorical dummy column'ları ekle
-        categorical_dummies = [col for col in df_processed.columns if any(cat in col for cat in ['gender_', 'segment_'])]
-        feature_cols.extend(categorical_dummies)
+        return X, y
+    
+    def load_active_model(self):
+        """Aktif churn model kaydı ve booster'ı (yoksa None, None)"""
+        record = self.db.query(MLModel).filter(
+            MLModel.tenant_id == self.tenant_id,
+            MLModel.name == "churn_model",
+            MLModel.is_active == True
+        ).first()
+        if record is None or not os.path.exists(record.model_path):
+            return None, None
+        return record, joblib.load(record.model_path)
+    
+    def prepare_incremental(self, record):
+        """Son eğitimden sonra değişen müşteriler için (X, y); tam eğitim gerekiyorsa sebebi döner"""
+        stats_path = feature_stats_path(record.model_path)
+        pipeline_path = feature_pipeline_path(record.model_path)
+        if record.training_date is None or not os.path.exists(stats_path) or not os.path.exists(pipeline_path):
+            return None, None, "Önceki eğitimin feature istatistikleri yok"
         
-        # Mevcut olan feature'ları seç
-        available_features = [col for col in feature_cols if col in df_processed.columns]
+        df = self.load_customer_data(since=record.training_date)
+        if df.empty:
+            return df, None, None
         
-        # Target variable
-        target_col = 'churned'
+        # Önceki pipeline aynen uygulanır; yeni kategori yeni dummy kolonu demektir
+        pipeline = ChurnFeaturePipeline.load(pipeline_path)
+        new_features = pipeline.unseen_categories(df)
+        if new_features:
+            return None, None, f"Feature şeması değişti: {new_features}"
+        X, y = self.feature_engineering(df, pipeline)
         
-        # Feature ve target'ı ayır
-        X = df_processed[available_features]
-        y = df_processed[target_col]
+        with open(stats_path, encoding="utf-8") as f:
+            self.feature_stats = json.load(f)
+        drifted = detect_drift(self.feature_stats, X)
+        if drifted:
+            return None, None, f"Veri dağılımı kaydı: {drifted}"
         
-        self.features = available_features
-        logger.info(f"Feature engineering tamamlandı. {len(available_features)} feature kullanılıyor: {available_features}")
+        return X, y, None
+    
+    def tune_hyperparameters(self, X, y, test_size=0.2, random_state=42, **search_kwargs):
+        """Eğitim bölümünde paralel successive halving araması (test seti kullanılmaz)"""
+        from tuning import successive_halving
         
-        return X, y
+        # train_model ile aynı bölme; arama sadece eğitim kısmını iç validasyonla kullanır
+        X_train, _, y_train, _ = train_test_split(
+            X, y, test_size=test_size, random_state=random_state, stratify=y
+        )
+        X_fit, X_valid, y_fit, y_valid = train_test_split(
+            X_train, y_train, test_size=0.25, random_state=random_state, stratify=y_train
+        )
+        base_params = {**DEFAULT_PARAMS, 'random_state': random_state}
+        result = successive_halving(X_fit, y_fit, X_valid, y_valid, base_params, seed=random_state, **search_kwargs)
+        logger.info(
+            f"Hiperparametre araması tamamlandı: {result['trials']} deneme "
+            f"({result['cache_hits']} önbellekten), AUC {result['auc']:.3f}, parametreler {result['params']}"
+        )
+        return result
     
-    def train_model(self, X, y, test_size=0.2, random_state=42):
-        """LightGBM model eğitimi"""
+    def train_model(self, X, y, test_size=0.2, random_state=42, init_model=None, num_boost_round=100, params=None):
+        """LightGBM model eğitimi (init_model verilirse önceki booster üzerine devam eder)"""
         logger.info("Model eğitimi başlatılıyor...")
+        if init_model is None:
+            self.feature_stats = compute_feature_stats(X)
         
         # Train-test split
         X_train, X_test, y_train, y_test = train_test_split(
@@ -142,20 +210,9 @@ class ChurnTrainer:
         )
         
         # LightGBM parameters
-        params = {
-            'objective': 'binary',
-            'metric': 'auc',
-            'boosting_type': 'gbdt',
-            'num_leaves': 31,
-            'learning_rate': 0.05,
-            'feature_fraction': 0.9,
-            'bagging_fraction': 0.8,
-            'bagging_freq': 5,
-            'verbose': -1,
-            'random_state': random_state,
-            # Sınıf dengesizliği için
-            'is_unbalance': True
-        }
+        params = {**DEFAULT_PARAMS, 'random_state': random_state, **(params or {})}
+        if self.num_threads:
+            params['num_threads'] = self.num_threads
         
         # LightGBM dataset
         train_data = lgb.Dataset(X_train, label=y_train)
@@ -166,7 +223,8 @@ class ChurnTrainer:
             params,
             train_data,
             valid_sets=[test_data],
-            num_boost_round=100,
+            num_boost_round=num_boost_round,
+            init_model=init_model,
             callbacks=[lgb.early_stopping(stopping_rounds=10), lgb.log_evaluation(0)]
         )
         
@@ -208,7 +266,7 @@ class ChurnTrainer:
             'feature_importance': self.feature_importance
         }
     
-    def save_model(self, metrics):
+    def save_model(self, metrics, model_version="1.0"):
         """Modeli ve metadata'yı kaydet"""
         try:
             # Model dosyası yolu
@@ -220,6 +278,15 @@ class ChurnTrainer:
             # Modeli kaydet
             joblib.dump(self.model, model_path)
             
+            # Tahminde aynı dönüşümlerin uygulanması için feature pipeline'ı
+            if self.pipeline is not None:
+                self.pipeline.save(feature_pipeline_path(model_path))
+            
+            # Artımlı eğitimde drift kontrolü için referans istatistikler
+            if self.feature_stats is not None:
+                with open(feature_stats_path(model_path), "w", encoding="utf-8") as f:
+                    json.dump(self.feature_stats, f)
+            
             # Database'de model kaydını oluştur/güncelle
             existing_model = self.db.query(MLModel).filter(
                 MLModel.tenant_id == self.tenant_id,
@@ -241,14 +308,14 @@ class ChurnTrainer:
                 name="churn_model",
                 model_type="lightgbm",
                 model_path=model_path,
-                model_version="1.0",
+                model_version=model_version,
                 accuracy=metrics['accuracy'],
                 precision=metrics.get('precision'),
                 recall=metrics.get('recall'),
                 f1_score=metrics.get('f1_score'),
                 features=self.features,
                 feature_importance=feature_importance_with_threshold,
-                training_data_size=len(self.db.query(Customer).filter(Customer.tenant_id == self.tenant_id).all()),
+                training_data_size=self.db.query(Customer).filter(Customer.tenant_id == self.tenant_id).count(),
                 training_date=datetime.now(),
                 tenant_id=self.tenant_id,
                 is_active=True
@@ -265,10 +332,50 @@ class ChurnTrainer:
             self.db.rollback()
             raise
 
-def train_churn_model(tenant_id: int):
+def _train_incremental(trainer: ChurnTrainer):
+    """Artımlı eğitim; tam eğitim gerekiyorsa None döner"""
+    record, booster = trainer.load_active_model()
+    if booster is None:
+        logger.info(f"Tenant {trainer.tenant_id} için aktif model yok, tam eğitim yapılacak")
+        return None
+    
+    X, y, reason = trainer.prepare_incremental(record)
+    if reason:
+        logger.info(f"Tenant {trainer.tenant_id} için tam eğitime dönülüyor: {reason}")
+        return None
+    
+    if len(X) < MIN_TRAINING_CUSTOMERS or y.nunique() < 2 or y.value_counts().min() < 2:
+        # Değişiklikler yeterli sayıya ulaşana kadar mevcut model korunur;
+        # training_date değişmediği için bir sonraki çalıştırmada tekrar ele alınır
+        return {
+            'success': True,
+            'mode': 'skipped',
+            'model_id': record.id,
+            'metrics': None,
+            'training_rows': len(X),
+            'message': f'Tenant {trainer.tenant_id} için yeterli değişiklik yok ({len(X)} müşteri), model korundu'
+        }
+    
+    metrics = trainer.train_model(X, y, init_model=booster, num_boost_round=CHURN_INCREMENTAL_ROUNDS)
+    model_id = trainer.save_model(metrics, model_version=next_model_version(record.model_version))
+    return {
+        'success': True,
+        'mode': 'incremental',
+        'model_id': model_id,
+        'metrics': metrics,
+        'training_rows': len(X),
+        'message': f'Tenant {trainer.tenant_id} için churn modeli {len(X)} değişen müşteri ile güncellendi'
+    }
+
+def train_churn_model(tenant_id: int, num_threads: int = None, incremental: bool = False, tune: bool = False):
     """Churn model eğitimi ana fonksiyonu"""
     try:
-        trainer = ChurnTrainer(tenant_id)
+        trainer = ChurnTrainer(tenant_id, num_threads=num_threads)
+        
+        if incremental:
+            result = _train_incremental(trainer)
+            if result is not None:
+                return result
         
         # 1. Veri yükleme
         df = trainer.load_customer_data()
@@ -276,16 +383,24 @@ def train_churn_model(tenant_id: int):
         # 2. Feature engineering
         X, y = trainer.feature_engineering(df)
         
-        # 3. Model eğitimi
-        metrics = trainer.train_model(X, y)
+        # 3. Model eğitimi (tune: önce paralel hiperparametre araması)
+        if tune:
+            tuning = trainer.tune_hyperparameters(X, y)
+            num_boost_round = max(100, int(tuning['best_iteration'] * 1.2))
+            metrics = trainer.train_model(X, y, params=tuning['params'], num_boost_round=num_boost_round)
+            metrics['tuning'] = {k: v for k, v in tuning.items() if k != 'history'}
+        else:
+            metrics = trainer.train_model(X, y)
         
         # 4. Model kaydetme
         model_id = trainer.save_model(metrics)
         
         return {
             'success': True,
+            'mode': 'full',
             'model_id': model_id,
             'metrics': metrics,
+            'training_rows': len(df),
             'message': f'Tenant {tenant_id} için churn modeli başarıyla eğitildi'
         }
         
@@ -302,7 +417,9 @@ if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1:
         tenant_id = int(sys.argv[1])
-        result = train_churn_model(tenant_id)
+        result = train_churn_model(
+            tenant_id, incremental="--incremental" in sys.argv, tune="--tune" in sys.argv
+        )
         print(result)
     else:
-        print("Kullanım: python train.py <tenant_id>")
\ No newline at end of file
+        print("Kullanım: python train.py <tenant_id> [--incremental] [--tune]")
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+Churn modeli için paralel hiperparametre araması
+Successive halving: çok sayıda rastgele aday az turla denenir, en iyi
+1/eta kısmı eta kat daha fazla turla devam eder. Binlenmiş lgb.Dataset bir
+kez oluşturulup binary dosyaya yazılır; worker process'ler bu dosyayı bir kez
+yükler (deneme başına yeniden binleme yok). Deneme sonuçları veri parmak izi
+ve parametrelere göre diskte önbelleklenir.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import TUNING_TRIALS, TUNING_ETA, TUNING_MIN_ROUNDS, TUNING_MAX_ROUNDS, TUNING_CACHE_DIR
+from orchestrator import plan_resources
+
+logger = logging.getLogger(__name__)
+
+# Binlemeyi etkileyen parametreler aramaya dahil edilmez; dataset bir kez oluşturulur.
+# feature_pre_filter=False: min_child_samples denemeler arasında değişebilsin
+DATASET_PARAMS = {'feature_pre_filter': False, 'verbose': -1}
+
+# Worker process'te bir kez yüklenen datasetler
+_train_set = None
+_valid_set = None
+
+
+def sample_params(rng: np.random.Generator) -> dict:
+    """Arama uzayından rastgele bir aday"""
+    return {
+        'num_leaves': int(rng.choice([7, 15, 31, 63, 127])),
+        'learning_rate': round(float(10 ** rng.uniform(-2, -0.7)), 4),
+        'feature_fraction': round(float(rng.uniform(0.6, 1.0)), 2),
+        'bagging_fraction': round(float(rng.uniform(0.6, 1.0)), 2),
+        'min_child_samples': int(rng.choice([5, 10, 20, 50])),
+        'lambda_l2': float(rng.choice([0.0, 0.1, 1.0, 10.0])),
+    }
+
+
+def data_fingerprint(X: pd.DataFrame, y: pd.Series) -> str:
+    """Feature matrisi, kolon sırası ve hedefin içerik özeti"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(map(str, X.columns))).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(y, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def trial_key(fingerprint: str, params: dict, rounds: int) -> str:
+    payload = json.dumps({'data': fingerprint, 'params': params, 'rounds': rounds}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TrialCache:
+    """Deneme sonuçlarının disk önbelleği (anahtar başına bir JSON dosyası)"""
+
+    def __init__(self, directory: str = TUNING_CACHE_DIR):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, result: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{self._path(key)}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        os.replace(tmp, self._path(key))
+
+
+def build_binary_datasets(X_train, y_train, X_valid, y_valid, directory: str):
+    """Train/valid setlerini bir kez binleyip binary dosyaya yaz"""
+    import lightgbm as lgb
+
+    train_path = os.path.join(directory, "train.bin")
+    valid_path = os.path.join(directory, "valid.bin")
+    train_set = lgb.Dataset(X_train, label=y_train, params=DATASET_PARAMS)
+    train_set.save_binary(train_path)
+    lgb.Dataset(X_valid, label=y_valid, reference=train_set, params=DATASET_PARAMS).save_binary(valid_path)
+    return train_path, valid_path
+
+
+def _init_worker(train_path: str, valid_path: str):
+    """Worker başına datasetleri binary dosyadan bir kez yükle"""
+    import lightgbm as lgb
+
+    global _train_set, _valid_set
+    _train_set = lgb.Dataset(train_path, params=DATASET_PARAMS).construct()
+    _valid_set = lgb.Dataset(valid_path, reference=_train_set, params=DATASET_PARAMS).construct()
+
+
+def run_trial(params: dict, rounds: int) -> dict:
+    """Tek deneme: paylaşılan dataset üzerinde eğit, validasyon AUC'si döner"""
+    import lightgbm as lgb
+
+    started = time.perf_counter()
+    booster = lgb.train(
+        params,
+        _train_set,
+        num_boost_round=rounds,
+        valid_sets=[_valid_set],
+        callbacks=[lgb.early_stopping(stopping_rounds=max(5, rounds // 10), verbose=False)]
+    )
+    auc = booster.best_score['valid_0']['auc']
+    return {
+        'auc': float(auc),
+        'best_iteration': int(booster.best_iteration or rounds),
+        'duration_seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def _default_executor(workers: int, train_path: str, valid_path: str):
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(train_path, valid_path),
+    )
+
+
+def successive_halving(X_train, y_train, X_valid, y_valid, base_params: dict,
+                       n_trials: int = TUNING_TRIALS, eta: int = TUNING_ETA,
+                       min_rounds: int = TUNING_MIN_ROUNDS, max_rounds: int = TUNING_MAX_ROUNDS,
+                       max_workers: int = None, seed: int = 42, cache: TrialCache = None,
+                       executor_factory=_default_executor) -> dict:
+    """Bütçeli successive halving araması; en iyi parametreler ve deneme geçmişi"""
+    cache = cache or TrialCache()
+    rng = np.random.default_rng(seed)
+    # Train ve valid ayrı özetlenir: aynı satırların farklı bölünmesi aynı anahtarı vermez
+    fingerprint = hashlib.sha256(
+        f"{data_fingerprint(X_train, y_train)}:{data_fingerprint(X_valid, y_valid)}".encode("utf-8")
+    ).hexdigest()
+
+    candidates = []
+    for _ in range(n_trials):
+        candidate = sample_params(rng)
+        if candidate not in candidates:
+            candidates.append(candidate)
+
+    workers, threads = plan_resources(os.cpu_count() or 1, max_workers)
+    workers = min(workers, len(candidates))
+    trial_base = {**base_params, 'num_threads': threads, 'verbose': -1}
+
+    started = time.perf_counter()
+    history, cache_hits = [], 0
+    rounds = min_rounds
+    workdir = tempfile.mkdtemp(prefix="churn-tuning-")
+    try:
+        train_path, valid_path = build_binary_datasets(X_train, y_train, X_valid, y_valid, workdir)
+        with executor_factory(workers, train_path, valid_path) as executor:
+            while True:
+                keys = [trial_key(fingerprint, {**base_params, **c}, rounds) for c in candidates]
+                results = [cache.get(key) for key in keys]
+                cache_hits += sum(r is not None for r in results)
+
+                pending = {
+                    i: executor.submit(run_trial, {**trial_base, **candidates[i]}, rounds)
+                    for i, result in enumerate(results) if result is None
+                }
+                for i, future in pending.items():
+                    results[i] = future.result()
+                    cache.set(keys[i], results[i])
+
+                rung = [
+                    {'params': c, 'rounds': rounds, **r} for c, r in zip(candidates, results)
+                ]
+                history.extend(rung)
+                logger.info(
+                    f"Successive halving: {len(candidates)} aday x {rounds} tur, "
+                    f"en iyi AUC {max(r['auc'] for r in rung):.4f}"
+                )
+
+                if len(candidates) == 1 or rounds >= max_rounds:
+                    break
+                rung.sort(key=lambda r: r['auc'], reverse=True)
+                candidates = [r['params'] for r in rung[:max(1, math.ceil(len(rung) / eta))]]
+                rounds = min(rounds * eta, max_rounds)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    best = max((r for r in history if r['rounds'] == rounds), key=lambda r: r['auc'])
+    return {
+        'params': best['params'],
+        'auc': best['auc'],
+        'best_iteration': best['best_iteration'],
+        'trials': len(history),
+        'cache_hits': cache_hits,
+        'workers': workers,
+        'duration_seconds': round(time.perf_counter() - started, 3),
+        'history': history,
+    }